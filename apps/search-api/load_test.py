@@ -0,0 +1,106 @@
+"""
+Concurrent load test for the search API
+
+Runs a number of clients sending searches back to back while another
+client polls /health, then prints the latency of both. With searches off
+the event loop, health checks stay fast however busy the search pool is.
+
+    python load_test.py --url http://localhost:8105 -c 16 -d 20
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List
+
+import httpx
+import numpy as np
+
+QUERIES = [
+    "battery energy storage requirements",
+    "NPRR 1186 state of charge",
+    "ancillary service procurement",
+    "real-time market settlement",
+    "load resource participation",
+    "transmission outage coordination",
+    "SCADA telemetry for generation resources",
+    "firm fuel supply service",
+    "emergency response service deployment",
+    "congestion revenue rights auction",
+]
+
+
+def summarize(name: str, latencies: List[float], statuses: Dict[int, int], elapsed: float):
+    """Print request count, status codes and latency percentiles"""
+    if not latencies:
+        print(f"{name}: no requests completed")
+        return
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    codes = ", ".join(f"{code}: {count}" for code, count in sorted(statuses.items()))
+    print(
+        f"{name:>7}: {len(latencies)} requests ({len(latencies) / elapsed:.1f}/s, {codes}) "
+        f"p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms, max {max(latencies):.1f} ms"
+    )
+
+
+async def search_client(client: httpx.AsyncClient, deadline: float, limit: int,
+                        latencies: List[float], statuses: Dict[int, int]):
+    """Send random queries back to back until the deadline"""
+    while time.perf_counter() < deadline:
+        # A suffix keeps the result cache from answering every repeat
+        query = f"{random.choice(QUERIES)} {random.randint(0, 100000)}"
+        start = time.perf_counter()
+        response = await client.post("/search", json={"query": query, "limit": limit})
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def health_client(client: httpx.AsyncClient, deadline: float, interval: float,
+                        latencies: List[float], statuses: Dict[int, int]):
+    """Poll /health every interval seconds until the deadline"""
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get("/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        await asyncio.sleep(interval)
+
+
+async def run(url: str, concurrency: int, duration: float, limit: int, interval: float):
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+        ready = await client.get("/ready")
+        if ready.status_code != 200:
+            print(f"Warning: service is not ready yet ({ready.status_code})")
+
+        search_latencies, search_statuses = [], {}
+        health_latencies, health_statuses = [], {}
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(
+            health_client(client, deadline, interval, health_latencies, health_statuses),
+            *(search_client(client, deadline, limit, search_latencies, search_statuses)
+              for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - start
+
+        print(f"{concurrency} search clients for {elapsed:.1f} s against {url}")
+        summarize("search", search_latencies, search_statuses, elapsed)
+        summarize("health", health_latencies, health_statuses, elapsed)
+        snapshot = (await client.get("/metrics")).json()
+        counters = snapshot.get("counters", {})
+        if counters.get("batches"):
+            print(f"Mean batch size since start: {counters['batched_searches'] / counters['batches']:.1f}")
+        print(f"Gauges after the run: {snapshot.get('gauges', {})}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8105", help="Base URL of the search API")
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="Concurrent search clients")
+    parser.add_argument("-d", "--duration", type=float, default=20, help="Seconds to run")
+    parser.add_argument("-n", "--limit", type=int, default=10, help="Results per search")
+    parser.add_argument("--health-interval", type=float, default=0.05, help="Seconds between health checks")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.concurrency, args.duration, args.limit, args.health_interval))
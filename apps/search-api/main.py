@@ -2,20 +2,45 @@
 FastAPI wrapper for ChromaDB search functionality
 """
 
+import asyncio
+import dataclasses
+import json
 import os
 import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Dict, Any
-from fastapi import FastAPI, HTTPException
+from typing import Callable, List, Optional, Dict, Any, Tuple
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
 
-# Add the parent directory to the path to import energy_data_search
-sys.path.append(str(Path(__file__).parent.parent.parent))
+# Optional: faster JSON encoding and brotli compression
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Add the energy-data-search sources to the path to import energy_data_search
+sys.path.append(str(Path(__file__).parent.parent.parent / "energy-data-search" / "src"))
 
 try:
+    from energy_data_search.loaders.document_metadata import make_snippet
+    from energy_data_search.query.index_jobs import IndexJobManager
+    from energy_data_search.query.query_log import QueryLog
     from energy_data_search.query.search_engine import EnergyDataSearchEngine
+    from energy_data_search.query.trace import SearchTrace
+    from energy_data_search.utils.index_lock import IndexWriterLock
+    from energy_data_search.utils.metrics import SearchMetrics
 except ImportError as e:
     print(f"Warning: Could not import EnergyDataSearchEngine: {e}")
     print("Search functionality will be limited")
@@ -24,11 +49,97 @@ except ImportError as e:
 # Load environment variables
 load_dotenv()
 
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when it is installed"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred encoding the client accepts: "br" when brotli is installed, then "gzip", else None"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    default = accepted.get("*", 0.0)
+    # max keeps the first of equally weighted encodings
+    best = max(["br", "gzip"] if brotli else ["gzip"], key=lambda encoding: accepted.get(encoding, default))
+    return best if accepted.get(best, default) > 0 else None
+
+class CompressionMiddleware:
+    """
+    Compress JSON and text responses with brotli or gzip, as negotiated from Accept-Encoding
+    
+    Responses smaller than minimum_size, already encoded or streamed in
+    several parts are sent as they are.
+    """
+
+    def __init__(self, app, minimum_size: int = 1000, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress(body) + compressor.flush()
+
+    async def __call__(self, scope, receive, send):
+        encoding = None
+        if scope["type"] == "http":
+            encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held until the body shows whether to compress
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            headers = MutableHeaders(scope=start)
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "")
+            if (
+                not message.get("more_body", False)
+                and "content-encoding" not in headers
+                and len(body) >= self.minimum_size
+                and (content_type.startswith("application/json") or content_type.startswith("text/"))
+            ):
+                body = self.compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = {**message, "body": body}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Energence.ai Search API",
     description="ChromaDB-powered search for ERCOT energy documents",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS
@@ -54,6 +165,258 @@ if EnergyDataSearchEngine:
     except Exception as e:
         print(f"Warning: Could not initialize search engine: {e}")
 
+# Outermost, so it compresses every response including errors
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=search_engine.config.api_compress_min_bytes if search_engine else 1000
+)
+
+# Rolling per-stage latency histograms of recent searches, served at /metrics
+metrics = SearchMetrics() if search_engine else None
+
+# First-page search requests, replayed at startup to precompute the most frequent
+query_log = None
+if search_engine:
+    query_log = QueryLog(
+        search_engine.config.query_log_path,
+        max_bytes=int(search_engine.config.query_log_max_mb * 1024 * 1024)
+    )
+
+def reload_after_job(job: Dict[str, Any]):
+    """Open the index a finished job wrote to, so searches stop serving the old one"""
+    if watching_index:
+        index_written.set()
+        return
+    try:
+        search_engine.refresh()
+    except Exception as e:
+        print(f"Warning: Could not reload the index after job {job['id']}: {e}")
+
+# Background index updates, one at a time in a worker process
+index_jobs = IndexJobManager(search_engine.config, on_finished=reload_after_job) if search_engine else None
+
+# /ready reports 503 until the warmup below has finished
+warmup_state: Dict[str, Any] = {"ready": search_engine is None, "stats": None}
+
+def run_warmup():
+    """Load the models, touch the index and precompute the top logged searches"""
+    try:
+        searches = query_log.top(search_engine.config.warmup_top_queries)
+        warmup_state["stats"] = search_engine.warmup(searches)
+        print(f"✓ Warmup done: {warmup_state['stats']}")
+    except Exception as e:
+        print(f"Warning: Warmup failed: {e}")
+    warmup_state["ready"] = True
+
+if search_engine:
+    threading.Thread(target=run_warmup, name="warmup", daemon=True).start()
+
+# Index swaps since startup, reported by /ready
+reload_state: Dict[str, Any] = {"reloads": 0, "last_reload": None, "stats": None}
+# Set when a job has written the index, to check it before the next interval
+index_written = threading.Event()
+# Held while swapping engines, so no call starts on an engine being closed
+engine_swap_lock = threading.Lock()
+
+def watch_index():
+    """Open, warm and switch to the index whenever it is written or replaced on disk
+    
+    An update by a job or another process, a rebuilt collection or a
+    snapshot path pointed at another bundle is opened in a new engine
+    while the current one keeps serving. Once the new engine is warm the
+    global reference is swapped; requests already running finish on the
+    old engine, which is then closed, and later ones use the new one.
+    """
+    global search_engine
+    interval = search_engine.config.index_watch_interval
+    writer_lock = IndexWriterLock(search_engine.config.chroma_persist_dir)
+    while True:
+        index_written.wait(interval)
+        index_written.clear()
+        engine = search_engine
+        try:
+            # Wait for a writer to finish rather than open a partial index
+            if not warmup_state["ready"] or writer_lock.held() or not engine.index_changed():
+                continue
+            start = time.perf_counter()
+            new_engine = engine.reopen()
+            stats = new_engine.warmup(query_log.top(new_engine.config.warmup_top_queries))
+            if new_engine.index_replaced():
+                # Replaced again while warming up; the next check opens the newest
+                new_engine.close()
+                continue
+            with engine_swap_lock:
+                search_engine = new_engine
+            reload_state.update(
+                reloads=reload_state["reloads"] + 1,
+                last_reload=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                stats={**stats, "reload_ms": round((time.perf_counter() - start) * 1000, 1)}
+            )
+            metrics.increment("index_reloads")
+            print(f"✓ Switched to index {new_engine.index_identity}: {reload_state['stats']}")
+            if not engine.close(timeout=engine.config.api_request_timeout):
+                print("Warning: Searches still running on the previous index, left open")
+        except Exception as e:
+            metrics.increment("index_reload_errors")
+            print(f"Warning: Index reload failed, still serving the previous index: {e}")
+
+watching_index = bool(search_engine and search_engine.config.index_watch_interval > 0)
+if watching_index:
+    # Each write is picked up by swapping in a new engine, not in place
+    search_engine.follow_writes = False
+    threading.Thread(target=watch_index, name="index-watch", daemon=True).start()
+
+class SearchExecutor:
+    """Bounded thread pool for blocking engine calls, keeping them off the event loop"""
+    
+    def __init__(self, workers: int, max_queued: int, timeout: float):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search")
+        self.workers = workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.queued = 0
+        self.running = 0
+        self._lock = threading.Lock()
+    
+    async def run(self, call: Callable[[Any], Any], trace: Optional["SearchTrace"] = None) -> Any:
+        """
+        Await call(engine) on the pool with the current search engine
+        
+        The engine is held until the call returns, so an index swap closes
+        it only after the call has finished. Raises 503 if max_queued calls are already waiting for a worker and
+        504 after timeout seconds, queueing included. A call that times out
+        while queued never runs; one already running finishes unobserved.
+        Time spent waiting is added to trace.queue_ms.
+        """
+        with self._lock:
+            if self.queued >= self.max_queued:
+                metrics.increment("rejected")
+                raise HTTPException(status_code=503, detail="Search queue is full", headers={"Retry-After": "1"})
+            self.queued += 1
+        submitted = time.perf_counter()
+        
+        def work():
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            if trace is not None:
+                trace.queue_ms += (time.perf_counter() - submitted) * 1000
+            with engine_swap_lock:
+                engine = search_engine.acquire()
+            try:
+                return call(engine)
+            finally:
+                engine.release()
+                with self._lock:
+                    self.running -= 1
+        
+        future = self.pool.submit(work)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            if future.cancel():
+                with self._lock:
+                    self.queued -= 1
+            metrics.increment("timeouts")
+            raise HTTPException(status_code=504, detail=f"Request timed out after {self.timeout:g} s")
+
+search_executor = None
+if search_engine:
+    search_executor = SearchExecutor(
+        workers=search_engine.config.api_search_workers,
+        max_queued=search_engine.config.api_max_queued,
+        timeout=search_engine.config.api_request_timeout
+    )
+    metrics.register_gauge("queue_depth", lambda: search_executor.queued)
+    metrics.register_gauge("searches_running", lambda: search_executor.running)
+
+class PendingBatch:
+    """First-page searches with the same options, collected until dispatched"""
+    
+    def __init__(self, key: str, options: Dict[str, Any]):
+        self.key = key
+        self.options = options
+        # (query, arrival time, future resolved with (page, trace))
+        self.requests: List[Tuple[str, float, asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class SearchBatcher:
+    """
+    Micro-batches concurrent first-page searches
+    
+    Searches with the same options arriving within window_ms of the first
+    one are embedded and searched together by search_pages, dispatched
+    early once max_batch have arrived. When no search is in progress a
+    search is dispatched at once, so batching adds no latency at low load.
+    Each request gets its own page and a copy of the batch trace whose
+    queue_ms includes the window it waited.
+    """
+    
+    def __init__(self, executor: SearchExecutor, window_ms: float, max_batch: int):
+        self.executor = executor
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        # Options key -> the batch still collecting searches
+        self.open: Dict[str, PendingBatch] = {}
+        self.in_flight = 0
+        self._tasks: set = set()
+    
+    async def search(self, params: Dict[str, Any]) -> Tuple[Any, "SearchTrace"]:
+        """Page and trace for one search, given as search_page arguments without a cursor"""
+        loop = asyncio.get_running_loop()
+        options = {name: value for name, value in params.items() if name != "query"}
+        key = json.dumps(options, sort_keys=True)
+        batch = self.open.get(key)
+        if batch is None:
+            batch = self.open[key] = PendingBatch(key, options)
+            batch.timer = loop.call_later(self.window, self._dispatch, batch)
+        future = loop.create_future()
+        batch.requests.append((params["query"], time.perf_counter(), future))
+        idle = self.in_flight == 0 and self.executor.running + self.executor.queued == 0
+        if idle or len(batch.requests) >= self.max_batch:
+            batch.timer.cancel()
+            self._dispatch(batch)
+        return await future
+    
+    def _dispatch(self, batch: PendingBatch):
+        if self.open.get(batch.key) is batch:
+            del self.open[batch.key]
+        self.in_flight += 1
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: PendingBatch):
+        queries = [query for query, _, _ in batch.requests]
+        trace = SearchTrace()
+        dispatched = time.perf_counter()
+        try:
+            pages = await self.executor.run(
+                lambda engine: engine.search_pages(queries, **batch.options, trace=trace),
+                trace
+            )
+        except Exception as e:
+            self.in_flight -= 1
+            for _, _, future in batch.requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.in_flight -= 1
+        metrics.increment("batches")
+        metrics.increment("batched_searches", len(queries))
+        for (_, arrived, future), page in zip(batch.requests, pages):
+            if not future.done():
+                waited_ms = (dispatched - arrived) * 1000
+                future.set_result((page, dataclasses.replace(trace, queue_ms=trace.queue_ms + waited_ms)))
+
+search_batcher = None
+if search_engine and search_engine.config.api_batch_window_ms > 0:
+    search_batcher = SearchBatcher(
+        search_executor,
+        window_ms=search_engine.config.api_batch_window_ms,
+        max_batch=search_engine.config.api_max_batch
+    )
+
 # Request/Response models
 class SearchRequest(BaseModel):
     query: str
@@ -61,26 +424,90 @@ class SearchRequest(BaseModel):
     filters: Optional[Dict[str, Any]] = None
     document_types: Optional[List[str]] = None
     date_range: Optional[Dict[str, str]] = None
+    cursor: Optional[str] = None
+    collapse: Optional[bool] = None
+    mmr: Optional[bool] = None
+    include_content: bool = True
+    # Result fields to return (default all); "metadata.<key>" selects one metadata key
+    fields: Optional[List[str]] = None
+    # Cut content to a snippet of at most this many characters
+    snippet_length: Optional[int] = Field(default=None, ge=20)
+    trace: bool = False
+
+# Fields of a search result; SearchRequest.fields picks from these
+RESULT_FIELDS = ("id", "content", "metadata", "score", "source_hits", "hydrated")
 
 class SearchResult(BaseModel):
+    id: Optional[str] = None
+    content: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+    score: Optional[float] = None
+    source_hits: Optional[int] = None
+    hydrated: Optional[bool] = None
+
+def result_projection(fields: Optional[List[str]]) -> Tuple[List[str], Optional[List[str]]]:
+    """Result fields and metadata keys to return for a request's fields; None keys means all metadata"""
+    if fields is None:
+        return list(RESULT_FIELDS), None
+    names, keys = [], []
+    for field in fields:
+        name, _, key = field.partition(".")
+        if name not in RESULT_FIELDS or (key and name != "metadata"):
+            raise ValueError(f"Unknown result field: {field}")
+        if key:
+            keys.append(key)
+        if name not in names:
+            names.append(name)
+    if "metadata" in fields:
+        keys = None
+    return names, keys
+
+class DocumentChunk(BaseModel):
     id: str
     content: str
     metadata: Dict[str, Any]
+    chunk_index: Optional[int] = None
+
+class DocumentResponse(BaseModel):
+    chunk: DocumentChunk
+    before: List[DocumentChunk]
+    after: List[DocumentChunk]
+
+class ChunksRequest(BaseModel):
+    ids: List[str]
+
+class ChunksResponse(BaseModel):
+    chunks: Dict[str, str]
+
+class RelatedRequest(BaseModel):
+    sources: List[str]
+    limit: Optional[int] = None
+
+class RelatedDocument(BaseModel):
+    source: str
+    file_name: str
     score: float
 
+class RelatedResponse(BaseModel):
+    related: Dict[str, List[RelatedDocument]]
+
 class SearchResponse(BaseModel):
     query: str
     results: List[SearchResult]
     total_results: int
     search_time_ms: float
+    next_cursor: Optional[str] = None
+    trace: Optional[Dict[str, Any]] = None
 
-class IndexUpdateResponse(BaseModel):
+class IndexJobResponse(BaseModel):
+    id: str
     status: str
-    files_processed: int
-    files_added: int
-    files_updated: int
-    files_skipped: int
-    errors: List[str]
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    progress: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
 
 class StatsResponse(BaseModel):
     total_documents: int
@@ -100,9 +527,15 @@ async def root():
         "search_engine": "available" if search_engine else "not initialized",
         "endpoints": {
             "search": "/search",
+            "chunks": "/chunks",
+            "document": "/document/{id}",
+            "related": "/related",
             "index_update": "/index/update",
+            "index_jobs": "/index/jobs",
             "stats": "/stats",
-            "health": "/health"
+            "metrics": "/metrics",
+            "health": "/health",
+            "ready": "/ready"
         }
     }
 
@@ -111,13 +544,32 @@ async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "search_engine": "available" if search_engine else "not initialized"
+        "search_engine": "available" if search_engine else "not initialized",
+        "ready": warmup_state["ready"]
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check: 503 until the startup warmup has finished"""
+    content = {"ready": warmup_state["ready"], "warmup": warmup_state["stats"], "index_reload": reload_state}
+    return JSONResponse(content=content, status_code=200 if warmup_state["ready"] else 503)
+
 @app.post("/search", response_model=SearchResponse)
 async def search(request: SearchRequest):
     """
     Search for documents using semantic search
+    
+    Pass the returned next_cursor back with the same query and filters to
+    get the following page. document_types and date_range ({"start": ...,
+    "end": ...} as YYYY-MM-DD, either optional) filter on document metadata.
+    collapse returns one result per document with its hit count in
+    source_hits, and mmr diversifies the results. With include_content
+    false each result's content is a short snippet (hydrated is false);
+    fetch the full text of the chunks shown with /chunks. fields limits
+    each result to the fields listed, with "metadata.<key>" for single
+    metadata keys, and snippet_length cuts content to a snippet of at most
+    that many characters. With trace the response includes the time spent
+    per search stage.
     """
     if not search_engine:
         # Return mock data if search engine is not available
@@ -140,69 +592,178 @@ async def search(request: SearchRequest):
         )
     
     try:
-        import time
         start_time = time.time()
         
         # Perform the search
-        results = search_engine.search(
+        filters = request.filters or {}
+        date_range = request.date_range or {}
+        names, metadata_keys = result_projection(request.fields)
+        snippet_length = request.snippet_length
+        # Stored snippets are long enough: skip fetching the full chunk text
+        hydrate = request.include_content and "content" in names and not (
+            snippet_length and snippet_length <= search_engine.config.snippet_length
+        )
+        params = dict(
             query=request.query,
-            max_results=request.limit,
-            filters=request.filters
+            page_size=request.limit,
+            filter_directory=filters.get("directory"),
+            filter_file_type=filters.get("file_type"),
+            document_types=request.document_types,
+            date_from=date_range.get("start"),
+            date_to=date_range.get("end"),
+            collapse=request.collapse,
+            mmr=request.mmr,
+            hydrate=hydrate
         )
+        if search_batcher and not request.cursor:
+            page, trace = await search_batcher.search(params)
+        else:
+            trace = SearchTrace()
+            page = await search_executor.run(
+                lambda engine: engine.search_page(**params, cursor=request.cursor, trace=trace),
+                trace
+            )
+        if not request.cursor:
+            query_log.record(params)
         
-        search_time_ms = (time.time() - start_time) * 1000
+        # Plain dicts of the requested fields, encoded without response model validation
+        with trace.stage("serialize"):
+            search_results = []
+            for result in page.results:
+                content = result.content
+                if snippet_length and len(content) > snippet_length:
+                    content = make_snippet(content, snippet_length)
+                values = {
+                    "id": result.chunk_id or "",
+                    "content": content,
+                    "metadata": result.metadata if metadata_keys is None else {
+                        key: result.metadata[key] for key in metadata_keys if key in result.metadata
+                    },
+                    "score": result.score,
+                    "source_hits": result.source_hits,
+                    "hydrated": result.hydrated
+                }
+                search_results.append({name: values[name] for name in names})
         
-        # Transform results to match our response model
-        search_results = []
-        for result in results:
-            search_results.append(SearchResult(
-                id=result.get("id", ""),
-                content=result.get("content", ""),
-                metadata=result.get("metadata", {}),
-                score=result.get("score", 0.0)
-            ))
+        search_time_ms = (time.time() - start_time) * 1000
+        trace.total_ms = search_time_ms
+        metrics.observe(trace)
         
-        return SearchResponse(
-            query=request.query,
-            results=search_results,
-            total_results=len(search_results),
-            search_time_ms=search_time_ms
-        )
+        return FastJSONResponse({
+            "query": request.query,
+            "results": search_results,
+            "total_results": len(search_results),
+            "search_time_ms": search_time_ms,
+            "next_cursor": page.next_cursor,
+            "trace": trace.to_dict() if request.trace else None
+        })
         
+    except HTTPException:
+        # Queue full or timed out, already counted
+        raise
+    except ValueError as e:
+        # Malformed cursor or date
+        metrics.record_error()
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        metrics.record_error()
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
 
-@app.post("/index/update", response_model=IndexUpdateResponse)
-async def update_index():
+@app.get("/metrics")
+async def get_metrics(format: str = "json"):
+    """
+    Search counters and per-stage latency histograms over the last five minutes
+    
+    Stages are embed, ann, hydrate, rerank, diversify, serialize and total,
+    in milliseconds. Use format=prometheus for the Prometheus text format.
     """
-    Trigger an incremental index update
+    if not metrics:
+        raise HTTPException(status_code=503, detail="Search engine not available")
+    if format == "prometheus":
+        return PlainTextResponse(metrics.to_prometheus())
+    return metrics.snapshot()
+
+@app.post("/chunks", response_model=ChunksResponse)
+async def get_chunks(request: ChunksRequest):
+    """
+    Get the full content of search result chunks by ID, in one batched lookup
+    
+    Unknown IDs are left out of the response.
     """
     if not search_engine:
-        return IndexUpdateResponse(
-            status="error",
-            files_processed=0,
-            files_added=0,
-            files_updated=0,
-            files_skipped=0,
-            errors=["Search engine not initialized"]
-        )
+        raise HTTPException(status_code=503, detail="Search engine not available")
+    if len(request.ids) > 100:
+        raise HTTPException(status_code=400, detail="At most 100 chunk IDs per request")
     
     try:
-        # Call the index update method
-        stats = search_engine.index_all_sources()
-        
-        return IndexUpdateResponse(
-            status="success",
-            files_processed=stats.get("total_files", 0),
-            files_added=stats.get("files_added", 0),
-            files_updated=stats.get("files_updated", 0),
-            files_skipped=stats.get("files_skipped", 0),
-            errors=stats.get("errors", [])
+        chunks = await search_executor.run(lambda engine: engine.get_chunks(request.ids))
+        return ChunksResponse(chunks=chunks)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving chunks: {str(e)}")
+
+@app.post("/related", response_model=RelatedResponse)
+async def get_related(request: RelatedRequest):
+    """
+    Get the most similar documents to each of a page of result source files
+    
+    Read from the precomputed related-documents graph, so no search is run.
+    Sources not in the graph get an empty list.
+    """
+    if not search_engine:
+        raise HTTPException(status_code=503, detail="Search engine not available")
+    if len(request.sources) > 100:
+        raise HTTPException(status_code=400, detail="At most 100 sources per request")
+    
+    try:
+        related = await search_executor.run(
+            lambda engine: engine.related_documents(request.sources, request.limit)
         )
-        
+        return RelatedResponse(related={
+            source: [
+                RelatedDocument(source=other, file_name=Path(other).name, score=score)
+                for other, score in documents
+            ]
+            for source, documents in related.items()
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving related documents: {str(e)}")
+
+@app.post("/index/update", response_model=IndexJobResponse, status_code=202)
+async def update_index():
+    """
+    Queue an incremental index update; poll /index/jobs/{id} for its progress
+    """
+    if not index_jobs:
+        raise HTTPException(status_code=503, detail="Search engine not initialized")
+    
+    try:
+        return IndexJobResponse(**index_jobs.submit())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Index update error: {str(e)}")
 
+@app.get("/index/jobs", response_model=List[IndexJobResponse])
+async def list_index_jobs(limit: int = 20):
+    """
+    Recent index update jobs, newest first
+    """
+    if not index_jobs:
+        return []
+    return [IndexJobResponse(**job) for job in index_jobs.list(limit)]
+
+@app.get("/index/jobs/{job_id}", response_model=IndexJobResponse)
+async def get_index_job(job_id: str):
+    """
+    Status and progress of an index update job
+    """
+    job = index_jobs.get(job_id) if index_jobs else None
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Index job not found: {job_id}")
+    return IndexJobResponse(**job)
+
 @app.get("/stats", response_model=StatsResponse)
 async def get_stats():
     """
@@ -218,33 +779,52 @@ async def get_stats():
         )
     
     try:
-        stats = search_engine.get_statistics()
+        stats = await search_executor.run(lambda engine: engine.get_stats())
         
         return StatsResponse(
-            total_documents=stats.get("total_documents", 0),
-            total_chunks=stats.get("total_chunks", 0),
-            index_size_mb=stats.get("index_size_mb", 0.0),
+            total_documents=stats.get("source_files", 0),
+            total_chunks=stats.get("document_count", 0),
+            index_size_mb=stats.get("storage_mb", 0.0),
             last_updated=stats.get("last_updated", "N/A"),
-            collections=stats.get("collections", [])
+            collections=[stats["collection_name"]]
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Stats error: {str(e)}")
 
-@app.get("/document/{document_id}")
-async def get_document(document_id: str):
+@app.get("/document/{document_id}", response_model=DocumentResponse)
+async def get_document(document_id: str, context: Optional[int] = Query(default=None, ge=0, le=20)):
     """
-    Get a specific document by ID
+    Get a search result chunk by ID with the chunks around it in its document
+    
+    Up to `context` chunks (default `document_context_chunks`) before and after it are included.
     """
     if not search_engine:
         raise HTTPException(status_code=503, detail="Search engine not available")
     
     try:
-        document = search_engine.get_document(document_id)
+        document = await search_executor.run(lambda engine: engine.get_document(document_id, context))
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
-        return document
         
+        def to_model(chunk) -> DocumentChunk:
+            return DocumentChunk(
+                id=chunk.chunk_id,
+                content=chunk.content,
+                metadata=chunk.metadata,
+                chunk_index=chunk.chunk_index
+            )
+        
+        return DocumentResponse(
+            chunk=to_model(document.chunk),
+            before=[to_model(chunk) for chunk in document.before],
+            after=[to_model(chunk) for chunk in document.after]
+        )
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving document: {str(e)}")
 
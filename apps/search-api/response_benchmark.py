@@ -0,0 +1,79 @@
+"""
+Response size and latency benchmark for the search API
+
+Sends the same queries with full and projected results (fields and
+snippet_length), each without compression, with gzip and with brotli,
+and prints the bytes on the wire and the latency of each. A first round
+warms the result cache, so the differences are serialization,
+compression and transfer rather than search.
+
+    python response_benchmark.py --url http://localhost:8105 -n 20 -r 10
+"""
+
+import argparse
+import time
+from typing import Any, Dict, List
+
+import httpx
+import numpy as np
+
+from load_test import QUERIES
+
+# What a result list renders: title, link and a short snippet
+PROJECTION = {
+    "fields": ["id", "content", "score", "metadata.file_name", "metadata.source", "metadata.document_type"],
+    "snippet_length": 160
+}
+
+ENCODINGS = ["identity", "gzip", "br"]
+
+
+def measure(client: httpx.Client, body: Dict[str, Any], encoding: str, rounds: int) -> Dict[str, Any]:
+    """Send every query rounds times and collect wire bytes, latency and the encoding served"""
+    sizes: List[int] = []
+    latencies: List[float] = []
+    served = set()
+    for _ in range(rounds):
+        for query in QUERIES:
+            start = time.perf_counter()
+            response = client.post("/search", json={**body, "query": query},
+                                   headers={"Accept-Encoding": encoding})
+            response.read()
+            latencies.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+            sizes.append(response.num_bytes_downloaded)
+            served.add(response.headers.get("content-encoding", "identity"))
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return {"bytes": float(np.mean(sizes)), "p50": p50, "p95": p95, "served": ",".join(sorted(served))}
+
+
+def run(url: str, limit: int, rounds: int):
+    with httpx.Client(base_url=url, timeout=60) as client:
+        ready = client.get("/ready")
+        if ready.status_code != 200:
+            print(f"Warning: service is not ready yet ({ready.status_code})")
+
+        variants = {"full": {"limit": limit}, "projected": {"limit": limit, **PROJECTION}}
+        for body in variants.values():
+            measure(client, body, "identity", 1)
+
+        print(f"{len(QUERIES)} queries x {rounds} rounds, limit {limit}, against {url}")
+        print(f"{'results':>10} {'encoding':>9} {'served':>9} {'bytes':>9} {'vs full':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        baseline = None
+        for name, body in variants.items():
+            for encoding in ENCODINGS:
+                stats = measure(client, body, encoding, rounds)
+                baseline = baseline or stats["bytes"]
+                print(
+                    f"{name:>10} {encoding:>9} {stats['served']:>9} {stats['bytes']:>9.0f} "
+                    f"{stats['bytes'] / baseline:>8.1%} {stats['p50']:>8.2f} {stats['p95']:>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8105", help="Base URL of the search API")
+    parser.add_argument("-n", "--limit", type=int, default=20, help="Results per search")
+    parser.add_argument("-r", "--rounds", type=int, default=10, help="Times each query is sent per variant")
+    args = parser.parse_args()
+    run(args.url, args.limit, args.rounds)
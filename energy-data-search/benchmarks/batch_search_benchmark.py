@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""Compare per-query search against batched search_many throughput."""
+
+import sys
+import time
+from pathlib import Path
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from energy_data_search.config import Config
+from energy_data_search.query.search_engine import EnergyDataSearchEngine
+from test_energy_queries import TEST_QUERIES
+
+console = Console()
+
+
+def make_queries(count: int) -> list:
+    """Distinct queries built from the test set so no two hit the same cache entry."""
+    base = [q["query"] for q in TEST_QUERIES]
+    return [f"{base[i % len(base)]} {i // len(base)}" for i in range(count)]
+
+
+@click.command()
+@click.option('--queries', '-q', 'n_queries', default=1000, help='Number of queries to run')
+@click.option('--batch-size', '-b', default=64, help='Queries per search_many call')
+@click.option('--max-results', '-n', default=10, help='Results per query')
+def main(n_queries, batch_size, max_results):
+    """Run the same queries in a loop and in batches with caching disabled."""
+    config = Config(query_cache_size=0, result_cache_size=0)
+    engine = EnergyDataSearchEngine(config)
+    queries = make_queries(n_queries)
+
+    # Load the model and index before timing
+    engine.search_many(queries[:2], max_results=max_results)
+
+    start = time.perf_counter()
+    loop_results = [engine.search(query, max_results=max_results) for query in queries]
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_results = []
+    for i in range(0, len(queries), batch_size):
+        batch_results.extend(engine.search_many(queries[i:i + batch_size], max_results=max_results))
+    batch_s = time.perf_counter() - start
+
+    agreement = sum(
+        [r.source for r in a] == [r.source for r in b] for a, b in zip(loop_results, batch_results)
+    ) / len(queries)
+
+    table = Table(title=f"{n_queries} queries, top {max_results}")
+    table.add_column("Mode", style="cyan")
+    table.add_column("Total s", justify="right")
+    table.add_column("Queries/s", justify="right", style="green")
+    table.add_row("search() loop", f"{loop_s:.2f}", f"{n_queries / loop_s:.1f}")
+    table.add_row(f"search_many (batch {batch_size})", f"{batch_s:.2f}", f"{n_queries / batch_s:.1f}")
+    console.print(table)
+    console.print(f"Speed-up: {loop_s / batch_s:.1f}x, identical result lists: {agreement:.1%}")
+
+
+if __name__ == "__main__":
+    main()
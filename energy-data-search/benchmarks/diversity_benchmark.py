@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""Latency and source diversity of collapsed and MMR search results."""
+
+import sys
+import time
+from pathlib import Path
+
+import click
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from energy_data_search.config import Config
+from energy_data_search.query.diversity import mmr_select
+from energy_data_search.query.search_engine import EnergyDataSearchEngine
+from test_energy_queries import TEST_QUERIES
+
+console = Console()
+
+
+@click.command()
+@click.option('--k', default=10, help='Results per query')
+@click.option('--candidates', '-c', default=100, help='Candidates collapsed or diversified')
+def main(k, candidates):
+    """Run the test queries plain, collapsed, with MMR and with both."""
+    config = Config(result_cache_size=0, diversity_candidates=candidates)
+    engine = EnergyDataSearchEngine(config)
+    queries = [q["query"] for q in TEST_QUERIES]
+
+    # Load the model and index before timing
+    engine.search(queries[0], max_results=k, mmr=True)
+
+    table = Table(title=f"{len(queries)} queries, top {k} from {candidates} candidates")
+    table.add_column("Mode", style="cyan")
+    table.add_column("p50 ms", justify="right")
+    table.add_column("p95 ms", justify="right")
+    table.add_column("Distinct sources", justify="right", style="green")
+    for name, collapse, mmr in (("plain", False, False), ("collapse", True, False),
+                                ("mmr", False, True), ("collapse + mmr", True, True)):
+        latencies, sources = [], []
+        for query in queries:
+            start = time.perf_counter()
+            results = engine.search(query, max_results=k, collapse=collapse, mmr=mmr)
+            latencies.append((time.perf_counter() - start) * 1000)
+            sources.append(len({r.source for r in results}))
+        table.add_row(
+            name,
+            f"{np.percentile(latencies, 50):.1f}",
+            f"{np.percentile(latencies, 95):.1f}",
+            f"{np.mean(sources):.1f}"
+        )
+    console.print(table)
+
+    # MMR selection alone, on random unit vectors of the index dimension
+    rng = np.random.default_rng(0)
+    dimension = len(engine.indexer.embed_query(queries[0]))
+    vectors = rng.standard_normal((candidates, dimension)).astype(np.float32)
+    relevance = rng.random(candidates)
+    start = time.perf_counter()
+    for _ in range(100):
+        mmr_select(relevance, vectors, k)
+    console.print(f"MMR selection of {k} from {candidates}: {(time.perf_counter() - start) * 10:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
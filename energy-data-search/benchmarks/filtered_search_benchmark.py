@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""Compare filtered HNSW search with the exact path for selective filters."""
+
+import sys
+import time
+from pathlib import Path
+
+import click
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from energy_data_search.config import Config
+from energy_data_search.query.search_engine import EnergyDataSearchEngine
+from test_energy_queries import TEST_QUERIES
+
+console = Console()
+
+
+def timed_search(engine, queries: list, k: int, field: str, value: str) -> tuple:
+    """Per-query latencies in ms and result IDs for one filter."""
+    filters = {"filter_directory": value} if field == "directory" else {"filter_file_type": value}
+    latencies, ids = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results = engine.search(query, max_results=k, score_threshold=-1.0, **filters)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append([r.chunk_id for r in results])
+    return latencies, ids
+
+
+@click.command()
+@click.option('--k', default=10, help='Results per query')
+@click.option('--max-filters', default=10, help='Most selective filter values to test')
+def main(k, max_filters):
+    """Run the test queries against each selective directory and file type filter."""
+    config = Config(result_cache_size=0)
+    engine = EnergyDataSearchEngine(config)
+    indexer = engine.indexer
+    queries = [q["query"] for q in TEST_QUERIES]
+    threshold = config.exact_search_threshold
+
+    # Embed the queries and open the collection before timing
+    engine.search(queries[0], max_results=k)
+    facets = indexer._current_facets()
+    selective = sorted(
+        (count, field, value)
+        for field, values in facets.counts.items()
+        for value, count in values.items()
+        if count <= threshold
+    )[:max_filters]
+    if not selective:
+        console.print(f"[yellow]No filter value matches {threshold} chunks or fewer[/yellow]")
+        return
+
+    table = Table(title=f"{len(queries)} queries, top {k}, exact path at <= {threshold} chunks")
+    table.add_column("Filter", style="cyan")
+    table.add_column("Chunks", justify="right")
+    table.add_column("HNSW p50 ms", justify="right")
+    table.add_column("Exact first ms", justify="right")
+    table.add_column("Exact p50 ms", justify="right", style="green")
+    table.add_column("HNSW recall@k", justify="right")
+
+    for count, field, value in selective:
+        indexer.exact_search_threshold = 0
+        hnsw_ms, hnsw_ids = timed_search(engine, queries, k, field, value)
+
+        indexer.exact_search_threshold = threshold
+        indexer._subset_cache.clear()
+        exact_ms, exact_ids = timed_search(engine, queries, k, field, value)
+
+        recall = np.mean([
+            len(set(a) & set(b)) / len(b) for a, b in zip(hnsw_ids, exact_ids) if b
+        ] or [1.0])
+        table.add_row(
+            f"{field}={value}",
+            str(count),
+            f"{np.percentile(hnsw_ms, 50):.1f}",
+            f"{exact_ms[0]:.1f}",
+            f"{np.percentile(exact_ms[1:] or exact_ms, 50):.1f}",
+            f"{recall:.1%}"
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""Sweep HNSW parameters on a sample of the index and print the recall/latency/memory frontier."""
+
+import itertools
+import sys
+import time
+from pathlib import Path
+
+import chromadb
+import click
+import numpy as np
+from chromadb.config import Settings
+from rich.console import Console
+from rich.table import Table
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from energy_data_search.config import Config
+from energy_data_search.indexers.chromadb_indexer import ChromaDBIndexer
+from test_energy_queries import TEST_QUERIES
+
+console = Console()
+
+
+def parse_ints(value: str) -> list:
+    """Parse a comma-separated list of integers."""
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def estimate_hnsw_bytes(count: int, dimension: int, m: int) -> int:
+    """Approximate hnswlib memory: vectors, level-0 links (2M) and labels."""
+    per_element = dimension * 4 + 2 * m * 4 + 4 + 8
+    # Upper layers hold about 1/M of the elements with M links each
+    upper = count / m * (m * 4 + 4)
+    return int(count * per_element + upper)
+
+
+def pareto_frontier(rows: list) -> set:
+    """Indices of rows not dominated on (higher recall, lower latency, lower memory)."""
+    frontier = set()
+    for i, a in enumerate(rows):
+        dominated = any(
+            b["recall"] >= a["recall"] and b["p50_ms"] <= a["p50_ms"] and b["memory"] <= a["memory"]
+            and (b["recall"] > a["recall"] or b["p50_ms"] < a["p50_ms"] or b["memory"] < a["memory"])
+            for j, b in enumerate(rows) if j != i
+        )
+        if not dominated:
+            frontier.add(i)
+    return frontier
+
+
+@click.command()
+@click.option('--sample-size', '-n', default=20000, help='Number of indexed vectors to sample')
+@click.option('--queries', '-q', 'n_queries', default=200, help='Held-out sample vectors used as extra queries')
+@click.option('--k', default=10, help='Cut-off for recall@k')
+@click.option('--m', 'm_values', default="8,16,32", help='Comma-separated M values')
+@click.option('--construction-ef', 'construction_values', default="100,200", help='Comma-separated construction ef values')
+@click.option('--search-ef', 'search_values', default="10,50,100,200", help='Comma-separated search ef values')
+def main(sample_size, n_queries, k, m_values, construction_values, search_values):
+    """Build sample collections for each parameter set and measure them against brute force."""
+    config = Config()
+    indexer = ChromaDBIndexer.from_config(config)
+
+    console.print(f"[cyan]Sampling up to {sample_size + n_queries} vectors from '{config.collection_name}'...[/cyan]")
+    sample = indexer.collection.get(limit=sample_size + n_queries, include=["embeddings"])
+    vectors = np.asarray(sample["embeddings"], dtype=np.float32)
+    if len(vectors) <= n_queries + k:
+        console.print("[red]Not enough indexed vectors to benchmark[/red]")
+        return
+
+    # Hold out some indexed chunks as queries alongside the real query set
+    base, held_out = vectors[:-n_queries], vectors[-n_queries:]
+    text_queries = indexer.embeddings.embed_documents([q["query"] for q in TEST_QUERIES])
+    queries = np.vstack([np.asarray(text_queries, dtype=np.float32), held_out])
+    ids = [str(i) for i in range(len(base))]
+
+    exact = np.argsort(-(queries @ base.T), axis=1)[:, :k]
+    console.print(f"Base vectors: {len(base)}, queries: {len(queries)}, exact baseline computed")
+
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False, allow_reset=True))
+    batch = client.get_max_batch_size()
+    rows = []
+
+    search_efs = parse_ints(search_values)
+    for m, construction_ef in itertools.product(parse_ints(m_values), parse_ints(construction_values)):
+        name = f"hnsw-tune-m{m}-c{construction_ef}"
+        # Search ef is applied per query (see ChromaDBIndexer.search), so one
+        # build per graph configuration covers the whole search ef sweep
+        collection = client.create_collection(name=name, metadata={
+            "hnsw:space": "cosine",
+            "hnsw:M": m,
+            "hnsw:construction_ef": construction_ef,
+            "hnsw:search_ef": min(search_efs)
+        })
+        start = time.perf_counter()
+        for i in range(0, len(base), batch):
+            collection.add(ids=ids[i:i + batch], embeddings=base[i:i + batch])
+        build_s = time.perf_counter() - start
+
+        # Warm the index before timing
+        collection.query(query_embeddings=queries[:1], n_results=k, include=[])
+
+        for search_ef in search_efs:
+            latencies, recalls = [], []
+            for query, expected in zip(queries, exact):
+                start = time.perf_counter()
+                result = collection.query(
+                    query_embeddings=[query], n_results=max(k, search_ef), include=[]
+                )
+                latencies.append((time.perf_counter() - start) * 1000)
+                found = {int(i) for i in result["ids"][0][:k]}
+                recalls.append(len(found & set(expected)) / k)
+
+            rows.append({
+                "m": m,
+                "construction_ef": construction_ef,
+                "search_ef": search_ef,
+                "build_s": build_s,
+                "recall": float(np.mean(recalls)),
+                "p50_ms": float(np.percentile(latencies, 50)),
+                "p95_ms": float(np.percentile(latencies, 95)),
+                "memory": estimate_hnsw_bytes(len(base), base.shape[1], m)
+            })
+            console.print(
+                f"  M={m} construction_ef={construction_ef} search_ef={search_ef}: "
+                f"recall@{k}={rows[-1]['recall']:.3f} p50={rows[-1]['p50_ms']:.2f}ms"
+            )
+        client.delete_collection(name)
+
+    frontier = pareto_frontier(rows)
+    table = Table(title=f"HNSW sweep on {len(base)} vectors (recall@{k} vs brute force)")
+    for column in ("M", "construction ef", "search ef", "recall", "p50 ms", "p95 ms", "est. MB", "build s", "frontier"):
+        table.add_column(column, justify="right")
+
+    for i, row in sorted(enumerate(rows), key=lambda item: (-item[1]["recall"], item[1]["p50_ms"])):
+        style = "green" if i in frontier else None
+        table.add_row(
+            str(row["m"]), str(row["construction_ef"]), str(row["search_ef"]),
+            f"{row['recall']:.3f}", f"{row['p50_ms']:.2f}", f"{row['p95_ms']:.2f}",
+            f"{row['memory'] / (1024 * 1024):.1f}", f"{row['build_s']:.1f}",
+            "*" if i in frontier else "",
+            style=style
+        )
+
+    console.print(table)
+    console.print(
+        f"Current config: M={config.hnsw_m}, construction ef={config.hnsw_construction_ef}, "
+        f"search ef={config.hnsw_search_ef}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""Latency and payload size of searches with full chunk text and with snippets only."""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import click
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from energy_data_search.config import Config
+from energy_data_search.query.search_engine import EnergyDataSearchEngine
+from test_energy_queries import TEST_QUERIES
+
+console = Console()
+
+
+def payload_bytes(results) -> int:
+    """Size of the results serialized the way the search API returns them."""
+    return len(json.dumps([
+        {"id": r.chunk_id, "content": r.content, "metadata": r.metadata, "score": r.score}
+        for r in results
+    ]).encode())
+
+
+@click.command()
+@click.option('--k', 'ks', multiple=True, type=int, default=[10, 50, 100], help='Result counts to compare; repeatable')
+@click.option('--hydrate-top', default=10, help='Results hydrated after a snippet search')
+@click.option('--repeat', '-r', default=3, help='Passes over the query set')
+def main(ks, hydrate_top, repeat):
+    """Run the test queries with and without full content at several k."""
+    engine = EnergyDataSearchEngine(Config(result_cache_size=0))
+    queries = [q["query"] for q in TEST_QUERIES]
+
+    # Load the model and index before timing
+    engine.search(queries[0], score_threshold=-1.0)
+
+    table = Table(title=f"{len(queries)} queries x {repeat}, snippets hydrated for the top {hydrate_top}")
+    table.add_column("k", justify="right", style="cyan")
+    table.add_column("Full p50 ms", justify="right")
+    table.add_column("Snippets p50 ms", justify="right", style="green")
+    table.add_column("Hydrate p50 ms", justify="right")
+    table.add_column("Full KB", justify="right")
+    table.add_column("Snippets KB", justify="right", style="green")
+    for k in ks:
+        full_ms, lazy_ms, hydrate_ms, full_size, lazy_size = [], [], [], [], []
+        for _ in range(repeat):
+            for query in queries:
+                start = time.perf_counter()
+                results = engine.search(query, max_results=k, score_threshold=-1.0, hydrate=True)
+                full_ms.append((time.perf_counter() - start) * 1000)
+                full_size.append(payload_bytes(results))
+
+                start = time.perf_counter()
+                results = engine.search(query, max_results=k, score_threshold=-1.0, hydrate=False)
+                lazy_ms.append((time.perf_counter() - start) * 1000)
+                lazy_size.append(payload_bytes(results))
+
+                start = time.perf_counter()
+                engine.hydrate(results[:hydrate_top])
+                hydrate_ms.append((time.perf_counter() - start) * 1000)
+        table.add_row(
+            str(k),
+            f"{np.percentile(full_ms, 50):.1f}",
+            f"{np.percentile(lazy_ms, 50):.1f}",
+            f"{np.percentile(hydrate_ms, 50):.1f}",
+            f"{np.mean(full_size) / 1024:.1f}",
+            f"{np.mean(lazy_size) / 1024:.1f}"
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
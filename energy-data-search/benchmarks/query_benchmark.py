@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""Replay the test queries at several concurrency levels and score latency and relevance.
+
+By default a small index is built from ``benchmarks/fixtures/documents`` in a
+temporary directory and scored against ``benchmarks/fixtures/judgments.json``,
+so the harness needs no source data. ``--live`` replays against the configured
+index instead; relevance is then only scored for judged documents it contains.
+"""
+
+import json
+import math
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import click
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from energy_data_search.config import Config
+from energy_data_search.query.search_engine import EnergyDataSearchEngine
+from test_energy_queries import TEST_QUERIES
+
+console = Console()
+
+FIXTURES = Path(__file__).parent / "fixtures"
+BASELINES = Path(__file__).parent / "baselines"
+
+
+def ranked_documents(results) -> List[str]:
+    """File names of the results in rank order, each document counted once."""
+    names = []
+    for result in results:
+        name = result.metadata.get("file_name") or Path(result.source).name
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def recall_at_k(ranked: List[str], judged: Dict[str, int], k: int) -> float:
+    """Share of relevant documents found in the top k."""
+    relevant = {name for name, grade in judged.items() if grade > 0}
+    return len(relevant & set(ranked[:k])) / len(relevant) if relevant else 1.0
+
+
+def ndcg_at_k(ranked: List[str], judged: Dict[str, int], k: int) -> float:
+    """Normalized discounted cumulative gain of the top k with graded judgments."""
+    dcg = sum(judged.get(name, 0) / math.log2(rank + 2) for rank, name in enumerate(ranked[:k]))
+    ideal = sorted(judged.values(), reverse=True)[:k]
+    idcg = sum(grade / math.log2(rank + 2) for rank, grade in enumerate(ideal))
+    return dcg / idcg if idcg else 1.0
+
+
+def replay(engine, queries: List[str], concurrency: int, repeat: int, search_args: dict) -> dict:
+    """Latency percentiles and throughput of the queries run ``repeat`` times on ``concurrency`` threads."""
+    def timed(query: str) -> float:
+        start = time.perf_counter()
+        engine.search(query, **search_args)
+        return (time.perf_counter() - start) * 1000
+
+    workload = queries * repeat
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, workload))
+    elapsed = time.perf_counter() - start
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+        "qps": round(len(workload) / elapsed, 1)
+    }
+
+
+def compare(baseline: dict, current: dict, latency_tolerance: float, quality_tolerance: float) -> List[str]:
+    """Print current metrics against the baseline; returns the regressions found."""
+    table = Table(title="Against baseline")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Baseline", justify="right")
+    table.add_column("Current", justify="right")
+    table.add_column("Change", justify="right")
+    regressions = []
+
+    rows = [(name, baseline["quality"].get(name), value, "higher") for name, value in current["quality"].items()]
+    for level, metrics in current["latency"].items():
+        for name, value in metrics.items():
+            rows.append((f"{name} @ {level}", baseline["latency"].get(level, {}).get(name), value,
+                         "higher" if name == "qps" else "lower"))
+
+    for name, before, after, better in rows:
+        if before is None:
+            table.add_row(name, "-", str(after), "")
+            continue
+        change = after - before
+        if better == "higher" and name in current["quality"]:
+            regressed = change < -quality_tolerance
+            shown = f"{change:+.3f}"
+        else:
+            relative = change / before if before else 0.0
+            regressed = (relative < -latency_tolerance) if better == "higher" else (relative > latency_tolerance)
+            shown = f"{relative:+.1%}"
+        style = "red" if regressed else "green"
+        table.add_row(name, str(before), str(after), f"[{style}]{shown}[/{style}]")
+        if regressed:
+            regressions.append(name)
+    console.print(table)
+    return regressions
+
+
+@click.command()
+@click.option('--live', is_flag=True, help='Use the configured index instead of the fixture index')
+@click.option('--concurrency', '-c', multiple=True, type=int, default=[1, 4], help='Concurrent searches; repeatable')
+@click.option('--repeat', '-r', default=5, help='Passes over the query set per concurrency level')
+@click.option('--k', default=10, help='Results per query, and the cutoff for recall and nDCG')
+@click.option('--mode', '-m', type=click.Choice(['vector', 'hybrid']), help='Retrieval mode (default from config)')
+@click.option('--rerank/--no-rerank', default=None, help='Re-score candidates with a cross-encoder (default from config)')
+@click.option('--judgments', type=click.Path(exists=True, path_type=Path), default=FIXTURES / "judgments.json",
+              help='Graded relevance judgments per query')
+@click.option('--baseline', type=click.Path(path_type=Path), help='Baseline metrics file (default: baselines/<index>.json)')
+@click.option('--save-baseline', is_flag=True, help='Store this run as the baseline')
+@click.option('--latency-tolerance', default=0.2, help='Relative latency or throughput change counted as a regression')
+@click.option('--quality-tolerance', default=0.02, help='Absolute recall or nDCG drop counted as a regression')
+@click.option('--fail-on-regression', is_flag=True, help='Exit with status 1 if any metric regressed')
+def main(live, concurrency, repeat, k, mode, rerank, judgments, baseline, save_baseline,
+         latency_tolerance, quality_tolerance, fail_on_regression):
+    """Report p50/p95/p99 latency, throughput, recall@k and nDCG@k for the test queries."""
+    judged = json.loads(judgments.read_text())["judgments"]
+    queries = [q["query"] for q in TEST_QUERIES]
+    baseline = baseline or BASELINES / f"{'live' if live else 'fixture'}.json"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Result caches would turn every repeat into a cache hit
+        overrides = dict(result_cache_size=0, semantic_cache_size=0, page_cache_size=0)
+        if live:
+            config = Config(**overrides)
+        else:
+            config = Config(chroma_persist_dir=Path(tmp) / "chroma_db", **overrides)
+        engine = EnergyDataSearchEngine(config)
+        if not live:
+            with console.status("Indexing fixture documents..."):
+                chunks = engine.index_directory(FIXTURES / "documents")
+            console.print(f"Fixture index: {chunks} chunks")
+
+        search_args = dict(max_results=k, mode=mode, rerank=rerank)
+        # Warm up the model and index, and score relevance on the same pass
+        recalls, ndcgs = [], []
+        for query in queries:
+            ranked = ranked_documents(engine.search(query, **search_args))
+            if query in judged:
+                recalls.append(recall_at_k(ranked, judged[query], k))
+                ndcgs.append(ndcg_at_k(ranked, judged[query], k))
+
+        current = {
+            "index": "live" if live else "fixture",
+            "k": k,
+            "mode": mode or config.search_mode,
+            "rerank": config.rerank if rerank is None else rerank,
+            "queries": len(queries),
+            "quality": {
+                f"recall@{k}": round(float(np.mean(recalls)), 4) if recalls else 0.0,
+                f"ndcg@{k}": round(float(np.mean(ndcgs)), 4) if ndcgs else 0.0
+            },
+            "latency": {str(level): replay(engine, queries, level, repeat, search_args) for level in concurrency}
+        }
+
+    table = Table(title=f"{len(queries)} queries x {repeat}, top {k}, {current['mode']} search")
+    table.add_column("Concurrency", justify="right", style="cyan")
+    table.add_column("p50 ms", justify="right")
+    table.add_column("p95 ms", justify="right")
+    table.add_column("p99 ms", justify="right")
+    table.add_column("Queries/s", justify="right", style="green")
+    for level, metrics in current["latency"].items():
+        table.add_row(level, *(str(metrics[name]) for name in ("p50_ms", "p95_ms", "p99_ms", "qps")))
+    console.print(table)
+    console.print(", ".join(f"{name} {value:.3f}" for name, value in current["quality"].items())
+                  + f" over {len(recalls)} judged queries")
+
+    regressions = []
+    if baseline.exists() and not save_baseline:
+        stored = json.loads(baseline.read_text())
+        if (stored.get("k"), stored.get("mode"), stored.get("rerank")) != (k, current["mode"], current["rerank"]):
+            console.print(f"[yellow]Baseline {baseline} was run with different settings; not compared[/yellow]")
+        else:
+            regressions = compare(stored, current, latency_tolerance, quality_tolerance)
+    if save_baseline:
+        baseline.parent.mkdir(parents=True, exist_ok=True)
+        baseline.write_text(json.dumps(current, indent=2) + "\n")
+        console.print(f"Baseline saved to {baseline}")
+
+    if regressions:
+        console.print(f"[red]Regressed: {', '.join(regressions)}[/red]")
+        if fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""Latency percentiles of search with and without cross-encoder reranking."""
+
+import sys
+import time
+from pathlib import Path
+
+import click
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from energy_data_search.config import Config
+from energy_data_search.query.search_engine import EnergyDataSearchEngine
+from test_energy_queries import TEST_QUERIES
+
+console = Console()
+
+
+def run_queries(engine, queries: list, k: int, rerank: bool) -> tuple:
+    """Run each query once; return per-query latencies in ms and the result lists."""
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(engine.search(query, max_results=k, rerank=rerank))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, results
+
+
+@click.command()
+@click.option('--k', default=10, help='Results returned per query')
+@click.option('--candidates', '-c', default=None, type=int, help='Candidates re-scored (default from config)')
+@click.option('--budget-ms', '-b', default=None, type=float, help='Rerank latency budget (default from config)')
+def main(k, candidates, budget_ms):
+    """Run the test queries without reranking, with a cold score cache and with a warm one."""
+    config = Config(result_cache_size=0)
+    if candidates is not None:
+        config.rerank_candidates = candidates
+    if budget_ms is not None:
+        config.rerank_budget_ms = budget_ms
+    engine = EnergyDataSearchEngine(config)
+    queries = [q["query"] for q in TEST_QUERIES]
+
+    # Load both models before timing
+    engine.search(queries[0], max_results=k, rerank=True)
+    engine.reranker.cache.clear()
+
+    baseline, baseline_results = run_queries(engine, queries, k, rerank=False)
+    cold, reranked_results = run_queries(engine, queries, k, rerank=True)
+    counters = dict(engine.reranker.counters)
+    warm, _ = run_queries(engine, queries, k, rerank=True)
+
+    table = Table(title=f"{len(queries)} queries, top {k} from {config.rerank_candidates} candidates, "
+                        f"budget {config.rerank_budget_ms:.0f} ms")
+    table.add_column("Mode", style="cyan")
+    for column in ("p50 ms", "p95 ms", "p99 ms", "mean ms"):
+        table.add_column(column, justify="right")
+    for name, latencies in (("no rerank", baseline), ("rerank (cold cache)", cold), ("rerank (warm cache)", warm)):
+        table.add_row(
+            name,
+            *(f"{np.percentile(latencies, p):.1f}" for p in (50, 95, 99)),
+            f"{np.mean(latencies):.1f}"
+        )
+    console.print(table)
+
+    overlap = np.mean([
+        len({r.chunk_id for r in a} & {r.chunk_id for r in b}) / max(len(a), 1)
+        for a, b in zip(baseline_results, reranked_results)
+    ])
+    console.print(
+        f"Top-{k} overlap with bi-encoder order: {overlap:.1%}; "
+        f"truncated by budget: {counters['truncated']}, skipped: {counters['skipped']}; "
+        f"estimated {engine.reranker.ms_per_pair:.2f} ms per pair"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""Latency of exact snapshot search, which scans every vector per query."""
+
+import sys
+import time
+from pathlib import Path
+
+import click
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from energy_data_search.config import Config
+from energy_data_search.indexers.snapshot import SnapshotIndexer
+from test_energy_queries import TEST_QUERIES
+
+console = Console()
+
+
+def time_searches(snapshot, embeddings: list, k: int, where=None) -> list:
+    """Milliseconds per query for an exact scan of the snapshot."""
+    latencies = []
+    for embedding in embeddings:
+        start = time.perf_counter()
+        snapshot.search(embedding, k=k, where=where)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+@click.command()
+@click.option('--snapshot', 'snapshot_path', type=click.Path(exists=True), default=None,
+              help='Snapshot bundle (default: SNAPSHOT_PATH)')
+@click.option('--k', default=10, help='Results per query')
+def main(snapshot_path, k):
+    """Time the test queries against a snapshot, unfiltered and filtered to its largest directory."""
+    snapshot_path = snapshot_path or Config().snapshot_path
+    if not snapshot_path:
+        console.print("[red]Pass --snapshot or set SNAPSHOT_PATH[/red]")
+        sys.exit(1)
+    indexer = SnapshotIndexer(Path(snapshot_path))
+    snapshot = indexer.snapshot
+    embeddings = indexer.embed_queries([q["query"] for q in TEST_QUERIES])
+
+    filters = [("none", None)]
+    if "directory" in snapshot.columns:
+        values, codes = snapshot.columns["directory"]
+        counts = np.bincount(np.asarray(codes)[np.asarray(codes) >= 0], minlength=len(values))
+        filters.append((f"directory={values[counts.argmax()]}", {"directory": values[counts.argmax()]}))
+
+    rows, dimension = snapshot.vectors.shape
+    table = Table(title=f"Exact search over {rows} vectors of {dimension} dimensions, {len(embeddings)} queries")
+    table.add_column("Filter", style="cyan")
+    table.add_column("Rows ranked", justify="right")
+    table.add_column("p50 ms", justify="right", style="green")
+    table.add_column("p95 ms", justify="right")
+    table.add_column("ms per 10k rows", justify="right")
+    time_searches(snapshot, embeddings[:1], k)
+    for name, where in filters:
+        mask = snapshot.filter_mask(where)
+        latencies = time_searches(snapshot, embeddings, k, where)
+        p50 = np.percentile(latencies, 50)
+        table.add_row(
+            name,
+            str(rows if mask is None else int(mask.sum())),
+            f"{p50:.1f}",
+            f"{np.percentile(latencies, 95):.1f}",
+            f"{p50 / rows * 10000:.2f}"
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
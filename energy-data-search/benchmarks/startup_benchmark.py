@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""Measure wall-clock startup time of common CLI commands."""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+SRC_DIR = Path(__file__).parent.parent / 'src'
+
+console = Console()
+
+# Commands that should never load the embedding model or open ChromaDB
+COMMANDS = [
+    ("--help", ["--help"], False),
+    ("stats", ["stats"], False),
+    ("status", ["status"], False),
+    ("reset-tracker", ["reset-tracker", "--yes"], True),
+]
+
+
+def time_command(args: list, cwd: Path, env: dict) -> float:
+    """Run the CLI once and return the elapsed seconds."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-m", "energy_data_search", *args],
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise click.ClickException(f"'{' '.join(args)}' failed:\n{result.stderr[-2000:]}")
+    return elapsed
+
+
+@click.command()
+@click.option('--runs', '-r', default=5, help='Timed runs per command')
+@click.option('--target', default=1.0, help='Target startup time in seconds')
+def main(runs, target):
+    """Time CLI commands in fresh processes against a startup target.
+
+    ``stats`` and ``status`` run in the current directory so they see the
+    real index; ``reset-tracker`` runs in a scratch directory so the real
+    tracker is left alone.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+
+    table = Table(title=f"CLI startup ({runs} runs, target {target:.1f}s)")
+    table.add_column("Command", style="cyan")
+    table.add_column("Min s", justify="right")
+    table.add_column("Median s", justify="right")
+    table.add_column("Max s", justify="right")
+    table.add_column("Target", justify="center")
+
+    failed = False
+    with tempfile.TemporaryDirectory() as scratch:
+        for name, args, isolated in COMMANDS:
+            cwd = Path(scratch) if isolated else Path.cwd()
+            # First run warms the OS file cache and is not counted
+            time_command(args, cwd, env)
+            timings = [time_command(args, cwd, env) for _ in range(runs)]
+            median = statistics.median(timings)
+            ok = median <= target
+            failed = failed or not ok
+            table.add_row(
+                name, f"{min(timings):.2f}", f"{median:.2f}", f"{max(timings):.2f}",
+                "[green]ok[/green]" if ok else "[red]slow[/red]"
+            )
+
+    console.print(table)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
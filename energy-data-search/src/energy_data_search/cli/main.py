@@ -1,5 +1,6 @@
 """Command-line interface for Energy Data Search."""
 
+import json
 import logging
 from pathlib import Path
 from typing import Optional
@@ -12,7 +13,10 @@ from rich.logging import RichHandler
 
 from ..config import Config
 from ..query.search_engine import EnergyDataSearchEngine
+from ..query.pagination import CursorError
+from ..query.trace import SearchTrace
 from ..query.incremental_indexer import IncrementalIndexer
+from ..indexers.snapshot import Snapshot, SnapshotError
 from .reindex import full_reindex
 
 console = Console()
@@ -88,22 +92,59 @@ def index(ctx, directory, recursive, clear):
 @click.option('--max-results', '-n', default=10, help='Maximum number of results')
 @click.option('--directory', '-d', help='Filter by source directory name')
 @click.option('--file-type', '-t', help='Filter by file type (pdf, txt, csv, etc.)')
+@click.option('--doc-type', '-T', 'doc_types', multiple=True, help='Filter by document type (NPRR, NOGRR, protocol, tariff, ...); repeatable')
+@click.option('--date-from', type=click.DateTime(formats=['%Y-%m-%d']), help='Only documents dated on or after YYYY-MM-DD')
+@click.option('--date-to', type=click.DateTime(formats=['%Y-%m-%d']), help='Only documents dated on or before YYYY-MM-DD')
 @click.option('--threshold', '-s', type=float, help='Minimum similarity score threshold')
+@click.option('--ef', type=int, help='HNSW search breadth for this query (higher = better recall)')
+@click.option('--mode', '-m', type=click.Choice(['vector', 'hybrid']), help='Retrieval mode (default from config)')
+@click.option('--rerank/--no-rerank', default=None, help='Re-score candidates with a cross-encoder (default from config)')
+@click.option('--collapse/--no-collapse', default=None, help='One result per source document with its hit count (default from config)')
+@click.option('--mmr/--no-mmr', default=None, help='Diversify results with maximal marginal relevance (default from config)')
+@click.option('--cursor', help='Cursor from a previous search to show the next page')
 @click.option('--verbose', '-v', is_flag=True, help='Show full content')
+@click.option('--trace', 'show_trace', is_flag=True, help='Show where the search time went')
 @click.pass_context
-def search(ctx, query, max_results, directory, file_type, threshold, verbose):
+def search(ctx, query, max_results, directory, file_type, doc_types, date_from, date_to, threshold, ef, mode, rerank,
+           collapse, mmr, cursor, verbose, show_trace):
     """Search for documents matching a query."""
     if ctx.obj['engine'] is None:
         ctx.obj['engine'] = EnergyDataSearchEngine(ctx.obj['config'])
     engine = ctx.obj['engine']
+    trace = SearchTrace() if show_trace else None
+    
+    try:
+        with console.status("[bold green]Searching..."):
+            page = engine.search_page(
+                query=query,
+                page_size=max_results,
+                cursor=cursor,
+                filter_directory=directory,
+                filter_file_type=file_type,
+                score_threshold=threshold,
+                search_ef=ef,
+                mode=mode,
+                rerank=rerank,
+                document_types=doc_types,
+                date_from=date_from,
+                date_to=date_to,
+                collapse=collapse,
+                mmr=mmr,
+                trace=trace
+            )
+    except CursorError as e:
+        console.print(f"[red]{e}[/red]")
+        return
+    results = page.results
     
-    with console.status("[bold green]Searching..."):
-        results = engine.search(
-            query=query,
-            max_results=max_results,
-            filter_directory=directory,
-            filter_file_type=file_type,
-            score_threshold=threshold
+    if trace is not None:
+        stages = " | ".join(
+            f"{stage} {getattr(trace, stage + '_ms'):.1f} ms"
+            for stage in ("embed", "ann", "hydrate", "rerank", "diversify", "total")
+        )
+        console.print(
+            f"[dim]Timing: {stages}; {trace.candidates} candidates, "
+            f"{trace.cache_hits + trace.semantic_cache_hits} cache hits[/dim]"
         )
     
     if not results:
@@ -112,18 +153,122 @@ def search(ctx, query, max_results, directory, file_type, threshold, verbose):
     
     console.print(f"\n[bold green]Found {len(results)} results for:[/bold green] {query}\n")
     
-    for i, result in enumerate(results, 1):
+    for i, result in enumerate(results, page.offset + 1):
         title = f"Result {i} | Score: {result.score:.3f} | {Path(result.source).name}"
+        if result.rerank_score is not None:
+            title = f"Result {i} | Score: {result.score:.3f} | Rerank: {result.rerank_score:.2f} | {Path(result.source).name}"
+        if result.source_hits > 1:
+            title += f" | {result.source_hits} hits"
         
         content = result.content if verbose else result.content[:500] + "..."
         
         panel_content = f"[cyan]Source:[/cyan] {result.source}\n"
         panel_content += f"[cyan]Type:[/cyan] {result.metadata.get('file_type', 'unknown')}\n"
-        panel_content += f"[cyan]Directory:[/cyan] {result.metadata.get('directory', 'unknown')}\n\n"
+        panel_content += f"[cyan]Directory:[/cyan] {result.metadata.get('directory', 'unknown')}\n"
+        panel_content += f"[cyan]Document:[/cyan] {result.metadata.get('document_type', 'unknown')}"
+        if 'document_date' in result.metadata:
+            date = str(result.metadata['document_date'])
+            panel_content += f", {date[:4]}-{date[4:6]}-{date[6:]}"
+        panel_content += "\n\n"
         panel_content += f"[white]{content}[/white]"
         
         console.print(Panel(panel_content, title=title, expand=False))
         console.print()
+    
+    if page.next_cursor:
+        console.print(f"[dim]More results: add --cursor {page.next_cursor}[/dim]")
+
+
+def read_batch_queries(lines):
+    """Yield (id, query) pairs from plain-text or JSON lines, skipping blanks."""
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            record = json.loads(line)
+            yield record.get("id", line_number), record["query"]
+        else:
+            yield line_number, line
+
+
+@cli.command(name='search-batch')
+@click.argument('input_file', type=click.File('r'), default='-')
+@click.option('--max-results', '-n', default=10, help='Maximum number of results per query')
+@click.option('--directory', '-d', help='Filter by source directory name')
+@click.option('--file-type', '-t', help='Filter by file type (pdf, txt, csv, etc.)')
+@click.option('--doc-type', '-T', 'doc_types', multiple=True, help='Filter by document type (NPRR, NOGRR, protocol, tariff, ...); repeatable')
+@click.option('--date-from', type=click.DateTime(formats=['%Y-%m-%d']), help='Only documents dated on or after YYYY-MM-DD')
+@click.option('--date-to', type=click.DateTime(formats=['%Y-%m-%d']), help='Only documents dated on or before YYYY-MM-DD')
+@click.option('--threshold', '-s', type=float, help='Minimum similarity score threshold')
+@click.option('--ef', type=int, help='HNSW search breadth (higher = better recall)')
+@click.option('--mode', '-m', type=click.Choice(['vector', 'hybrid']), help='Retrieval mode (default from config)')
+@click.option('--rerank/--no-rerank', default=None, help='Re-score candidates with a cross-encoder (default from config)')
+@click.option('--collapse/--no-collapse', default=None, help='One result per source document with its hit count (default from config)')
+@click.option('--mmr/--no-mmr', default=None, help='Diversify results with maximal marginal relevance (default from config)')
+@click.option('--snippets', is_flag=True, help='Output stored snippets instead of full chunk text')
+@click.option('--batch-size', '-b', default=64, help='Queries embedded and searched together')
+@click.pass_context
+def search_batch(ctx, input_file, max_results, directory, file_type, doc_types, date_from, date_to, threshold, ef, mode,
+                 rerank, collapse, mmr, snippets, batch_size):
+    """Search many queries from a file (or stdin) and stream JSONL results.
+    
+    Each input line is either a query or a JSON object with a "query" key
+    and an optional "id". One JSON object per query is written to stdout.
+    """
+    # Keep stdout machine-readable by sending log output to stderr
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, RichHandler):
+            handler.console = Console(stderr=True)
+    
+    if ctx.obj['engine'] is None:
+        ctx.obj['engine'] = EnergyDataSearchEngine(ctx.obj['config'])
+    engine = ctx.obj['engine']
+    
+    def flush(batch):
+        results = engine.search_many(
+            [query for _, query in batch],
+            max_results=max_results,
+            filter_directory=directory,
+            filter_file_type=file_type,
+            score_threshold=threshold,
+            search_ef=ef,
+            mode=mode,
+            rerank=rerank,
+            document_types=doc_types,
+            date_from=date_from,
+            date_to=date_to,
+            collapse=collapse,
+            mmr=mmr,
+            hydrate=False if snippets else None
+        )
+        for (query_id, query), query_results in zip(batch, results):
+            click.echo(json.dumps({
+                "id": query_id,
+                "query": query,
+                "results": [
+                    {
+                        "rank": rank,
+                        "chunk_id": result.chunk_id,
+                        "score": round(result.score, 4),
+                        "rerank_score": result.rerank_score,
+                        "source_hits": result.source_hits,
+                        "source": result.source,
+                        "content": result.content,
+                        "metadata": result.metadata
+                    }
+                    for rank, result in enumerate(query_results, 1)
+                ]
+            }))
+    
+    batch = []
+    for item in read_batch_queries(input_file):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
 
 
 @cli.command()
@@ -157,6 +302,131 @@ def clear(ctx):
     console.print("[green]Index cleared successfully![/green]")
 
 
+@cli.command()
+@click.pass_context
+def compact(ctx):
+    """Rebuild the vector index without deleted chunks and vacuum the store."""
+    if ctx.obj['engine'] is None:
+        ctx.obj['engine'] = EnergyDataSearchEngine(ctx.obj['config'])
+    engine = ctx.obj['engine']
+    
+    with console.status("[bold green]Compacting index..."):
+        results = engine.compact_index()
+    
+    table = Table(title="Compaction Results")
+    table.add_column("Property", style="cyan")
+    table.add_column("Value", style="green")
+    
+    for key, value in results.items():
+        table.add_row(key.replace("_", " ").title(), str(value))
+    
+    console.print(table)
+
+
+@cli.command(name='rebuild-lexical')
+@click.pass_context
+def rebuild_lexical(ctx):
+    """Rebuild the BM25 lexical index used by hybrid search from the stored chunks."""
+    if ctx.obj['engine'] is None:
+        ctx.obj['engine'] = EnergyDataSearchEngine(ctx.obj['config'])
+    engine = ctx.obj['engine']
+    
+    with console.status("[bold green]Rebuilding lexical index..."):
+        try:
+            count = engine.rebuild_lexical_index()
+        except (ValueError, SnapshotError) as e:
+            console.print(f"[red]{e}[/red]")
+            return
+    
+    console.print(f"[green]Lexical index rebuilt for {count} chunks[/green]")
+
+
+@cli.command(name='rebuild-related')
+@click.pass_context
+def rebuild_related(ctx):
+    """Rebuild the related-documents graph from the stored chunk embeddings."""
+    if ctx.obj['engine'] is None:
+        ctx.obj['engine'] = EnergyDataSearchEngine(ctx.obj['config'])
+    engine = ctx.obj['engine']
+    
+    with console.status("[bold green]Rebuilding related documents..."):
+        try:
+            count = engine.rebuild_related_documents()
+        except (ValueError, SnapshotError) as e:
+            console.print(f"[red]{e}[/red]")
+            return
+    
+    console.print(f"[green]Related documents rebuilt for {count} files[/green]")
+
+
+@cli.group()
+def snapshot():
+    """Export and import portable index snapshots."""
+
+
+@snapshot.command('export')
+@click.argument('output_dir', type=click.Path())
+@click.pass_context
+def snapshot_export(ctx, output_dir):
+    """Write the index to a versioned snapshot bundle."""
+    engine = EnergyDataSearchEngine(ctx.obj['config'])
+    
+    try:
+        with console.status("[bold green]Exporting snapshot..."):
+            results = engine.export_snapshot(Path(output_dir))
+    except SnapshotError as e:
+        console.print(f"[red]Export failed: {e}[/red]")
+        return
+    
+    console.print(f"[green]Exported {results['chunks']} chunks to {results['path']}[/green]")
+    console.print(f"Snapshot size: {results['size_mb']} MB")
+
+
+@snapshot.command('import')
+@click.argument('snapshot_dir', type=click.Path(exists=True))
+@click.option('--replace', '--clear', 'replace', is_flag=True,
+              help='Replace the chunks already in the index')
+@click.option('--verify/--no-verify', default=True, help='Verify file checksums before importing')
+@click.pass_context
+def snapshot_import(ctx, snapshot_dir, replace, verify):
+    """Bulk-load a snapshot bundle into an empty index."""
+    engine = EnergyDataSearchEngine(ctx.obj['config'])
+    
+    try:
+        with console.status("[bold green]Importing snapshot..."):
+            count = engine.import_snapshot(Path(snapshot_dir), verify=verify, replace=replace)
+    except SnapshotError as e:
+        console.print(f"[red]Import failed: {e}[/red]")
+        return
+    
+    console.print(f"[green]Imported {count} chunks from {snapshot_dir}[/green]")
+
+
+@snapshot.command('info')
+@click.argument('snapshot_dir', type=click.Path(exists=True))
+@click.option('--verify', is_flag=True, help='Verify file checksums')
+def snapshot_info(snapshot_dir, verify):
+    """Show a snapshot's manifest."""
+    try:
+        snap = Snapshot(Path(snapshot_dir), verify=verify)
+    except SnapshotError as e:
+        console.print(f"[red]Invalid snapshot: {e}[/red]")
+        return
+    
+    table = Table(title=f"Snapshot {snapshot_dir}")
+    table.add_column("Property", style="cyan")
+    table.add_column("Value", style="green")
+    
+    for key in ("format_version", "created_at", "collection_name", "embedding_model", "dimension", "count"):
+        table.add_row(key.replace("_", " ").title(), str(snap.manifest[key]))
+    size = sum(f["bytes"] for f in snap.manifest["files"].values())
+    table.add_row("Size", f"{size / (1024 * 1024):.2f} MB")
+    if verify:
+        table.add_row("Checksums", "verified")
+    
+    console.print(table)
+
+
 @cli.command()
 @click.option('--directory', '-d', type=click.Path(exists=True), help='Specific directory to check')
 @click.option('--auto/--no-auto', default=False, help='Automatically index new files')
@@ -172,16 +442,20 @@ def update(ctx, directory, auto):
         f"[bold cyan]Incremental Index Update[/bold cyan]\n"
         f"Tracked files: {status['tracker']['total_files']}\n"
         f"New files available: {status['new_files_available']}\n"
+        f"Removed files pending: {status['removed_files_pending']}\n"
         f"Last update: {status['last_update'] or 'Never'}",
         border_style="cyan"
     ))
     
-    if status['new_files_available'] == 0:
+    if status['new_files_available'] == 0 and status['removed_files_pending'] == 0:
         console.print("[yellow]No new files to index[/yellow]")
         return
     
     if not auto:
-        console.print(f"\n[bold]Found {status['new_files_available']} new/modified files[/bold]")
+        console.print(
+            f"\n[bold]Found {status['new_files_available']} new/modified files "
+            f"and {status['removed_files_pending']} removed files[/bold]"
+        )
         if not click.confirm("Proceed with indexing?"):
             return
     
@@ -219,6 +493,7 @@ def update(ctx, directory, auto):
     
     console.print(f"\n[bold green]Update complete![/bold green]")
     console.print(f"Total chunks added: {results['total_chunks_added']}")
+    console.print(f"Total chunks removed: {results['total_chunks_removed']}")
     console.print(f"Processing time: {results['processing_time']:.2f} seconds")
 
 
@@ -238,6 +513,7 @@ def status(ctx):
     table.add_row("Total Chunks", str(status['tracker']['total_chunks']))
     table.add_row("Total Size", f"{status['tracker']['total_size_mb']} MB")
     table.add_row("New Files Available", str(status['new_files_available']))
+    table.add_row("Removed Files Pending", str(status['removed_files_pending']))
     table.add_row("Last Update", status['last_update'] or "Never")
     table.add_row("Tracker File", status['tracker']['tracker_file'])
     
@@ -281,6 +557,7 @@ def reindex(ctx, file_path):
     if results['success']:
         console.print(f"[green]Successfully reindexed![/green]")
         console.print(f"Chunks added: {results['chunks_added']}")
+        console.print(f"Stale chunks removed: {results['chunks_removed']}")
     else:
         console.print(f"[red]Reindexing failed: {results['error']}[/red]")
 
@@ -305,6 +582,39 @@ def full_reindex(ctx, yes):
     do_reindex(auto_confirm=yes)
 
 
+def print_cache_stats(cache_stats: dict):
+    """Print hit ratio and memory use of the engine's caches."""
+    table = Table(title=f"Query Caches (index generation {cache_stats['index_generation']})")
+    table.add_column("Cache", style="cyan")
+    table.add_column("Entries", justify="right")
+    table.add_column("Hits", justify="right")
+    table.add_column("Misses", justify="right")
+    table.add_column("Hit Ratio", justify="right", style="green")
+    table.add_column("Memory KB", justify="right")
+    
+    for name in ("query_cache", "result_cache", "semantic_cache", "page_cache", "rerank_cache", "metadata_cache",
+                 "document_cache"):
+        if name not in cache_stats:
+            continue
+        stats = cache_stats[name]
+        table.add_row(
+            name.replace("_", " ").title(),
+            f"{stats['entries']}/{stats['max_entries']}",
+            str(stats['hits']),
+            str(stats['misses']),
+            f"{stats['hit_ratio']:.1%}",
+            f"{stats['memory_kb']:.1f}"
+        )
+    
+    console.print(table)
+    semantic = cache_stats.get("semantic_cache")
+    if semantic and semantic["audits"]:
+        console.print(
+            f"Semantic cache: {semantic['false_hits']}/{semantic['audits']} audited hits were false "
+            f"({semantic['false_hit_rate']:.1%}) at similarity >= {semantic['threshold']}"
+        )
+
+
 @cli.command()
 @click.pass_context
 def interactive(ctx):
@@ -316,7 +626,7 @@ def interactive(ctx):
     console.print(Panel.fit(
         "[bold cyan]Energy Data Search - Interactive Mode[/bold cyan]\n"
         "Type your questions about energy markets, ISO rules, tariffs, etc.\n"
-        "Type 'exit' or 'quit' to leave.",
+        "Type 'cache' for cache statistics, 'exit' or 'quit' to leave.",
         border_style="cyan"
     ))
     
@@ -331,6 +641,10 @@ def interactive(ctx):
             if not query.strip():
                 continue
             
+            if query.strip().lower() == 'cache':
+                print_cache_stats(engine.get_cache_stats())
+                continue
+            
             with console.status("[bold green]Searching..."):
                 results = engine.search(query, max_results=5)
             
@@ -1,6 +1,5 @@
 """Full reindex command with progress tracking."""
 
-import shutil
 import time
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -24,6 +23,8 @@ from rich.layout import Layout
 from ..config import Config
 from ..query.incremental_indexer import IncrementalIndexer
 from ..loaders.document_loader import DocumentLoader
+from ..utils.index_directory import new_build_directory, switch_index_directory
+from ..utils.index_lock import IndexWriterLock
 
 console = Console()
 
@@ -44,9 +45,9 @@ def full_reindex(auto_confirm: bool = False):
         console.print(Panel.fit(
             "[bold red]⚠️  WARNING: Full Reindex Operation[/bold red]\n\n"
             "This will:\n"
-            "• Delete the entire ChromaDB database\n"
-            "• Remove all tracking metadata\n"
-            "• Reindex ALL documents from scratch\n\n"
+            "• Build a new ChromaDB database with new tracking metadata\n"
+            "• Reindex ALL documents from scratch\n"
+            "• Switch to the new database and delete all but the previous one\n\n"
             "This may take several minutes depending on data size.",
             border_style="red"
         ))
@@ -57,20 +58,19 @@ def full_reindex(auto_confirm: bool = False):
     
     console.print("\n[bold cyan]Starting Full Reindex Operation[/bold cyan]\n")
     
-    # Step 1: Clean existing database
-    console.print("[bold]Step 1/4:[/bold] Cleaning existing database...")
+    # Updates wait until the new database is in place; searches keep using the current one
+    with IndexWriterLock(config.chroma_persist_dir):
+        _rebuild_index(config, start_time)
+
+
+def _rebuild_index(config: Config, start_time: float):
+    """Index every document into a new database, then switch to it."""
+    # Step 1: Choose a new database directory
+    console.print("[bold]Step 1/4:[/bold] Preparing new database...")
     chroma_dir = config.chroma_persist_dir
-    tracker_file = chroma_dir / "index_tracker.json"
-    
-    if chroma_dir.exists():
-        try:
-            shutil.rmtree(chroma_dir)
-            console.print("  ✓ ChromaDB database deleted")
-        except Exception as e:
-            console.print(f"  [red]✗ Error deleting database: {e}[/red]")
-            return
-    else:
-        console.print("  ✓ No existing database found")
+    build_dir = new_build_directory(chroma_dir)
+    build_config = config.model_copy(update={"chroma_persist_dir": build_dir})
+    console.print(f"  ✓ Building in {build_dir}")
     
     # Step 2: Count files to index
     console.print("\n[bold]Step 2/4:[/bold] Scanning for documents...")
@@ -121,7 +121,7 @@ def full_reindex(auto_confirm: bool = False):
     
     # Step 3: Initialize indexer
     console.print("\n[bold]Step 3/4:[/bold] Initializing indexer...")
-    incremental = IncrementalIndexer(config)
+    incremental = IncrementalIndexer(build_config)
     console.print("  ✓ ChromaDB initialized")
     console.print("  ✓ Index tracker initialized")
     
@@ -189,6 +189,20 @@ def full_reindex(auto_confirm: bool = False):
         # Save tracker
         incremental.tracker.save_tracker()
     
+    if config.related_documents_k > 0:
+        with console.status("[bold green]Building related documents..."):
+            related = incremental.indexer.rebuild_related_documents()
+        console.print(f"\n  ✓ Related documents built for {related} files")
+    
+    try:
+        removed = switch_index_directory(chroma_dir, build_dir)
+        console.print(f"\n  ✓ {chroma_dir} now points to {build_dir.name}")
+        if removed:
+            console.print(f"  ✓ Removed {len(removed)} older database(s)")
+    except Exception as e:
+        console.print(f"\n  [red]✗ Error switching to the new database in {build_dir}: {e}[/red]")
+        return
+    
     # Calculate elapsed time
     elapsed_time = time.time() - start_time
     
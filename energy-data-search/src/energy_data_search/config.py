@@ -19,6 +19,10 @@ class Config(BaseModel):
         default_factory=lambda: Path("./data/chroma_db").absolute()
     )
     collection_name: str = Field(default="energy_documents")
+    # Serve search read-only from a memory-mapped snapshot instead of ChromaDB
+    snapshot_path: Optional[Path] = Field(
+        default_factory=lambda: Path(os.environ["SNAPSHOT_PATH"]) if os.getenv("SNAPSHOT_PATH") else None
+    )
     embedding_model: str = Field(default="all-MiniLM-L6-v2")
     chunk_size: int = Field(default=1000)
     chunk_overlap: int = Field(default=200)
@@ -27,6 +31,101 @@ class Config(BaseModel):
     max_results: int = Field(default=10)
     similarity_threshold: float = Field(default=0.3)
     
+    # HNSW graph parameters (M and construction ef only apply to new collections)
+    hnsw_m: int = Field(default=16)
+    hnsw_construction_ef: int = Field(default=200)
+    hnsw_search_ef: int = Field(default=100)
+    
+    # Query caches: text -> embedding (LRU) and search -> results (TTL); 0 disables
+    query_cache_size: int = Field(default=1024)
+    result_cache_size: int = Field(default=512)
+    result_cache_ttl: float = Field(default=300)
+    
+    # Retrieval mode: "vector" or "hybrid" (vector + BM25 fused with reciprocal rank fusion)
+    search_mode: str = Field(
+        default_factory=lambda: os.getenv("SEARCH_MODE", "vector")
+    )
+    lexical_index: bool = Field(default=True)
+    hybrid_candidates: int = Field(default=50)
+    rrf_k: int = Field(default=60)
+    
+    # Searches that lose candidates after ranking re-query with more, up to this many
+    overfetch_limit: int = Field(default=1000)
+    # Ranked result lists kept for cursor pagination (expire with result_cache_ttl)
+    page_cache_size: int = Field(default=256)
+    
+    # Filters estimated to match at most this many chunks are searched exactly
+    # with NumPy instead of filtered HNSW (0 disables); subsets cached per filter
+    exact_search_threshold: int = Field(default=5000)
+    exact_search_cache_size: int = Field(default=8)
+    
+    # Result diversity over the top diversity_candidates chunks: one chunk per
+    # source and/or maximal marginal relevance (1.0 = relevance only)
+    collapse_by_source: bool = Field(default=False)
+    mmr: bool = Field(default=False)
+    mmr_lambda: float = Field(default=0.7)
+    diversity_candidates: int = Field(default=50)
+    
+    # Queries within semantic_cache_threshold cosine similarity of a recent query with
+    # the same parameters reuse its results (0 entries disables). A share of hits,
+    # semantic_cache_audit_rate, is searched anyway and counted as false if the results
+    # overlap by less than semantic_cache_min_overlap
+    semantic_cache_size: int = Field(default=256)
+    semantic_cache_threshold: float = Field(default=0.95)
+    semantic_cache_audit_rate: float = Field(default=0.05)
+    semantic_cache_min_overlap: float = Field(default=0.5)
+    
+    # Cross-encoder reranking of the top rerank_candidates within a latency budget
+    rerank: bool = Field(
+        default_factory=lambda: os.getenv("RERANK", "false").lower() in ("1", "true", "yes")
+    )
+    rerank_model: str = Field(default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    rerank_candidates: int = Field(default=50)
+    rerank_budget_ms: float = Field(default=300)
+    rerank_cache_size: int = Field(default=4096)
+    
+    # Snippets of snippet_length characters are stored with each chunk at ingest;
+    # without hydrate_results searches return them instead of the full chunk text
+    snippet_length: int = Field(default=200)
+    hydrate_results: bool = Field(default=True)
+    # Chunk metadata cached by ID for searches without full text
+    metadata_cache_size: int = Field(default=20000)
+    # Chunks before and after a document lookup, by the chunk_index stored at
+    # ingest, and lookups cached until the index changes
+    document_context_chunks: int = Field(default=2)
+    document_cache_size: int = Field(default=1000)
+    # Related documents kept per source file, from the similarity of mean chunk
+    # embeddings; built by reindexing and refreshed by index updates (0 disables)
+    related_documents_k: int = Field(default=10)
+    
+    # Search requests logged by the API; the warmup_top_queries most frequent are
+    # precomputed at startup (keep it below semantic_cache_size so they stay cached)
+    query_log_path: Path = Field(
+        default_factory=lambda: Path(os.getenv("QUERY_LOG_PATH", "./data/query_log.jsonl")).absolute()
+    )
+    query_log_max_mb: float = Field(default=50)
+    warmup_top_queries: int = Field(default=100)
+    
+    # Search API: blocking engine calls run on api_search_workers threads, at most
+    # api_max_queued more wait for one, and each call gets api_request_timeout seconds
+    api_search_workers: int = Field(default=4)
+    api_max_queued: int = Field(default=64)
+    api_request_timeout: float = Field(default=10.0)
+    # First-page searches with the same options arriving within api_batch_window_ms
+    # are searched as one batch of up to api_max_batch (0 ms disables batching)
+    api_batch_window_ms: float = Field(default=5.0)
+    api_max_batch: int = Field(default=32)
+    # Search API responses of at least this many bytes are compressed with brotli
+    # (when installed) or gzip, whichever the client accepts
+    api_compress_min_bytes: int = Field(default=1000)
+    # Index updates started through the search API run one at a time in a
+    # worker process at this niceness, with at most index_job_threads compute threads
+    index_job_nice: int = Field(default=10)
+    index_job_threads: int = Field(default=2)
+    # Seconds between the search API's checks for a replaced index, which it
+    # opens and warms in the background before switching to it (0 disables)
+    index_watch_interval: float = Field(default=5.0)
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,16 +1,36 @@
 """ChromaDB indexer for document storage and retrieval."""
 
 import logging
+import pickle
+import shutil
+import sqlite3
+import threading
 from pathlib import Path
 from typing import List, Optional, Dict, Any, Tuple
 import hashlib
-import chromadb
-from chromadb.config import Settings
-from langchain.schema import Document
-from langchain_huggingface import HuggingFaceEmbeddings
+import json
+import numpy as np
+from langchain_core.documents import Document
+
+from ..utils.cache import LRUCache
+from ..utils.index_generation import IndexGeneration
+from .embeddings import load_embeddings
+from .facet_counts import FacetCounts
+from .lexical_index import LexicalIndex, reciprocal_rank_fusion
+from .related_documents import RelatedDocuments, mean_embeddings
 
 logger = logging.getLogger(__name__)
 
+# Suffix of the temporary collection used while compacting
+COMPACT_SUFFIX = "__compacting"
+
+SEARCH_MODES = ("vector", "hybrid")
+
+
+def _directory_size(path: Path) -> int:
+    """Total size in bytes of all files under a directory."""
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
 
 class ChromaDBIndexer:
     """Manage ChromaDB vector store for document indexing and search."""
@@ -19,50 +39,181 @@ class ChromaDBIndexer:
         self,
         persist_directory: Path,
         collection_name: str = "energy_documents",
-        embedding_model: str = "all-MiniLM-L6-v2"
+        embedding_model: str = "all-MiniLM-L6-v2",
+        hnsw_m: int = 16,
+        hnsw_construction_ef: int = 200,
+        hnsw_search_ef: int = 100,
+        lexical_index: bool = True,
+        hybrid_candidates: int = 50,
+        rrf_k: int = 60,
+        overfetch_limit: int = 1000,
+        exact_search_threshold: int = 5000,
+        exact_search_cache_size: int = 8,
+        metadata_cache_size: int = 20000,
+        related_documents_k: int = 10
     ):
         """Initialize ChromaDB indexer."""
-        self.persist_directory = Path(persist_directory)
-        self.persist_directory.mkdir(parents=True, exist_ok=True)
+        # A full reindex points the configured path, a symlink, at a new
+        # directory; this indexer keeps using the one it was opened on
+        self.configured_directory = Path(persist_directory)
+        self.configured_directory.mkdir(parents=True, exist_ok=True)
+        self.persist_directory = self.configured_directory.resolve()
         self.collection_name = collection_name
+        self.embedding_model = embedding_model
+        self.hnsw_m = hnsw_m
+        self.hnsw_construction_ef = hnsw_construction_ef
+        self.hnsw_search_ef = hnsw_search_ef
+        # Bumped on every write so caches in any process can detect changes
+        self.generation = IndexGeneration(self.persist_directory)
+        # Generation the stores below and the client were opened at, advanced
+        # by this indexer's own writes; see reopen_if_written()
+        self._opened_generation = self.generation.current()
+        
+        self.use_lexical_index = lexical_index
+        self.related_documents_k = related_documents_k
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+        # Most candidates a search may grow to when results fall short of k
+        self.overfetch_limit = overfetch_limit
+        
+        # Filters matching at most exact_search_threshold chunks (estimated from
+        # the facet counts) are searched exactly over the subset's vectors
+        self.exact_search_threshold = exact_search_threshold
+        self._subset_cache = LRUCache(exact_search_cache_size)
+        
+        # Chunk metadata by ID for searches that skip the chunk text; reading
+        # metadata rows dominates the cost of a ChromaDB query
+        self.metadata_cache = LRUCache(metadata_cache_size)
+        self._metadata_generation: Optional[int] = None
+        self._open_stores()
+        
+        # The embedding model and ChromaDB client are loaded on first use so
+        # commands that only read stats or the tracker start quickly
+        self._embeddings = None
+        self._system = None
+        self._client = None
+        self._collection = None
+        # Searches on worker threads can race to the first access
+        self._load_lock = threading.RLock()
+    
+    def _open_stores(self):
+        """Open the files kept beside the collection, replacing any already open.
+        
+        Each store is a new object, so a search running meanwhile finishes
+        on the one it started with.
+        """
+        # BM25 index over chunk texts, fused with vector results in hybrid mode
+        self.lexical_index = None
+        if self.use_lexical_index:
+            self.lexical_index = LexicalIndex(self.persist_directory / "lexical_index" / self.collection_name)
         
-        # Initialize embeddings
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=embedding_model,
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
+        self.facet_counts = FacetCounts(self.persist_directory / "facet_counts" / f"{self.collection_name}.json")
+        
+        # Most similar source files of each file, by mean chunk embedding
+        self.related_documents = None
+        if self.related_documents_k > 0:
+            self.related_documents = RelatedDocuments(
+                self.persist_directory / "related_documents" / f"{self.collection_name}.npz",
+                k=self.related_documents_k
+            )
+    
+    @property
+    def embeddings(self):
+        """Embedding model, loaded on first access."""
+        if self._embeddings is None:
+            with self._load_lock:
+                if self._embeddings is None:
+                    self._embeddings = load_embeddings(self.embedding_model)
+        return self._embeddings
+    
+    @property
+    def client(self):
+        """ChromaDB client, opened on first access."""
+        if self._client is None:
+            with self._load_lock:
+                if self._client is None:
+                    self._initialize_chromadb()
+        return self._client
+    
+    @property
+    def collection(self):
+        """ChromaDB collection, opened on first access."""
+        if self._collection is None:
+            with self._load_lock:
+                if self._collection is None:
+                    self._initialize_chromadb()
+        return self._collection
+    
+    @classmethod
+    def from_config(cls, config) -> "ChromaDBIndexer":
+        """Create an indexer from application configuration."""
+        return cls(
+            persist_directory=config.chroma_persist_dir,
+            collection_name=config.collection_name,
+            embedding_model=config.embedding_model,
+            hnsw_m=config.hnsw_m,
+            hnsw_construction_ef=config.hnsw_construction_ef,
+            hnsw_search_ef=config.hnsw_search_ef,
+            lexical_index=config.lexical_index,
+            hybrid_candidates=config.hybrid_candidates,
+            rrf_k=config.rrf_k,
+            overfetch_limit=config.overfetch_limit,
+            exact_search_threshold=config.exact_search_threshold,
+            exact_search_cache_size=config.exact_search_cache_size,
+            metadata_cache_size=config.metadata_cache_size,
+            related_documents_k=config.related_documents_k
         )
+    
+    def _open_client(self):
+        """Start a ChromaDB system of its own on the index directory and return it with a client.
+        
+        ``chromadb.PersistentClient`` shares one system per directory for the
+        life of the process, and the vector segments it has loaded do not see
+        chunks another process adds or deletes afterwards. A system of our
+        own can be replaced by a fresh one and stopped. ``System`` and
+        ``Client.from_system`` are not public API, so chromadb is pinned to
+        the version this was written against; tests/test_chromadb_indexer.py
+        checks it still opens, reads and reopens an index.
+        """
+        from chromadb.api import ServerAPI
+        from chromadb.api.client import Client
+        from chromadb.config import Settings, System
+        from chromadb.telemetry.product import ProductTelemetryClient
         
-        self.client = None
-        self.collection = None
-        self._initialize_chromadb()
+        system = System(Settings(
+            anonymized_telemetry=False,
+            allow_reset=True,
+            is_persistent=True,
+            persist_directory=str(self.persist_directory)
+        ))
+        system.instance(ProductTelemetryClient)
+        system.instance(ServerAPI)
+        system.start()
+        return system, Client.from_system(system)
     
     def _initialize_chromadb(self):
         """Initialize ChromaDB client and collection."""
         try:
-            # Create persistent client - this will create/load the database
-            self.client = chromadb.PersistentClient(
-                path=str(self.persist_directory),
-                settings=Settings(
-                    anonymized_telemetry=False,
-                    allow_reset=True,
-                    is_persistent=True
-                )
-            )
+            # Open the persistent database, creating it if needed
+            self._system, self._client = self._open_client()
             
             # Try to get existing collection first
             try:
-                self.collection = self.client.get_collection(
+                self._collection = self._client.get_collection(
                     name=self.collection_name
                 )
                 logger.info(f"Loaded existing collection '{self.collection_name}'")
+                self._sync_hnsw_config()
             except Exception:
-                # Collection doesn't exist, create it
-                self.collection = self.client.create_collection(
-                    name=self.collection_name,
-                    metadata={"hnsw:space": "cosine"}
-                )
-                logger.info(f"Created new collection '{self.collection_name}'")
+                if self._recover_compacted_collection():
+                    logger.info(f"Recovered collection '{self.collection_name}' from interrupted compaction")
+                else:
+                    # Collection doesn't exist, create it
+                    self._collection = self._client.create_collection(
+                        name=self.collection_name,
+                        metadata=self._collection_metadata()
+                    )
+                    logger.info(f"Created new collection '{self.collection_name}'")
             
             logger.info(f"Initialized ChromaDB at {self.persist_directory}")
             
@@ -70,6 +221,48 @@ class ChromaDBIndexer:
             logger.error(f"Failed to initialize ChromaDB: {e}")
             raise
     
+    def _collection_metadata(self) -> Dict[str, Any]:
+        """Collection metadata carrying the distance metric and HNSW parameters."""
+        return {
+            "hnsw:space": "cosine",
+            "hnsw:M": self.hnsw_m,
+            "hnsw:construction_ef": self.hnsw_construction_ef,
+            "hnsw:search_ef": self.hnsw_search_ef
+        }
+    
+    def _hnsw_configuration(self) -> Dict[str, Any]:
+        """HNSW parameters the collection was actually created with."""
+        configuration = getattr(self.collection, "configuration_json", None) or {}
+        return configuration.get("hnsw") or {}
+    
+    def _sync_hnsw_config(self):
+        """Apply the configured search ef to an existing collection."""
+        hnsw = self._hnsw_configuration()
+        
+        # Search ef can change on a live collection, but only takes effect
+        # if applied before the HNSW segment is first loaded by a query
+        if hnsw.get("ef_search") not in (None, self.hnsw_search_ef):
+            self.collection.modify(configuration={"hnsw": {"ef_search": self.hnsw_search_ef}})
+            logger.info(f"Set HNSW search ef to {self.hnsw_search_ef}")
+        
+        built_with = (hnsw.get("max_neighbors"), hnsw.get("ef_construction"))
+        if None not in built_with and built_with != (self.hnsw_m, self.hnsw_construction_ef):
+            logger.warning(
+                f"Collection '{self.collection_name}' was built with M={built_with[0]}, "
+                f"construction ef={built_with[1]}; a full reindex is needed to apply "
+                f"M={self.hnsw_m}, construction ef={self.hnsw_construction_ef}"
+            )
+    
+    def _recover_compacted_collection(self) -> bool:
+        """Restore a collection whose compaction stopped after the old copy was deleted."""
+        try:
+            compacted = self._client.get_collection(name=f"{self.collection_name}{COMPACT_SUFFIX}")
+        except Exception:
+            return False
+        compacted.modify(name=self.collection_name)
+        self._collection = self._client.get_collection(name=self.collection_name)
+        return True
+    
     def _generate_id(self, content: str, metadata: Dict[str, Any]) -> str:
         """Generate a unique ID for a document."""
         # Create ID from content hash and source
@@ -89,6 +282,7 @@ class ChromaDBIndexer:
         
         total_added = 0
         failed_batches = 0
+        facets = self._facets_for_write()
         
         for i in range(0, len(documents), batch_size):
             batch = documents[i:i + batch_size]
@@ -108,6 +302,9 @@ class ChromaDBIndexer:
                 # Generate embeddings for the batch
                 batch_embeddings = self.embeddings.embed_documents(texts)
                 
+                # Chunks already stored are replaced, so uncount their old metadata
+                existing = self.collection.get(ids=ids, include=["metadatas"])
+                
                 # Add to collection (upsert to handle duplicates)
                 self.collection.upsert(
                     ids=ids,
@@ -115,6 +312,10 @@ class ChromaDBIndexer:
                     metadatas=metadatas,
                     embeddings=batch_embeddings
                 )
+                facets.update(added=metadatas, removed=existing['metadatas'])
+                
+                if self.lexical_index is not None:
+                    self.lexical_index.add(ids, texts)
                 
                 total_added += len(batch)
                 logger.info(f"Added batch {i//batch_size + 1}: {len(batch)} documents")
@@ -126,6 +327,11 @@ class ChromaDBIndexer:
         if failed_batches > 0:
             logger.warning(f"Failed to add {failed_batches} batches")
         
+        if self.lexical_index is not None:
+            self.lexical_index.save()
+        if total_added:
+            self._commit_write()
+        
         logger.info(f"Total documents added: {total_added}")
         return total_added
     
@@ -134,67 +340,804 @@ class ChromaDBIndexer:
         query: str,
         k: int = 10,
         filter_dict: Optional[Dict[str, Any]] = None,
-        score_threshold: Optional[float] = None
+        score_threshold: Optional[float] = None,
+        ef: Optional[int] = None,
+        mode: str = "vector"
+    ) -> List[Tuple[Document, float]]:
+        """Search for similar documents.
+        
+        ``ef`` overrides the HNSW search breadth for this query. The loaded
+        index keeps its configured ef, but HNSW searches with max(ef, n), so
+        the override is applied by requesting ``ef`` neighbours and keeping
+        the top ``k``. ``mode="hybrid"`` fuses vector and BM25 results.
+        """
+        try:
+            query_embedding = self.embed_query(query)
+        except Exception as e:
+            logger.error(f"Search error: {e}")
+            return []
+        return self.search_by_vector(query_embedding, k, filter_dict, score_threshold, ef, query=query, mode=mode)
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query with the index's embedding model."""
+        return self.embeddings.embed_query(query)
+    
+    def search_by_vector(
+        self,
+        query_embedding: List[float],
+        k: int = 10,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None,
+        ef: Optional[int] = None,
+        query: str = "",
+        mode: str = "vector",
+        include_content: bool = True
     ) -> List[Tuple[Document, float]]:
-        """Search for similar documents."""
+        """Search with a precomputed query embedding.
+        
+        ``query`` is used for the lexical side of hybrid search and for logging.
+        """
+        return self.search_many_by_vector(
+            [query_embedding], k, filter_dict, score_threshold, ef, queries=[query], mode=mode,
+            include_content=include_content
+        )[0]
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries in one forward pass."""
+        return self.embeddings.embed_documents(queries)
+    
+    def search_many_by_vector(
+        self,
+        query_embeddings: List[List[float]],
+        k: int = 10,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None,
+        ef: Optional[int] = None,
+        queries: Optional[List[str]] = None,
+        mode: str = "vector",
+        include_content: bool = True
+    ) -> List[List[Tuple[Document, float]]]:
+        """Search several query embeddings with a single collection query.
+        
+        Plain vector hits come back in exact score order, so a threshold cut
+        there is final. The hybrid path can lose candidates after
+        ranking and re-query with more of them, up to
+        ``overfetch_limit``, until ``k`` results pass. Filters estimated to
+        match at most ``exact_search_threshold`` chunks skip HNSW and are
+        searched exactly. Without ``include_content`` the store returns only
+        IDs, scores and metadata, and documents have empty page content;
+        fetch the text later with ``get_documents``.
+        """
+        queries = queries or [""] * len(query_embeddings)
+        if mode == "hybrid" and self.lexical_index is not None:
+            return self._hybrid_search_many(
+                query_embeddings, k, filter_dict, score_threshold, ef, queries, include_content
+            )
+        return self._vector_search_many(
+            query_embeddings, k, filter_dict, score_threshold, ef, queries, include_content
+        )
+    
+    def _vector_search_many(
+        self,
+        query_embeddings: List[List[float]],
+        k: int,
+        filter_dict: Optional[Dict[str, Any]],
+        score_threshold: Optional[float],
+        ef: Optional[int],
+        queries: List[str],
+        include_content: bool = True
+    ) -> List[List[Tuple[Document, float]]]:
+        """Nearest-neighbour search for several query embeddings."""
         if not self.collection:
             logger.error("Collection not initialized")
-            return []
+            return [[] for _ in query_embeddings]
         
         try:
-            # Generate query embedding
-            query_embedding = self.embeddings.embed_query(query)
+            if self._use_exact_search(filter_dict):
+                all_output = []
+                for query, hits in zip(queries, self._exact_candidates(query_embeddings, k, filter_dict)):
+                    if score_threshold is not None:
+                        hits = [(doc_id, score) for doc_id, score in hits if score >= score_threshold]
+                    output = self._fetch_hits(hits, k, include_content)
+                    logger.info(f"Found {len(output)} documents (exact) for query: {query[:50]}...")
+                    all_output.append(output)
+                return all_output
             
             # Build where clause for filtering
             where_clause = None
             if filter_dict:
                 where_clause = filter_dict
             
-            # Perform search
+            # Perform search. Without content only IDs and distances are read,
+            # and metadata comes from the metadata cache
             results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=k,
-                where=where_clause if where_clause else None
+                query_embeddings=query_embeddings,
+                n_results=max(k, ef) if ef else k,
+                where=where_clause if where_clause else None,
+                include=["documents", "metadatas", "distances"] if include_content else ["distances"]
             )
+            if not include_content:
+                cached = self._metadatas([doc_id for ids in results['ids'] for doc_id in ids])
             
             # Process results
-            output = []
-            if results and results['ids'] and len(results['ids'][0]) > 0:
-                for idx, doc_id in enumerate(results['ids'][0]):
+            all_output = []
+            for row, query in enumerate(queries):
+                output = []
+                for idx, doc_id in enumerate(results['ids'][row] if results and results['ids'] else []):
                     # Calculate similarity score (distance to similarity)
                     # ChromaDB returns distances, convert to similarity scores
-                    distance = results['distances'][0][idx]
+                    distance = results['distances'][row][idx]
                     similarity = 1 - distance  # For cosine distance
                     
                     # Apply score threshold if provided
                     if score_threshold is not None and similarity < score_threshold:
                         continue
                     
-                    # Create Document object
-                    doc = Document(
-                        page_content=results['documents'][0][idx],
-                        metadata=results['metadatas'][0][idx] if results['metadatas'][0][idx] else {}
-                    )
+                    # Create Document object. A vector segment loaded before
+                    # chunks were deleted still returns their IDs, without rows
+                    if include_content:
+                        content = results['documents'][row][idx]
+                        metadata = results['metadatas'][row][idx]
+                    else:
+                        content, metadata = "", cached.get(doc_id)
+                    if content is None or metadata is None:
+                        continue
+                    doc = Document(id=doc_id, page_content=content, metadata=metadata)
                     output.append((doc, similarity))
+                    if len(output) == k:
+                        break
+                
+                logger.info(f"Found {len(output)} documents for query: {query[:50]}...")
+                all_output.append(output)
+            return all_output
             
-            logger.info(f"Found {len(output)} documents for query: {query[:50]}...")
+        except Exception as e:
+            logger.error(f"Search error: {e}")
+            return [[] for _ in query_embeddings]
+    
+    def _hybrid_search_many(
+        self,
+        query_embeddings: List[List[float]],
+        k: int,
+        filter_dict: Optional[Dict[str, Any]],
+        score_threshold: Optional[float],
+        ef: Optional[int],
+        queries: List[str],
+        include_content: bool = True
+    ) -> List[List[Tuple[Document, float]]]:
+        """Vector candidates (IDs and scores only) for several queries, fused with BM25."""
+        if not self.collection:
+            logger.error("Collection not initialized")
+            return [[] for _ in query_embeddings]
+        
+        candidates = max(k, self.hybrid_candidates)
+        output: List[List[Tuple[Document, float]]] = [[] for _ in query_embeddings]
+        pending = list(range(len(query_embeddings)))
+        try:
+            while pending:
+                embeddings = [query_embeddings[i] for i in pending]
+                if self._use_exact_search(filter_dict):
+                    vector_hits = self._exact_candidates(embeddings, candidates, filter_dict)
+                else:
+                    results = self.collection.query(
+                        query_embeddings=embeddings,
+                        n_results=max(candidates, ef) if ef else candidates,
+                        where=filter_dict if filter_dict else None,
+                        include=["distances"]
+                    )
+                    vector_hits = [
+                        [(doc_id, 1 - distance) for doc_id, distance in zip(ids, distances)][:candidates]
+                        for ids, distances in zip(results['ids'], results['distances'])
+                    ]
+                
+                retry = []
+                for i, hits in zip(pending, vector_hits):
+                    output[i], more = self._fuse_hybrid(
+                        queries[i], query_embeddings[i], hits, k, candidates, filter_dict, score_threshold,
+                        include_content
+                    )
+                    if more and candidates < self.overfetch_limit:
+                        retry.append(i)
+                pending = retry
+                candidates = min(candidates * 2, self.overfetch_limit)
             return output
-            
         except Exception as e:
             logger.error(f"Search error: {e}")
+            return [[] for _ in query_embeddings]
+    
+    def _fuse_hybrid(
+        self,
+        query: str,
+        query_embedding: List[float],
+        vector_hits: List[Tuple[str, float]],
+        k: int,
+        candidates: int,
+        filter_dict: Optional[Dict[str, Any]],
+        score_threshold: Optional[float],
+        include_content: bool = True
+    ) -> Tuple[List[Tuple[Document, float]], bool]:
+        """Combine vector and BM25 rankings with reciprocal rank fusion.
+        
+        Results are ordered by fused rank; the score reported for each chunk
+        is still its cosine similarity to the query. The similarity threshold
+        applies to vector candidates only, since exact-term hits are what the
+        vector side tends to miss. Also returns whether the results fell short
+        of ``k`` while either ranking may have more candidates.
+        """
+        # A full vector list whose weakest hit passes may continue past it
+        vector_full = len(vector_hits) == candidates
+        if score_threshold is not None:
+            passing = [(doc_id, score) for doc_id, score in vector_hits if score >= score_threshold]
+            vector_full = vector_full and len(passing) == len(vector_hits)
+            vector_hits = passing
+        try:
+            lexical_hits = self.lexical_index.search(query, k=candidates)
+        except Exception as e:
+            logger.error(f"Lexical search error: {e}")
+            lexical_hits = []
+        
+        fused = reciprocal_rank_fusion(
+            [[doc_id for doc_id, _ in vector_hits], [doc_id for doc_id, _ in lexical_hits]],
+            k=self.rrf_k
+        )
+        vector_scores = dict(vector_hits)
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        
+        # Fetch only the chunks that make the top k. Lexical-only chunks have
+        # not been through the filter yet, so refill if any are filtered out
+        output = []
+        position = 0
+        while len(output) < k and position < len(fused):
+            window = [doc_id for doc_id, _ in fused[position:position + k - len(output)]]
+            position += len(window)
+            include = ["documents", "metadatas"] if include_content else ["metadatas"]
+            if any(doc_id not in vector_scores for doc_id in window):
+                include.append("embeddings")
+            fetched = self.collection.get(
+                ids=window,
+                where=filter_dict if filter_dict else None,
+                include=include
+            )
+            rows = {doc_id: i for i, doc_id in enumerate(fetched['ids'])}
+            for doc_id in window:
+                if doc_id not in rows:
+                    continue
+                i = rows[doc_id]
+                if fetched['metadatas'][i] is None or (include_content and fetched['documents'][i] is None):
+                    continue
+                similarity = vector_scores.get(doc_id)
+                if similarity is None:
+                    similarity = float(np.dot(np.asarray(fetched['embeddings'][i], dtype=np.float32), query_vector))
+                doc = Document(
+                    id=doc_id,
+                    page_content=fetched['documents'][i] if include_content else "",
+                    metadata=fetched['metadatas'][i]
+                )
+                output.append((doc, similarity))
+        
+        logger.info(f"Found {len(output)} documents (hybrid) for query: {query[:50]}...")
+        return output, len(output) < k and (vector_full or len(lexical_hits) == candidates)
+    
+    def _fetch_hits(
+        self,
+        hits: List[Tuple[str, float]],
+        k: int,
+        include_content: bool = True
+    ) -> List[Tuple[Document, float]]:
+        """Fetch documents for ranked (ID, score) hits, skipping IDs no longer stored or without rows."""
+        if not hits:
             return []
+        if include_content:
+            fetched = self.collection.get(
+                ids=[doc_id for doc_id, _ in hits],
+                include=["documents", "metadatas"]
+            )
+            by_id = {
+                doc_id: (fetched['documents'][i], fetched['metadatas'][i])
+                for i, doc_id in enumerate(fetched['ids'])
+            }
+        else:
+            by_id = {
+                doc_id: ("", metadata)
+                for doc_id, metadata in self._metadatas([doc_id for doc_id, _ in hits]).items()
+            }
+        
+        output = []
+        for doc_id, similarity in hits:
+            content, metadata = by_id.get(doc_id, (None, None))
+            if content is None or metadata is None:
+                continue
+            doc = Document(id=doc_id, page_content=content, metadata=metadata)
+            output.append((doc, similarity))
+            if len(output) == k:
+                break
+        return output
+    
+    def _metadatas(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Metadata of stored chunks by ID, from the cache or one batched get for the rest.
+        
+        The cache is dropped when the index generation changes. IDs no longer
+        stored are left out.
+        """
+        generation = self.generation.current()
+        if generation != self._metadata_generation:
+            self.metadata_cache.clear()
+            self._metadata_generation = generation
+        
+        found = {}
+        missing = []
+        for doc_id in ids:
+            metadata = self.metadata_cache.get(doc_id)
+            if metadata is None:
+                missing.append(doc_id)
+            else:
+                found[doc_id] = metadata
+        if missing:
+            fetched = self.collection.get(ids=list(dict.fromkeys(missing)), include=["metadatas"])
+            for doc_id, metadata in zip(fetched['ids'], fetched['metadatas']):
+                found[doc_id] = metadata or {}
+                self.metadata_cache.put(doc_id, found[doc_id])
+        return found
+    
+    def get_documents(self, ids: List[str]) -> List[Document]:
+        """Stored chunks for IDs in one batched get, in the order given, skipping IDs not stored."""
+        if not ids:
+            return []
+        # ChromaDB rejects repeated IDs in one get
+        fetched = self.collection.get(ids=list(dict.fromkeys(ids)), include=["documents", "metadatas"])
+        rows = {doc_id: i for i, doc_id in enumerate(fetched['ids'])}
+        return [
+            Document(
+                id=doc_id,
+                page_content=fetched['documents'][rows[doc_id]],
+                metadata=fetched['metadatas'][rows[doc_id]] or {}
+            )
+            for doc_id in ids if doc_id in rows
+        ]
+    
+    def get_documents_where(self, filter_dict: Dict[str, Any]) -> List[Document]:
+        """Stored chunks matching a where clause, in one get, in no particular order."""
+        fetched = self.collection.get(where=filter_dict, include=["documents", "metadatas"])
+        return [
+            Document(id=doc_id, page_content=text, metadata=metadata or {})
+            for doc_id, text, metadata in zip(fetched['ids'], fetched['documents'], fetched['metadatas'])
+        ]
+    
+    def get_embeddings(self, ids: List[str]) -> np.ndarray:
+        """Stored vectors for chunk IDs, in the order given."""
+        fetched = self.collection.get(ids=ids, include=["embeddings"])
+        rows = {doc_id: i for i, doc_id in enumerate(fetched['ids'])}
+        vectors = np.asarray(fetched['embeddings'], dtype=np.float32)
+        return vectors[[rows[doc_id] for doc_id in ids]]
+    
+    def _use_exact_search(self, filter_dict: Optional[Dict[str, Any]]) -> bool:
+        """Whether a filter is selective enough to search its subset exactly."""
+        if not filter_dict or self.exact_search_threshold <= 0:
+            return False
+        facets = self._current_facets()
+        if facets is None:
+            return False
+        estimate = facets.estimate(filter_dict)
+        return estimate is not None and estimate <= self.exact_search_threshold
+    
+    def _filtered_vectors(self, filter_dict: Dict[str, Any]) -> Tuple[List[str], np.ndarray]:
+        """IDs and normalized vectors of the chunks matching a filter, cached per generation."""
+        key = (json.dumps(filter_dict, sort_keys=True, default=str), self.generation.current())
+        cached = self._subset_cache.get(key)
+        if cached is None:
+            subset = self.collection.get(where=filter_dict, include=["embeddings"])
+            if not subset['ids']:
+                return [], np.zeros((0, 0), dtype=np.float32)
+            matrix = np.asarray(subset['embeddings'], dtype=np.float32)
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            cached = (subset['ids'], matrix)
+            self._subset_cache.put(key, cached)
+        return cached
+    
+    def _exact_candidates(
+        self,
+        query_embeddings: List[List[float]],
+        n: int,
+        filter_dict: Dict[str, Any]
+    ) -> List[List[Tuple[str, float]]]:
+        """Exact top-n (ID, cosine similarity) hits within a filtered subset."""
+        ids, matrix = self._filtered_vectors(filter_dict)
+        if not ids:
+            return [[] for _ in query_embeddings]
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = queries @ matrix.T
+        
+        n = min(n, len(ids))
+        top = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        output = []
+        for row, candidates in enumerate(top):
+            order = candidates[np.argsort(-scores[row, candidates])]
+            output.append([(ids[j], float(scores[row, j])) for j in order])
+        return output
+    
+    def _current_facets(self) -> Optional[FacetCounts]:
+        """Facet counts saved for the current index generation, or None if there are none.
+        
+        Searches only read the counts. Writers save them for a generation
+        before moving the index to it, so counts behind the index were never
+        committed and are not used.
+        """
+        generation = self.generation.current()
+        if self.facet_counts.generation is None or self.facet_counts.generation < generation:
+            self.facet_counts.load()
+        if self.facet_counts.generation is None or self.facet_counts.generation < generation:
+            return None
+        return self.facet_counts
+    
+    def _facets_for_write(self) -> FacetCounts:
+        """Facet counts to update in a write, recounted if none were saved for the current generation."""
+        if self._current_facets() is None:
+            self._recount_facets()
+        return self.facet_counts
+    
+    def rebuild_facet_counts(self) -> int:
+        """Recount chunks per facet value from the stored metadata and commit the counts."""
+        counted = self._recount_facets()
+        self._commit_write()
+        return counted
+    
+    def _recount_facets(self) -> int:
+        """Recount chunks per facet value from the stored metadata, without saving."""
+        self.facet_counts.clear()
+        batch_size = self.client.get_max_batch_size()
+        counted = 0
+        while True:
+            page = self.collection.get(limit=batch_size, offset=counted, include=["metadatas"])
+            if not page['ids']:
+                break
+            self.facet_counts.update(added=page['metadatas'])
+            counted += len(page['ids'])
+        logger.info(f"Facet counts rebuilt for {counted} chunks")
+        return counted
+    
+    def _source_centroids(self, where: Optional[Dict[str, Any]] = None) -> Dict[str, np.ndarray]:
+        """Normalized mean embedding of each source's stored chunks, paged through the collection."""
+        batch_size = self.client.get_max_batch_size()
+        
+        def pages():
+            offset = 0
+            while True:
+                page = self.collection.get(
+                    where=where, limit=batch_size, offset=offset, include=["embeddings", "metadatas"]
+                )
+                if not page['ids']:
+                    break
+                yield page['embeddings'], page['metadatas']
+                offset += len(page['ids'])
+        
+        return mean_embeddings(pages())
+    
+    def rebuild_related_documents(self) -> int:
+        """Build the related-documents graph over every stored source; returns the number of sources."""
+        if self.related_documents is None:
+            raise ValueError("Related documents are disabled in the configuration")
+        self.related_documents.build(self._source_centroids())
+        self.related_documents.save()
+        logger.info(f"Related documents built for {len(self.related_documents)} sources")
+        return len(self.related_documents)
+    
+    def refresh_related_documents(self, sources: List[str]) -> int:
+        """Update the related-documents graph for sources added, modified or removed since it was saved.
+        
+        Builds the whole graph if none is saved yet. Returns the number of
+        sources in the graph.
+        """
+        if self.related_documents is None or not sources:
+            return 0
+        graph = self.related_documents
+        graph.load()
+        if not len(graph):
+            return self.rebuild_related_documents()
+        
+        sources = list(dict.fromkeys(sources))
+        changed: Dict[str, np.ndarray] = {}
+        for start in range(0, len(sources), 100):
+            changed.update(self._source_centroids({"source": {"$in": sources[start:start + 100]}}))
+        graph.update(changed, removed=[source for source in sources if source not in changed])
+        graph.save()
+        logger.info(f"Related documents refreshed for {len(sources)} sources")
+        return len(graph)
+    
+    def _commit_write(self):
+        """Save the facet counts for the next index generation, then move the index to it.
+        
+        Readers that see the new generation find its counts already saved.
+        """
+        previous = self.generation.current()
+        self.facet_counts.save(previous + 1)
+        generation = self.generation.bump()
+        # Our own writes are visible to our stores, unless another process
+        # wrote before us
+        if previous == self._opened_generation:
+            self._opened_generation = generation
+    
+    def reopen_if_written(self) -> bool:
+        """Reopen the collection and its stores if another process wrote the index since they were opened.
+        
+        ChromaDB and the stores beside it are read once, so without this a
+        long-running reader keeps serving the index as it was, with chunks
+        deleted since then coming back empty. The old system is dropped, not
+        stopped; searches still using it finish first. Returns whether the
+        index was reopened.
+        """
+        generation = self.generation.current()
+        if generation == self._opened_generation:
+            return False
+        with self._load_lock:
+            if generation == self._opened_generation:
+                return False
+            logger.info(f"Index generation changed ({self._opened_generation} -> {generation}), reopening")
+            self._opened_generation = generation
+            self._open_stores()
+            self._subset_cache.clear()
+            if self._client is not None:
+                self._initialize_chromadb()
+        return True
+    
+    def close(self):
+        """Stop the ChromaDB system, releasing its vector segments; the indexer must not be used afterwards."""
+        with self._load_lock:
+            if self._system is not None:
+                self._system.stop()
+            self._system = None
+            self._client = None
+            self._collection = None
+    
+    def delete_by_source(self, source: str) -> int:
+        """Delete all chunks loaded from a source file; returns the number deleted."""
+        if not self.collection:
+            logger.error("Collection not initialized")
+            return 0
+        
+        try:
+            facets = self._facets_for_write()
+            stored = self.collection.get(where={"source": source}, include=["metadatas"])
+            ids = stored['ids']
+            if not ids:
+                return 0
+            
+            self.collection.delete(where={"source": source})
+            facets.update(removed=stored['metadatas'])
+            if self.lexical_index is not None:
+                self.lexical_index.remove(ids)
+                self.lexical_index.save()
+            self._commit_write()
+            
+            logger.info(f"Deleted {len(ids)} chunks from {source}")
+            return len(ids)
+        except Exception as e:
+            logger.error(f"Error deleting chunks from {source}: {e}")
+            return 0
+    
+    def _sqlite_path(self) -> Path:
+        return self.persist_directory / "chroma.sqlite3"
+    
+    def _stored_collection(self) -> Optional[Dict[str, Any]]:
+        """Read the collection id, chunk count and HNSW config straight from SQLite.
+        
+        Lets stats be reported without importing ChromaDB or loading the
+        index; returns None if the store or collection does not exist yet.
+        """
+        if not self._sqlite_path().exists():
+            return None
+        try:
+            with sqlite3.connect(f"file:{self._sqlite_path()}?mode=ro", uri=True) as conn:
+                row = conn.execute(
+                    "SELECT id, config_json_str FROM collections WHERE name = ?",
+                    (self.collection_name,)
+                ).fetchone()
+                if row is None:
+                    return None
+                count = conn.execute(
+                    "SELECT COUNT(*) FROM embeddings e JOIN segments s ON e.segment_id = s.id "
+                    "WHERE s.collection = ? AND s.scope = 'METADATA'",
+                    (row[0],)
+                ).fetchone()[0]
+        except sqlite3.Error as e:
+            logger.debug(f"Could not read collection from SQLite: {e}")
+            return None
+        
+        configuration = json.loads(row[1]) if row[1] else {}
+        hnsw = (configuration.get("vector_index") or {}).get("hnsw") or configuration.get("hnsw") or {}
+        return {"id": row[0], "count": count, "hnsw": hnsw}
+    
+    def stored_identity(self) -> Optional[str]:
+        """Directory and ID of the collection now stored at the configured path, or None.
+        
+        Read straight from SQLite, so it changes as soon as the collection
+        is replaced (cleared, compacted or rebuilt in a new directory), even
+        by another process.
+        """
+        directory = self.configured_directory.resolve()
+        sqlite_path = directory / "chroma.sqlite3"
+        if not sqlite_path.exists():
+            return None
+        try:
+            with sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True) as conn:
+                row = conn.execute(
+                    "SELECT id FROM collections WHERE name = ?",
+                    (self.collection_name,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.debug(f"Could not read collection from SQLite: {e}")
+            return None
+        return f"{directory}#{row[0]}" if row else None
+    
+    def _vector_segment_dirs(self, collection_id: Optional[str] = None) -> List[Path]:
+        """HNSW segment directories belonging to this collection."""
+        with sqlite3.connect(self._sqlite_path()) as conn:
+            rows = conn.execute(
+                "SELECT id FROM segments WHERE collection = ? AND scope = 'VECTOR'",
+                (collection_id or str(self.collection.id),)
+            ).fetchall()
+        return [self.persist_directory / row[0] for row in rows]
+    
+    def _storage_stats(self, live: Optional[int] = None, collection_id: Optional[str] = None) -> Dict[str, Any]:
+        """Live/dead vector counts and reclaimable space in the store."""
+        if live is None:
+            live = self.collection.count()
+        
+        # Deleted vectors stay in the HNSW graph as tombstones until rebuilt
+        graph_elements = None
+        for segment_dir in self._vector_segment_dirs(collection_id):
+            metadata_file = segment_dir / "index_metadata.pickle"
+            if metadata_file.exists():
+                with open(metadata_file, 'rb') as f:
+                    metadata = pickle.load(f)
+                graph_elements = (graph_elements or 0) + metadata.get("total_elements_added", 0)
+        # Vectors still in the write-ahead log are counted live but not yet in the graph
+        dead = max(graph_elements - live, 0) if graph_elements is not None else 0
+        
+        with sqlite3.connect(self._sqlite_path()) as conn:
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        
+        return {
+            "live_chunks": live,
+            "dead_vectors": dead,
+            "live_ratio": round(live / (live + dead), 3) if live + dead else 1.0,
+            "reclaimable_mb": round(free_pages * page_size / (1024 * 1024), 2),
+            "storage_mb": round(_directory_size(self.persist_directory) / (1024 * 1024), 2)
+        }
+    
+    def compact(self) -> Dict[str, Any]:
+        """Rebuild the HNSW graph without tombstones and vacuum the SQLite store.
+        
+        The collection is copied into a fresh collection (which also applies
+        the current HNSW configuration), swapped in by name, and the old
+        segment files are removed. Searches should not run during compaction.
+        """
+        before = self._storage_stats()
+        size_before = _directory_size(self.persist_directory)
+        temp_name = f"{self.collection_name}{COMPACT_SUFFIX}"
+        
+        try:
+            self.client.delete_collection(name=temp_name)
+        except Exception:
+            pass
+        target = self.client.create_collection(name=temp_name, metadata=self._collection_metadata())
+        if self.lexical_index is not None:
+            self.lexical_index.clear()
+        
+        batch_size = self.client.get_max_batch_size()
+        copied = 0
+        while True:
+            page = self.collection.get(
+                limit=batch_size,
+                offset=copied,
+                include=["embeddings", "documents", "metadatas"]
+            )
+            if not page['ids']:
+                break
+            target.add(
+                ids=page['ids'],
+                embeddings=page['embeddings'],
+                documents=page['documents'],
+                metadatas=page['metadatas']
+            )
+            if self.lexical_index is not None:
+                self.lexical_index.add(page['ids'], page['documents'])
+            copied += len(page['ids'])
+            logger.info(f"Compaction copied {copied} chunks")
+        
+        self.client.delete_collection(name=self.collection_name)
+        target.modify(name=self.collection_name)
+        self._collection = self.client.get_collection(name=self.collection_name)
+        if self.lexical_index is not None:
+            self.lexical_index.save()
+        
+        removed_segments = self._remove_orphaned_segments()
+        self._vacuum()
+        # Compaction keeps every chunk, so the counts carry over unchanged
+        self._facets_for_write()
+        self._commit_write()
+        
+        size_after = _directory_size(self.persist_directory)
+        results = {
+            "live_chunks": copied,
+            "dead_vectors_removed": before["dead_vectors"],
+            "orphaned_segments_removed": removed_segments,
+            "size_before_mb": round(size_before / (1024 * 1024), 2),
+            "size_after_mb": round(size_after / (1024 * 1024), 2),
+            "reclaimed_mb": round((size_before - size_after) / (1024 * 1024), 2)
+        }
+        logger.info(f"Compaction complete: reclaimed {results['reclaimed_mb']} MB")
+        return results
+    
+    def rebuild_lexical_index(self) -> int:
+        """Rebuild the BM25 index from the texts stored in the collection."""
+        if self.lexical_index is None:
+            raise ValueError("Lexical index is disabled in the configuration")
+        
+        self.lexical_index.clear()
+        batch_size = self.client.get_max_batch_size()
+        indexed = 0
+        while True:
+            page = self.collection.get(limit=batch_size, offset=indexed, include=["documents"])
+            if not page['ids']:
+                break
+            self.lexical_index.add(page['ids'], page['documents'])
+            indexed += len(page['ids'])
+            logger.info(f"Lexical index rebuilt for {indexed} chunks")
+        self.lexical_index.save()
+        self._facets_for_write()
+        self._commit_write()
+        return indexed
+    
+    def _remove_orphaned_segments(self) -> int:
+        """Delete segment directories no longer referenced by any collection."""
+        with sqlite3.connect(self._sqlite_path()) as conn:
+            known = {row[0] for row in conn.execute("SELECT id FROM segments").fetchall()}
+        
+        removed = 0
+        for path in self.persist_directory.iterdir():
+            # Segment directories are named by UUID and hold header.bin
+            if path.is_dir() and (path / "header.bin").exists() and path.name not in known:
+                shutil.rmtree(path)
+                removed += 1
+        return removed
+    
+    def _vacuum(self):
+        """Rewrite the SQLite database to release free pages."""
+        try:
+            with sqlite3.connect(self._sqlite_path()) as conn:
+                conn.execute("VACUUM")
+        except Exception as e:
+            logger.warning(f"Could not vacuum {self._sqlite_path()}: {e}")
     
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the collection."""
         try:
-            count = self.collection.count() if self.collection else 0
+            # Read from SQLite unless the collection is already open
+            stored = self._stored_collection() if self._client is None else None
+            if stored is not None:
+                count, hnsw = stored["count"], stored["hnsw"]
+            else:
+                count = self.collection.count() if self.collection else 0
+                hnsw = self._hnsw_configuration() if self.collection else {}
             
-            return {
+            stats = {
                 "collection_name": self.collection_name,
                 "document_count": count,
                 "persist_directory": str(self.persist_directory),
-                "embedding_model": self.embeddings.model_name
+                "embedding_model": self.embedding_model,
+                "hnsw_m": hnsw.get("max_neighbors", self.hnsw_m),
+                "hnsw_construction_ef": hnsw.get("ef_construction", self.hnsw_construction_ef),
+                "hnsw_search_ef": hnsw.get("ef_search", self.hnsw_search_ef)
             }
+            if stored is not None:
+                stats.update(self._storage_stats(count, stored["id"]))
+            elif self.collection:
+                stats.update(self._storage_stats())
+            if self.lexical_index is not None:
+                stats.update(self.lexical_index.stats())
+            return stats
         except Exception as e:
             logger.error(f"Error getting collection stats: {e}")
             return {}
@@ -205,10 +1148,16 @@ class ChromaDBIndexer:
             if self.collection:
                 # Delete the collection and recreate it
                 self.client.delete_collection(name=self.collection_name)
-                self.collection = self.client.create_collection(
+                self._collection = self.client.create_collection(
                     name=self.collection_name,
-                    metadata={"hnsw:space": "cosine"}
+                    metadata=self._collection_metadata()
                 )
+                if self.lexical_index is not None:
+                    self.lexical_index.clear()
+                self.facet_counts.clear()
+                if self.related_documents is not None:
+                    self.related_documents.clear()
+                self._commit_write()
                 logger.info(f"Cleared collection '{self.collection_name}'")
         except Exception as e:
             logger.error(f"Error clearing collection: {e}")
@@ -218,6 +1167,8 @@ class ChromaDBIndexer:
         try:
             # Generate embedding for the new content
             embedding = self.embeddings.embed_documents([document.page_content])[0]
+            facets = self._facets_for_write()
+            previous = self.collection.get(ids=[document_id], include=["metadatas"])
             
             # Update in collection
             self.collection.update(
@@ -226,6 +1177,12 @@ class ChromaDBIndexer:
                 metadatas=[document.metadata],
                 embeddings=[embedding]
             )
+            if previous['ids']:
+                facets.update(added=[document.metadata], removed=previous['metadatas'])
+            if self.lexical_index is not None:
+                self.lexical_index.add([document_id], [document.page_content])
+                self.lexical_index.save()
+            self._commit_write()
             logger.info(f"Updated document {document_id}")
         except Exception as e:
             logger.error(f"Error updating document {document_id}: {e}")
\ No newline at end of file
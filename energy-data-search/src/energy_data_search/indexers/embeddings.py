@@ -0,0 +1,21 @@
+"""Embedding model loading."""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def load_embeddings(model_name: str):
+    """Load a normalized CPU sentence-transformer embedding model.
+    
+    The import is deferred because langchain_huggingface pulls in torch and
+    transformers, which dominate startup time for commands that never embed.
+    """
+    from langchain_huggingface import HuggingFaceEmbeddings
+    
+    logger.info(f"Loading embedding model {model_name}")
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
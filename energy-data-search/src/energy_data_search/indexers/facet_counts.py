@@ -0,0 +1,104 @@
+"""Chunk counts per metadata value, used to estimate filter selectivity."""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FACET_FIELDS = ("directory", "file_type", "document_type")
+
+
+class FacetCounts:
+    """Number of chunks per value of each filterable metadata field.
+
+    Counts are updated by every index write and saved together with the
+    index generation they describe, before the index moves to it. Counts
+    older than the index's generation are stale: readers then do without
+    them, and only writers recount.
+    """
+
+    def __init__(self, path: Path, fields: Tuple[str, ...] = FACET_FIELDS):
+        """Initialize counts stored in ``path``; nothing is read until first use."""
+        self.path = Path(path)
+        self.fields = fields
+        self.counts: Dict[str, Dict[str, int]] = {field: {} for field in fields}
+        self.total = 0
+        # Generation the counts describe; None until loaded or rebuilt
+        self.generation: Optional[int] = None
+
+    def load(self):
+        """Read the saved counts, if any."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read facet counts from {self.path}: {e}")
+            return
+        self.counts = {field: data["counts"].get(field, {}) for field in self.fields}
+        self.total = data["total"]
+        self.generation = data["generation"]
+
+    def save(self, generation: int):
+        """Write the counts, marking them current for ``generation``."""
+        self.generation = generation
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"generation": generation, "total": self.total, "counts": self.counts}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Could not write facet counts to {self.path}: {e}")
+
+    def clear(self):
+        """Forget all counts."""
+        self.counts = {field: {} for field in self.fields}
+        self.total = 0
+
+    def update(self, added: Iterable[Dict[str, Any]] = (), removed: Iterable[Dict[str, Any]] = ()):
+        """Count the metadata of added chunks and uncount that of removed ones."""
+        for metadatas, delta in ((added, 1), (removed, -1)):
+            for metadata in metadatas:
+                metadata = metadata or {}
+                self.total += delta
+                for field in self.fields:
+                    if field not in metadata:
+                        continue
+                    values = self.counts[field]
+                    value = str(metadata[field])
+                    values[value] = values.get(value, 0) + delta
+                    if values[value] <= 0:
+                        del values[value]
+
+    def count(self, field: str, value: Any) -> int:
+        """Chunks whose ``field`` equals ``value``."""
+        return self.counts.get(field, {}).get(str(value), 0)
+
+    def estimate(self, where: Dict[str, Any]) -> Optional[int]:
+        """Upper bound on the chunks matching a ChromaDB where clause.
+
+        Equality and ``$in`` conditions on counted fields give a bound, and
+        ``$and`` keeps the smallest. Returns None if no condition could be
+        bounded.
+        """
+        bounds = []
+        for key, condition in where.items():
+            if key == "$and":
+                bounds.extend(b for b in (self.estimate(c) for c in condition) if b is not None)
+            elif key == "$or":
+                parts = [self.estimate(c) for c in condition]
+                if parts and None not in parts:
+                    bounds.append(sum(parts))
+            elif key in self.counts:
+                if not isinstance(condition, dict):
+                    bounds.append(self.count(key, condition))
+                elif "$eq" in condition:
+                    bounds.append(self.count(key, condition["$eq"]))
+                elif "$in" in condition:
+                    bounds.append(sum(self.count(key, value) for value in condition["$in"]))
+        return min(bounds) if bounds else None
@@ -0,0 +1,436 @@
+"""BM25 inverted index stored as immutable on-disk segments.
+
+Each ``add`` call writes a new segment holding its vocabulary and postings
+lists. Postings are (document, term frequency) pairs encoded as varints, with
+document numbers delta-encoded. Deletions are recorded as tombstones in the
+manifest. Segments are merged once there are too many of them or too many
+tombstones, which keeps incremental updates cheap without rewriting the
+whole index on every file.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Set, Tuple, Iterable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; dotted section numbers and hyphenated IDs stay whole."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def encode_varints(values: np.ndarray) -> np.ndarray:
+    """Encode non-negative integers as LEB128 varints."""
+    values = np.asarray(values, dtype=np.uint64)
+    if len(values) == 0:
+        return np.empty(0, dtype=np.uint8)
+
+    lengths = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        lengths += rest > 0
+        rest >>= np.uint64(7)
+
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    offsets = np.cumsum(lengths) - lengths
+    for i in range(int(lengths.max())):
+        mask = lengths > i
+        byte = (values[mask] >> np.uint64(7 * i)) & np.uint64(0x7F)
+        more = (lengths[mask] > i + 1).astype(np.uint64) << np.uint64(7)
+        out[offsets[mask] + i] = (byte | more).astype(np.uint8)
+    return out
+
+
+def decode_varints(data: np.ndarray) -> np.ndarray:
+    """Decode a buffer of LEB128 varints."""
+    data = np.asarray(data, dtype=np.uint8)
+    if len(data) == 0:
+        return np.empty(0, dtype=np.int64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shifts = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    parts = (data & 0x7F).astype(np.int64) << (7 * shifts)
+    return np.add.reduceat(parts, starts)
+
+
+def _join(strings: Iterable[str]) -> np.ndarray:
+    return np.frombuffer("\n".join(strings).encode("utf-8"), dtype=np.uint8)
+
+
+def _split(blob: np.ndarray) -> List[str]:
+    text = blob.tobytes().decode("utf-8")
+    return text.split("\n") if text else []
+
+
+class Segment:
+    """One immutable batch of documents with its own vocabulary and postings."""
+
+    def __init__(
+        self,
+        ids: List[str],
+        doc_lengths: np.ndarray,
+        terms: List[str],
+        term_offsets: np.ndarray,
+        postings: np.ndarray
+    ):
+        """Wrap decoded segment arrays."""
+        self.ids = ids
+        self.doc_lengths = doc_lengths
+        self.terms = terms
+        self.term_offsets = term_offsets
+        self.postings = postings
+        self.term_index = {term: i for i, term in enumerate(terms)}
+
+    @classmethod
+    def build(cls, ids: List[str], token_lists: List[List[str]]) -> "Segment":
+        """Invert tokenized documents into a segment."""
+        inverted: Dict[str, Dict[int, int]] = {}
+        for doc, tokens in enumerate(token_lists):
+            for token in tokens:
+                counts = inverted.setdefault(token, {})
+                counts[doc] = counts.get(doc, 0) + 1
+
+        terms = sorted(inverted)
+        chunks = []
+        offsets = [0]
+        for term in terms:
+            docs = np.fromiter(inverted[term].keys(), dtype=np.int64)
+            tfs = np.fromiter(inverted[term].values(), dtype=np.int64)
+            deltas = np.diff(docs, prepend=0)
+            pairs = np.empty(2 * len(docs), dtype=np.int64)
+            pairs[0::2], pairs[1::2] = deltas, tfs
+            encoded = encode_varints(pairs)
+            chunks.append(encoded)
+            offsets.append(offsets[-1] + len(encoded))
+
+        postings = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.uint8)
+        lengths = np.array([len(tokens) for tokens in token_lists], dtype=np.uint32)
+        return cls(ids, lengths, terms, np.array(offsets, dtype=np.int64), postings)
+
+    @classmethod
+    def load(cls, path: Path) -> "Segment":
+        """Read a segment file."""
+        with np.load(path) as data:
+            return cls(
+                _split(data["ids"]),
+                data["doc_lengths"],
+                _split(data["terms"]),
+                data["term_offsets"],
+                data["postings"]
+            )
+
+    def save(self, path: Path):
+        """Write the segment to a single file."""
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                ids=_join(self.ids),
+                doc_lengths=self.doc_lengths,
+                terms=_join(self.terms),
+                term_offsets=self.term_offsets,
+                postings=self.postings
+            )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def term_postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Document numbers and term frequencies for a term."""
+        i = self.term_index.get(term)
+        if i is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        pairs = decode_varints(self.postings[self.term_offsets[i]:self.term_offsets[i + 1]])
+        return np.cumsum(pairs[0::2]), pairs[1::2]
+
+    def tokens(self) -> List[List[str]]:
+        """Reconstruct bag-of-words token lists, used when merging segments."""
+        token_lists: List[List[str]] = [[] for _ in self.ids]
+        for term in self.terms:
+            docs, tfs = self.term_postings(term)
+            for doc, tf in zip(docs, tfs):
+                token_lists[doc].extend([term] * int(tf))
+        return token_lists
+
+
+def _locations(segments: List[Segment], deleted: List[Set[int]]) -> Dict[str, Tuple[int, int]]:
+    """(segment, document) of every live chunk ID."""
+    locations = {}
+    for s, segment in enumerate(segments):
+        for doc, doc_id in enumerate(segment.ids):
+            if doc not in deleted[s]:
+                locations[doc_id] = (s, doc)
+    return locations
+
+
+class LexicalIndex:
+    """Persistent BM25 index over chunk texts, keyed by chunk ID."""
+
+    def __init__(
+        self,
+        directory: Path,
+        k1: float = 1.2,
+        b: float = 0.75,
+        max_segments: int = 8,
+        max_deleted_ratio: float = 0.25
+    ):
+        """Initialize the index; segments are read on first use."""
+        self.directory = Path(directory)
+        self.k1 = k1
+        self.b = b
+        self.max_segments = max_segments
+        self.max_deleted_ratio = max_deleted_ratio
+        self._loaded = False
+        # Modification time of the manifest last read or written; None if there was none
+        self._manifest_mtime: Optional[int] = None
+        # Held while a new set of segments, tombstones and locations is swapped
+        # in; writers build the new set outside it and never change one in place
+        self._lock = threading.Lock()
+        self.segment_names: List[str] = []
+        self.segments: List[Segment] = []
+        self.deleted: List[set] = []
+        self.next_segment = 0
+        self.locations: Dict[str, Tuple[int, int]] = {}
+
+    def _manifest_path(self) -> Path:
+        return self.directory / MANIFEST_FILE
+
+    def _file_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self._manifest_path()).st_mtime_ns
+        except OSError:
+            return None
+
+    def _ensure_loaded(self):
+        """Read the manifest and segments from disk on first use, and again when another process saves."""
+        mtime = self._file_mtime()
+        if self._loaded and mtime == self._manifest_mtime:
+            return
+        with self._lock:
+            if self._loaded and mtime == self._manifest_mtime:
+                return
+            self._loaded = True
+            self._manifest_mtime = mtime
+            if mtime is None:
+                return
+            try:
+                with open(self._manifest_path()) as f:
+                    manifest = json.load(f)
+                names = list(manifest["segments"])
+                segments = [Segment.load(self.directory / name) for name in names]
+                deleted = [set(manifest["tombstones"].get(name, [])) for name in names]
+            except Exception as e:
+                # Keep serving what was loaded before
+                logger.error(f"Error loading lexical index from {self.directory}: {e}")
+                return
+            self.next_segment = manifest["next_segment"]
+            self.segment_names, self.segments, self.deleted = names, segments, deleted
+            self.locations = _locations(segments, deleted)
+            logger.info(f"Loaded lexical index with {len(self.locations)} documents")
+
+    def _swap(
+        self,
+        names: List[str],
+        segments: List[Segment],
+        deleted: List[Set[int]],
+        locations: Dict[str, Tuple[int, int]]
+    ):
+        """Publish a new segment set; a search running meanwhile keeps the one it started with."""
+        with self._lock:
+            self.segment_names, self.segments, self.deleted, self.locations = names, segments, deleted, locations
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self.locations)
+
+    def add(self, ids: List[str], texts: List[str]):
+        """Index chunk texts as a new segment, replacing any earlier copies of the IDs."""
+        self._ensure_loaded()
+        if not ids:
+            return
+        # Keep the last text for IDs repeated within the batch
+        latest = dict(zip(ids, texts))
+        deleted, locations = self._tombstoned(latest.keys())
+
+        segment = Segment.build(list(latest), [tokenize(text) for text in latest.values()])
+        name = f"segment_{self.next_segment:06d}.npz"
+        self.next_segment += 1
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segment.save(self.directory / name)
+
+        s = len(self.segments)
+        for doc, doc_id in enumerate(segment.ids):
+            locations[doc_id] = (s, doc)
+        self._swap(self.segment_names + [name], self.segments + [segment], deleted + [set()], locations)
+
+    def remove(self, ids: Iterable[str]):
+        """Tombstone chunk IDs."""
+        self._ensure_loaded()
+        deleted, locations = self._tombstoned(ids)
+        self._swap(self.segment_names, self.segments, deleted, locations)
+
+    def _tombstoned(self, ids: Iterable[str]) -> Tuple[List[Set[int]], Dict[str, Tuple[int, int]]]:
+        """Copies of the tombstones and locations with ``ids`` deleted."""
+        deleted = list(self.deleted)
+        locations = dict(self.locations)
+        copied = set()
+        for doc_id in ids:
+            location = locations.pop(doc_id, None)
+            if location is None:
+                continue
+            s, doc = location
+            if s not in copied:
+                deleted[s] = set(deleted[s])
+                copied.add(s)
+            deleted[s].add(doc)
+        return deleted, locations
+
+    def save(self):
+        """Merge segments if needed and write the manifest."""
+        self._ensure_loaded()
+        total = sum(len(segment) for segment in self.segments)
+        dead = total - len(self.locations)
+        if total and dead / total > self.max_deleted_ratio:
+            self._merge(range(len(self.segments)))
+        elif len(self.segments) > self.max_segments:
+            # Tiered merging: fold the smallest half together so each document
+            # is rewritten only a logarithmic number of times
+            by_size = sorted(range(len(self.segments)), key=lambda s: len(self.segments[s]))
+            self._merge(by_size[:len(self.segments) // 2 + 1])
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "next_segment": self.next_segment,
+            "documents": len(self.locations),
+            "terms": sum(len(segment.terms) for segment in self.segments),
+            "segments": self.segment_names,
+            "tombstones": {
+                name: sorted(int(doc) for doc in deleted)
+                for name, deleted in zip(self.segment_names, self.deleted) if deleted
+            }
+        }
+        tmp_path = self._manifest_path().with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._manifest_path())
+        self._manifest_mtime = self._file_mtime()
+        self._remove_unreferenced()
+
+    def _merge(self, indices: Iterable[int]):
+        """Rewrite the live documents of some segments into one new segment."""
+        indices = sorted(set(indices))
+        ids, token_lists = [], []
+        for s in indices:
+            tokens = self.segments[s].tokens()
+            for doc, doc_id in enumerate(self.segments[s].ids):
+                if doc not in self.deleted[s]:
+                    ids.append(doc_id)
+                    token_lists.append(tokens[doc])
+
+        merged = Segment.build(ids, token_lists)
+        name = f"segment_{self.next_segment:06d}.npz"
+        self.next_segment += 1
+        merged.save(self.directory / name)
+
+        keep = [s for s in range(len(self.segments)) if s not in indices]
+        segments = [self.segments[s] for s in keep] + [merged]
+        deleted = [self.deleted[s] for s in keep] + [set()]
+        self._swap([self.segment_names[s] for s in keep] + [name], segments, deleted, _locations(segments, deleted))
+        logger.info(f"Merged {len(indices)} lexical segments into one of {len(merged)} documents")
+
+    def _remove_unreferenced(self):
+        """Delete segment files no longer listed in the manifest."""
+        keep = set(self.segment_names)
+        for path in self.directory.glob("segment_*.npz"):
+            if path.name not in keep:
+                path.unlink()
+
+    def clear(self):
+        """Remove all documents and segment files."""
+        self._ensure_loaded()
+        self._swap([], [], [], {})
+        self.save()
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k chunk IDs by BM25 score."""
+        self._ensure_loaded()
+        with self._lock:
+            segments, deleted_docs, locations = self.segments, self.deleted, self.locations
+        terms = list(dict.fromkeys(tokenize(query)))
+        n_docs = len(locations)
+        if not terms or not n_docs:
+            return []
+
+        live_lengths = sum(
+            float(segment.doc_lengths.sum()) - sum(float(segment.doc_lengths[d]) for d in deleted)
+            for segment, deleted in zip(segments, deleted_docs)
+        )
+        avgdl = live_lengths / n_docs or 1.0
+
+        postings = [[segment.term_postings(term) for segment in segments] for term in terms]
+        # Postings still list tombstoned documents; only live ones count towards df
+        dfs = [
+            sum(
+                len(docs) - (int(np.isin(docs, list(deleted)).sum()) if deleted else 0)
+                for (docs, _), deleted in zip(term_postings, deleted_docs)
+            )
+            for term_postings in postings
+        ]
+        candidates: List[Tuple[float, int, int]] = []
+        for s, segment in enumerate(segments):
+            scores = np.zeros(len(segment), dtype=np.float32)
+            norm = self.k1 * (1 - self.b + self.b * segment.doc_lengths / avgdl)
+            for term_postings, df in zip(postings, dfs):
+                docs, tfs = term_postings[s]
+                if not len(docs):
+                    continue
+                idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm[docs])
+            if deleted_docs[s]:
+                scores[list(deleted_docs[s])] = 0
+            hits = np.flatnonzero(scores > 0)
+            if len(hits) > k:
+                hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+            candidates.extend((float(scores[doc]), s, int(doc)) for doc in hits)
+
+        candidates.sort(reverse=True)
+        return [(segments[s].ids[doc], score) for score, s, doc in candidates[:k]]
+
+    def stats(self) -> Dict[str, int]:
+        """Document, segment and vocabulary counts plus size on disk."""
+        # Read counts from the manifest so stats do not load the segments
+        manifest = {}
+        if self._manifest_path().exists():
+            with open(self._manifest_path()) as f:
+                manifest = json.load(f)
+        size = sum(p.stat().st_size for p in self.directory.glob("*")) if self.directory.exists() else 0
+        return {
+            "lexical_documents": manifest.get("documents", 0),
+            "lexical_segments": len(manifest.get("segments", [])),
+            "lexical_terms": manifest.get("terms", 0),
+            "lexical_index_mb": round(size / (1024 * 1024), 2)
+        }
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists: score(d) = sum over lists of 1 / (k + rank)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,235 @@
+"""Precomputed nearest-neighbour graph between indexed source files."""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows compared against all centroids at once while searching neighbours
+BLOCK_SIZE = 1024
+
+
+def mean_embeddings(pages: Iterable[Tuple[List[np.ndarray], List[Dict]]]) -> Dict[str, np.ndarray]:
+    """Normalized mean chunk embedding per source, from pages of (embeddings, metadatas)."""
+    sums: Dict[str, np.ndarray] = {}
+    for embeddings, metadatas in pages:
+        for vector, metadata in zip(embeddings, metadatas):
+            source = (metadata or {}).get("source")
+            if source is None:
+                continue
+            vector = np.asarray(vector, dtype=np.float32)
+            if source in sums:
+                sums[source] += vector
+            else:
+                sums[source] = vector.copy()
+    for total in sums.values():
+        norm = np.linalg.norm(total)
+        if norm > 0:
+            total /= norm
+    return sums
+
+
+class RelatedDocuments:
+    """The ``k`` most similar source files of every indexed file.
+
+    A file is represented by the normalized mean (centroid) of its chunk
+    embeddings, and files are related by the cosine similarity of their
+    centroids. The graph is built offline and saved as one ``.npz`` file of
+    source paths, float16 centroids, and int32 neighbour rows with float16
+    similarities, padded with -1 when there are fewer than ``k`` other files.
+    ``update`` refreshes it for changed files without recomputing the rest,
+    and gives the same graph a full build would. Readers reload the file
+    when it changes on disk, so a lookup is one dict access.
+    """
+
+    def __init__(self, path: Path, k: int = 10):
+        """Initialize a graph stored in ``path``; nothing is read until first use."""
+        self.path = Path(path)
+        self.k = k
+        self.sources: List[str] = []
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.neighbors = np.zeros((0, k), dtype=np.int32)
+        self.scores = np.zeros((0, k), dtype=np.float32)
+        self._rows: Dict[str, int] = {}
+        # Modification time of the file last read or written; None if never
+        self._mtime: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def _file_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self):
+        """Read the saved graph, if any."""
+        mtime = self._file_mtime()
+        if mtime is None:
+            return
+        try:
+            with np.load(self.path) as data:
+                sources = data["sources"].tolist()
+                centroids = data["centroids"].astype(np.float32)
+                neighbors = data["neighbors"]
+                scores = data["scores"].astype(np.float32)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not read related documents from {self.path}: {e}")
+            return
+        if neighbors.shape[1] != self.k:
+            logger.info(f"Related documents in {self.path} were built with k={neighbors.shape[1]}, not {self.k}")
+        self.sources = sources
+        self.centroids = centroids
+        self.neighbors = neighbors
+        self.scores = scores
+        self._rows = {source: row for row, source in enumerate(sources)}
+        self._mtime = mtime
+
+    def save(self):
+        """Write the graph atomically."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    sources=np.array(self.sources, dtype=str),
+                    centroids=self.centroids.astype(np.float16),
+                    neighbors=self.neighbors.astype(np.int32),
+                    scores=self.scores.astype(np.float16)
+                )
+            os.replace(tmp_path, self.path)
+            self._mtime = self._file_mtime()
+        except OSError as e:
+            logger.error(f"Could not write related documents to {self.path}: {e}")
+
+    def clear(self):
+        """Forget all sources and delete the saved graph."""
+        self.build({})
+        self.path.unlink(missing_ok=True)
+        self._mtime = None
+
+    def related(self, source: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Most similar sources to ``source`` with their similarity, best first; [] if unknown."""
+        with self._lock:
+            if self._file_mtime() != self._mtime:
+                self.load()
+            row = self._rows.get(source)
+            if row is None:
+                return []
+            related = [
+                (self.sources[neighbor], float(score))
+                for neighbor, score in zip(self.neighbors[row], self.scores[row])
+                if neighbor >= 0
+            ]
+        return related[:limit] if limit else related
+
+    def build(self, centroids: Dict[str, np.ndarray]):
+        """Replace the graph with one over ``centroids`` (source -> normalized mean embedding)."""
+        self.sources = sorted(centroids)
+        self.centroids = (
+            np.stack([centroids[source] for source in self.sources]).astype(np.float32)
+            if self.sources else np.zeros((0, 0), dtype=np.float32)
+        )
+        self._rows = {source: row for row, source in enumerate(self.sources)}
+        self.neighbors, self.scores = self._top_k(np.arange(len(self.sources)))
+
+    def update(self, changed: Dict[str, np.ndarray], removed: Iterable[str] = ()):
+        """Add or replace the centroids of ``changed`` sources and drop ``removed`` ones.
+
+        Only rows that may have lost a neighbour are searched again: the
+        changed rows themselves and rows listing a changed or removed source.
+        Every other row keeps its list, merged with the changed sources that
+        now rank in it.
+        """
+        removed = {source for source in removed if source in self._rows and source not in changed}
+        if not self.sources:
+            self.build(changed)
+            return
+        if not changed and not removed:
+            return
+
+        # Drop removed rows and renumber neighbour references
+        keep = np.ones(len(self.sources), dtype=bool)
+        keep[[self._rows[source] for source in removed]] = False
+        renumber = np.full(len(self.sources), -1, dtype=np.int32)
+        renumber[keep] = np.arange(int(keep.sum()), dtype=np.int32)
+        listed = self.neighbors[keep] >= 0
+        neighbors = np.where(listed, renumber[np.where(listed, self.neighbors[keep], 0)], -1).astype(np.int32)
+        scores = self.scores[keep]
+        stale = (listed & (neighbors < 0)).any(axis=1)
+        self.sources = [source for source, kept in zip(self.sources, keep) if kept]
+        centroids = self.centroids[keep]
+        self._rows = {source: row for row, source in enumerate(self.sources)}
+
+        # Replace changed centroids in place and append new sources
+        added = [source for source in changed if source not in self._rows]
+        for source in changed:
+            if source in self._rows:
+                centroids[self._rows[source]] = changed[source]
+        if added:
+            centroids = np.vstack([centroids, np.stack([changed[source] for source in added])])
+            neighbors = np.vstack([neighbors, np.full((len(added), neighbors.shape[1]), -1, dtype=np.int32)])
+            scores = np.vstack([scores, np.zeros((len(added), scores.shape[1]), dtype=np.float32)])
+            stale = np.concatenate([stale, np.zeros(len(added), dtype=bool)])
+            for source in added:
+                self._rows[source] = len(self.sources)
+                self.sources.append(source)
+        self.centroids = centroids.astype(np.float32)
+
+        is_changed = np.zeros(len(self.sources), dtype=bool)
+        is_changed[[self._rows[source] for source in changed]] = True
+        changed_rows = np.flatnonzero(is_changed)
+        # A changed neighbour may have moved away, letting another source in
+        lists_changed = ((neighbors >= 0) & is_changed[np.maximum(neighbors, 0)]).any(axis=1)
+        search_again = is_changed | stale | lists_changed
+
+        if neighbors.shape[1] != self.k:
+            # Built with another k: search every row
+            search_again[:] = True
+            neighbors = np.full((len(self.sources), self.k), -1, dtype=np.int32)
+            scores = np.zeros((len(self.sources), self.k), dtype=np.float32)
+
+        others = np.flatnonzero(~search_again)
+        for start in range(0, len(others), BLOCK_SIZE):
+            block = others[start:start + BLOCK_SIZE]
+            candidates = np.hstack([neighbors[block], np.broadcast_to(changed_rows, (len(block), len(changed_rows)))])
+            candidate_scores = np.hstack([
+                np.where(neighbors[block] >= 0, scores[block], -np.inf),
+                self.centroids[block] @ self.centroids[changed_rows].T
+            ])
+            order = np.argsort(-candidate_scores, axis=1, kind="stable")[:, :self.k]
+            best = np.take_along_axis(candidates, order, axis=1)
+            best_scores = np.take_along_axis(candidate_scores, order, axis=1)
+            empty = np.isneginf(best_scores)
+            neighbors[block] = np.where(empty, -1, best)
+            scores[block] = np.where(empty, 0, best_scores)
+
+        rows = np.flatnonzero(search_again)
+        neighbors[rows], scores[rows] = self._top_k(rows)
+        self.neighbors, self.scores = neighbors, scores
+
+    def _top_k(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest other sources of ``rows`` by exact search over all centroids."""
+        neighbors = np.full((len(rows), self.k), -1, dtype=np.int32)
+        scores = np.zeros((len(rows), self.k), dtype=np.float32)
+        take = min(self.k, len(self.sources) - 1)
+        if take <= 0:
+            return neighbors, scores
+        for start in range(0, len(rows), BLOCK_SIZE):
+            block = rows[start:start + BLOCK_SIZE]
+            similarities = self.centroids[block] @ self.centroids.T
+            similarities[np.arange(len(block)), block] = -np.inf
+            top = np.argpartition(-similarities, take - 1, axis=1)[:, :take]
+            top_scores = np.take_along_axis(similarities, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            neighbors[start:start + len(block), :take] = np.take_along_axis(top, order, axis=1)
+            scores[start:start + len(block), :take] = np.take_along_axis(top_scores, order, axis=1)
+        return neighbors, scores
@@ -0,0 +1,570 @@
+"""Portable index snapshots for distributing the vector store to API nodes.
+
+A snapshot is a directory bundle:
+
+- ``manifest.json``: format version, embedding model, counts and file checksums
+- ``vectors.npy``: float32 embeddings, memory-mappable with ``np.load(mmap_mode='r')``
+- ``ids.bin`` / ``ids.offsets.npy`` and ``text.bin`` / ``text.offsets.npy``:
+  UTF-8 string columns addressed by int64 offsets
+- ``meta.<n>.values.json`` / ``meta.<n>.codes.npy``: one dictionary-encoded
+  column per metadata key (code -1 means the key is absent)
+- ``related_documents.npz``: the related-documents graph, if the index had one
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Dict, Any, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from ..utils.index_generation import IndexGeneration
+from .embeddings import load_embeddings
+from .related_documents import RelatedDocuments
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+RELATED_DOCUMENTS_FILE = "related_documents.npz"
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, corrupt or incompatible."""
+
+
+def _sha256(path: Path) -> str:
+    """Compute SHA256 hash of a file."""
+    sha256_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for byte_block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def _write_string_column(directory: Path, name: str, values: List[str]):
+    """Write strings as one UTF-8 blob plus int64 offsets."""
+    encoded = [(value or "").encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    with open(directory / f"{name}.bin", "wb") as f:
+        for b in encoded:
+            f.write(b)
+    np.save(directory / f"{name}.offsets.npy", offsets)
+
+
+class _StringColumn:
+    """Read-only view over a UTF-8 blob and its offsets."""
+
+    def __init__(self, directory: Path, name: str):
+        self.offsets = np.load(directory / f"{name}.offsets.npy", mmap_mode="r")
+        blob_file = directory / f"{name}.bin"
+        size = blob_file.stat().st_size
+        self.blob = np.memmap(blob_file, dtype=np.uint8, mode="r") if size else np.zeros(0, np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return bytes(self.blob[start:end]).decode("utf-8")
+
+
+def _match_value(value: Any, condition: Any) -> bool:
+    """Evaluate a Chroma-style field condition against one metadata value."""
+    if not isinstance(condition, dict):
+        return value == condition
+    for op, operand in condition.items():
+        if op == "$eq":
+            ok = value == operand
+        elif op == "$ne":
+            ok = value != operand
+        elif op == "$in":
+            ok = value in operand
+        elif op == "$nin":
+            ok = value not in operand
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            if value is None or isinstance(value, str) != isinstance(operand, str):
+                ok = False
+            elif op == "$gt":
+                ok = value > operand
+            elif op == "$gte":
+                ok = value >= operand
+            elif op == "$lt":
+                ok = value < operand
+            else:
+                ok = value <= operand
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if not ok:
+            return False
+    return True
+
+
+def export_snapshot(indexer, output_dir: Path, page_size: Optional[int] = None) -> Dict[str, Any]:
+    """Export an indexer's collection to a snapshot bundle.
+
+    The bundle is written to a temporary sibling directory and renamed into
+    place when complete, so readers never observe a partial snapshot.
+    """
+    output_dir = Path(output_dir)
+    if output_dir.exists():
+        raise SnapshotError(f"Snapshot directory already exists: {output_dir}")
+    tmp_dir = output_dir.with_name(f".{output_dir.name}.partial")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    collection = indexer.collection
+    expected = collection.count()
+    page_size = page_size or indexer.client.get_max_batch_size()
+
+    ids: List[str] = []
+    texts: List[str] = []
+    metadatas: List[Dict[str, Any]] = []
+    vectors = None
+
+    try:
+        while len(ids) < expected:
+            page = collection.get(
+                limit=page_size,
+                offset=len(ids),
+                include=["embeddings", "documents", "metadatas"]
+            )
+            if not page['ids']:
+                break
+            page_vectors = np.asarray(page['embeddings'], dtype=np.float32)
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(
+                    tmp_dir / "vectors.npy", mode="w+", dtype=np.float32,
+                    shape=(expected, page_vectors.shape[1])
+                )
+            # Stop at the count taken up front if writes land during export
+            take = min(len(page['ids']), expected - len(ids))
+            vectors[len(ids):len(ids) + take] = page_vectors[:take]
+            ids.extend(page['ids'][:take])
+            texts.extend(page['documents'][:take])
+            metadatas.extend(m or {} for m in page['metadatas'][:take])
+            logger.info(f"Exported {len(ids)}/{expected} chunks")
+
+        if vectors is None:
+            raise SnapshotError("Collection is empty, nothing to export")
+        dimension = vectors.shape[1]
+        vectors.flush()
+        del vectors
+        if len(ids) < expected:
+            # Collection shrank during export: truncate the preallocated array
+            full = np.load(tmp_dir / "vectors.npy", mmap_mode="r")
+            np.save(tmp_dir / "vectors.trunc.npy", np.asarray(full[:len(ids)]))
+            del full
+            (tmp_dir / "vectors.trunc.npy").replace(tmp_dir / "vectors.npy")
+
+        _write_string_column(tmp_dir, "ids", ids)
+        _write_string_column(tmp_dir, "text", texts)
+
+        keys = sorted({key for metadata in metadatas for key in metadata})
+        columns = []
+        for n, key in enumerate(keys):
+            lookup: Dict[Any, int] = {}
+            values: List[Any] = []
+            codes = np.full(len(metadatas), -1, dtype=np.int32)
+            for row, metadata in enumerate(metadatas):
+                if key not in metadata:
+                    continue
+                value = metadata[key]
+                # Keep bool/int/float/str distinct (True == 1 in a plain dict)
+                lookup_key = (type(value).__name__, value)
+                if lookup_key not in lookup:
+                    lookup[lookup_key] = len(values)
+                    values.append(value)
+                codes[row] = lookup[lookup_key]
+            with open(tmp_dir / f"meta.{n}.values.json", "w") as f:
+                json.dump(values, f)
+            np.save(tmp_dir / f"meta.{n}.codes.npy", codes)
+            columns.append({"key": key, "index": n})
+
+        related = getattr(indexer, "related_documents", None)
+        if related is not None and related.path.exists():
+            shutil.copyfile(related.path, tmp_dir / RELATED_DOCUMENTS_FILE)
+
+        files = {
+            path.name: {"sha256": _sha256(path), "bytes": path.stat().st_size}
+            for path in sorted(tmp_dir.iterdir())
+        }
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "created_at": datetime.now().isoformat(),
+            "collection_name": indexer.collection_name,
+            "embedding_model": indexer.embedding_model,
+            "dimension": dimension,
+            "count": len(ids),
+            "metadata_columns": columns,
+            "files": files
+        }
+        with open(tmp_dir / MANIFEST_FILE, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        tmp_dir.rename(output_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    size = sum(f["bytes"] for f in files.values())
+    logger.info(f"Exported snapshot with {len(ids)} chunks to {output_dir}")
+    return {
+        "path": str(output_dir),
+        "chunks": len(ids),
+        "dimension": dimension,
+        "size_mb": round(size / (1024 * 1024), 2)
+    }
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot bundle."""
+
+    def __init__(self, path: Path, verify: bool = False):
+        """Open a snapshot, optionally verifying file checksums."""
+        self.path = Path(path)
+        manifest_file = self.path / MANIFEST_FILE
+        if not manifest_file.exists():
+            raise SnapshotError(f"No snapshot manifest at {manifest_file}")
+        with open(manifest_file, "r") as f:
+            self.manifest = json.load(f)
+
+        version = self.manifest.get("format_version")
+        if version != SNAPSHOT_FORMAT_VERSION:
+            raise SnapshotError(
+                f"Unsupported snapshot format {version}, expected {SNAPSHOT_FORMAT_VERSION}"
+            )
+        if verify:
+            self.verify()
+
+        self.vectors = np.load(self.path / "vectors.npy", mmap_mode="r")
+        self.ids = _StringColumn(self.path, "ids")
+        self.texts = _StringColumn(self.path, "text")
+
+        self.columns: Dict[str, Tuple[List[Any], np.ndarray]] = {}
+        for column in self.manifest["metadata_columns"]:
+            n = column["index"]
+            with open(self.path / f"meta.{n}.values.json", "r") as f:
+                values = json.load(f)
+            codes = np.load(self.path / f"meta.{n}.codes.npy", mmap_mode="r")
+            self.columns[column["key"]] = (values, codes)
+
+    def __len__(self) -> int:
+        """Number of chunks in the snapshot."""
+        return self.manifest["count"]
+
+    @property
+    def embedding_model(self) -> str:
+        return self.manifest["embedding_model"]
+
+    def verify(self):
+        """Check every file against the manifest checksums."""
+        for name, info in self.manifest["files"].items():
+            path = self.path / name
+            if not path.exists():
+                raise SnapshotError(f"Snapshot file missing: {name}")
+            if _sha256(path) != info["sha256"]:
+                raise SnapshotError(f"Checksum mismatch for snapshot file: {name}")
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        """Reassemble the metadata dict for one row."""
+        metadata = {}
+        for key, (values, codes) in self.columns.items():
+            code = codes[row]
+            if code >= 0:
+                metadata[key] = values[code]
+        return metadata
+
+    def filter_mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Boolean row mask for a Chroma-style where clause (None = all rows)."""
+        if not where:
+            return None
+        masks = []
+        for key, condition in where.items():
+            if key == "$and":
+                parts = [self.filter_mask(clause) for clause in condition]
+                masks.append(np.logical_and.reduce([self._all_rows(p) for p in parts]))
+            elif key == "$or":
+                parts = [self.filter_mask(clause) for clause in condition]
+                masks.append(np.logical_or.reduce([self._all_rows(p) for p in parts]))
+            elif key not in self.columns:
+                masks.append(np.zeros(len(self), dtype=bool))
+            else:
+                values, codes = self.columns[key]
+                # Evaluate once per distinct value, then broadcast over rows
+                allowed = np.array(
+                    [_match_value(value, condition) for value in values] + [False], dtype=bool
+                )
+                masks.append(allowed[np.asarray(codes)])
+        return np.logical_and.reduce(masks)
+
+    def _all_rows(self, mask: Optional[np.ndarray]) -> np.ndarray:
+        return np.ones(len(self), dtype=bool) if mask is None else mask
+
+    def search(
+        self,
+        query_embedding,
+        k: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        block_size: int = 65536
+    ) -> List[Tuple[int, float]]:
+        """Exact top-k rows by inner product, scanning the memory-mapped vectors.
+
+        Every query reads all ``len(self)`` vectors, so latency grows
+        linearly with the snapshot: about 2 ms per 10,000 384-dimension rows
+        on one core. A filter narrows the rows ranked, not the rows read.
+        ``benchmarks/snapshot_benchmark.py`` measures it for a bundle.
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        mask = self.filter_mask(where)
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float32)
+
+        for start in range(0, len(self), block_size):
+            scores = np.asarray(self.vectors[start:start + block_size]) @ query
+            rows = np.arange(start, start + len(scores))
+            if mask is not None:
+                block_mask = mask[start:start + len(scores)]
+                scores, rows = scores[block_mask], rows[block_mask]
+            best_scores = np.concatenate([best_scores, scores])
+            best_rows = np.concatenate([best_rows, rows])
+            if len(best_scores) > k:
+                keep = np.argpartition(-best_scores, k - 1)[:k]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+
+        order = np.argsort(-best_scores)
+        return [(int(best_rows[i]), float(best_scores[i])) for i in order]
+
+
+def import_snapshot(indexer, snapshot_path: Path, verify: bool = True, replace: bool = False) -> int:
+    """Bulk-load a snapshot into an indexer's collection without re-embedding.
+
+    The collection must be empty, since chunks it holds that the snapshot
+    lacks would be kept alongside it; with ``replace`` it is cleared once
+    the snapshot has been checked.
+    """
+    snapshot = Snapshot(snapshot_path, verify=verify)
+    model = indexer.embedding_model
+    if snapshot.embedding_model != model:
+        raise SnapshotError(
+            f"Snapshot was built with '{snapshot.embedding_model}', index uses '{model}'"
+        )
+    existing = indexer.collection.count()
+    if existing:
+        if not replace:
+            raise SnapshotError(
+                f"Index already holds {existing} chunks; clear it or import with replace"
+            )
+        logger.info(f"Clearing {existing} chunks before import")
+        indexer.clear_collection()
+
+    batch_size = indexer.client.get_max_batch_size()
+    loaded = 0
+    for start in range(0, len(snapshot), batch_size):
+        rows = range(start, min(start + batch_size, len(snapshot)))
+        ids = [snapshot.ids[row] for row in rows]
+        embeddings = np.asarray(snapshot.vectors[start:start + len(ids)])
+        indexer.collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            documents=[snapshot.texts[row] for row in rows],
+            metadatas=[snapshot.metadata(row) or None for row in rows]
+        )
+        if indexer.lexical_index is not None:
+            indexer.lexical_index.add(ids, [snapshot.texts[row] for row in rows])
+        loaded += len(ids)
+        logger.info(f"Imported {loaded}/{len(snapshot)} chunks")
+
+    if indexer.lexical_index is not None:
+        indexer.lexical_index.save()
+    # Recounts the facets of the imported chunks and commits the import
+    indexer.rebuild_facet_counts()
+    if indexer.related_documents is not None:
+        indexer.rebuild_related_documents()
+    return loaded
+
+
+class SnapshotIndexer:
+    """Read-only indexer that serves search straight from a memory-mapped snapshot."""
+
+    def __init__(self, snapshot_path: Path, verify: bool = False):
+        """Open the snapshot; its embedding model is loaded on first search."""
+        self.snapshot = Snapshot(snapshot_path, verify=verify)
+        self.collection_name = self.snapshot.manifest["collection_name"]
+        self.embedding_model = self.snapshot.embedding_model
+        self._embeddings = None
+        self._embeddings_lock = threading.Lock()
+        self._rows_by_id: Optional[Dict[str, int]] = None
+        # Read as built by the exporting index; absent from older bundles
+        self.related_documents = RelatedDocuments(self.snapshot.path / RELATED_DOCUMENTS_FILE)
+        # Never bumped: a snapshot does not change while it is being served
+        self.generation = IndexGeneration(self.snapshot.path)
+
+    @property
+    def embeddings(self):
+        """Embedding model the snapshot was built with, loaded on first access."""
+        if self._embeddings is None:
+            with self._embeddings_lock:
+                if self._embeddings is None:
+                    self._embeddings = load_embeddings(self.embedding_model)
+        return self._embeddings
+
+    @classmethod
+    def from_config(cls, config) -> "SnapshotIndexer":
+        """Create a snapshot indexer from application configuration."""
+        return cls(config.snapshot_path)
+
+    def reopen_if_written(self) -> bool:
+        """A snapshot is never written in place; always False."""
+        return False
+
+    def close(self):
+        """Nothing to release; the memory maps close with the snapshot."""
+
+    def stored_identity(self) -> Optional[str]:
+        """Bundle now at the snapshot path and its creation time, or None if there is none.
+
+        Changes when the path, typically a symlink, is pointed at another bundle.
+        """
+        try:
+            with open(self.snapshot.path / MANIFEST_FILE, "r") as f:
+                created_at = json.load(f)["created_at"]
+            return f"{self.snapshot.path.resolve()}@{created_at}"
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug(f"Could not read snapshot manifest: {e}")
+            return None
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None,
+        ef: Optional[int] = None,
+        mode: str = "vector"
+    ) -> List[Tuple[Document, float]]:
+        """Exact search over the snapshot; ``ef`` and ``mode`` are accepted for API parity."""
+        try:
+            query_embedding = self.embed_query(query)
+        except Exception as e:
+            logger.error(f"Search error: {e}")
+            return []
+        return self.search_by_vector(query_embedding, k, filter_dict, score_threshold, ef, query=query)
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query with the snapshot's embedding model."""
+        return self.embeddings.embed_query(query)
+
+    def search_by_vector(
+        self,
+        query_embedding: List[float],
+        k: int = 10,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None,
+        ef: Optional[int] = None,
+        query: str = "",
+        mode: str = "vector",
+        include_content: bool = True
+    ) -> List[Tuple[Document, float]]:
+        """Exact search with a precomputed query embedding.
+
+        Snapshots carry no lexical index, so hybrid mode falls back to vector search.
+        """
+        try:
+            output = []
+            for row, similarity in self.snapshot.search(query_embedding, k=k, where=filter_dict):
+                if score_threshold is not None and similarity < score_threshold:
+                    continue
+                doc = Document(
+                    id=self.snapshot.ids[row],
+                    page_content=self.snapshot.texts[row] if include_content else "",
+                    metadata=self.snapshot.metadata(row)
+                )
+                output.append((doc, similarity))
+            logger.info(f"Found {len(output)} documents for query: {query[:50]}...")
+            return output
+        except Exception as e:
+            logger.error(f"Search error: {e}")
+            return []
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries in one forward pass."""
+        return self.embeddings.embed_documents(queries)
+
+    def search_many_by_vector(
+        self,
+        query_embeddings: List[List[float]],
+        k: int = 10,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None,
+        ef: Optional[int] = None,
+        queries: Optional[List[str]] = None,
+        mode: str = "vector",
+        include_content: bool = True
+    ) -> List[List[Tuple[Document, float]]]:
+        """Exact search for several precomputed query embeddings."""
+        queries = queries or [""] * len(query_embeddings)
+        return [
+            self.search_by_vector(embedding, k, filter_dict, score_threshold, ef, query=query,
+                                  include_content=include_content)
+            for query, embedding in zip(queries, query_embeddings)
+        ]
+
+    def _rows(self) -> Dict[str, int]:
+        """Snapshot row of each chunk ID, built on first use."""
+        if self._rows_by_id is None:
+            self._rows_by_id = {self.snapshot.ids[row]: row for row in range(len(self.snapshot))}
+        return self._rows_by_id
+
+    def get_documents(self, ids: List[str]) -> List[Document]:
+        """Snapshot chunks for IDs, in the order given, skipping IDs not in the snapshot."""
+        rows = self._rows()
+        return [
+            Document(id=doc_id, page_content=self.snapshot.texts[rows[doc_id]], metadata=self.snapshot.metadata(rows[doc_id]))
+            for doc_id in ids if doc_id in rows
+        ]
+
+    def get_documents_where(self, filter_dict: Dict[str, Any]) -> List[Document]:
+        """Snapshot chunks matching a where clause, in row order."""
+        mask = self.snapshot.filter_mask(filter_dict)
+        rows = np.arange(len(self.snapshot)) if mask is None else np.flatnonzero(mask)
+        return [
+            Document(id=self.snapshot.ids[row], page_content=self.snapshot.texts[row], metadata=self.snapshot.metadata(row))
+            for row in rows
+        ]
+
+    def get_embeddings(self, ids: List[str]) -> np.ndarray:
+        """Snapshot vectors for chunk IDs, in the order given."""
+        rows = self._rows()
+        return np.asarray(self.snapshot.vectors[[rows[doc_id] for doc_id in ids]], dtype=np.float32)
+
+    def get_collection_stats(self) -> Dict[str, Any]:
+        """Get statistics about the snapshot."""
+        manifest = self.snapshot.manifest
+        return {
+            "collection_name": self.collection_name,
+            "document_count": len(self.snapshot),
+            "snapshot_path": str(self.snapshot.path),
+            "snapshot_created_at": manifest["created_at"],
+            "embedding_model": self.snapshot.embedding_model,
+            "storage_mb": round(sum(f["bytes"] for f in manifest["files"].values()) / (1024 * 1024), 2)
+        }
+
+    def _read_only(self, *args, **kwargs):
+        raise SnapshotError("Snapshot index is read-only")
+
+    add_documents = _read_only
+    delete_by_source = _read_only
+    update_document = _read_only
+    clear_collection = _read_only
+    compact = _read_only
+    rebuild_lexical_index = _read_only
+    rebuild_related_documents = _read_only
+    refresh_related_documents = _read_only
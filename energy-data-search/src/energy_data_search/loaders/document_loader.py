@@ -3,13 +3,9 @@
 import logging
 from pathlib import Path
 from typing import List, Optional
-from langchain.schema import Document
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    CSVLoader
-)
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+
+from .document_metadata import classify_document_type, extract_document_date, make_snippet
 
 logger = logging.getLogger(__name__)
 
@@ -17,16 +13,13 @@ logger = logging.getLogger(__name__)
 class DocumentLoader:
     """Load and process documents from various file formats."""
     
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, snippet_length: int = 200):
         """Initialize document loader with text splitting configuration."""
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
-        )
+        # Stored with each chunk so search can return it without the full text
+        self.snippet_length = snippet_length
+        self._text_splitter = None
         
         self.loader_map = {
             ".pdf": self._load_pdf,
@@ -38,6 +31,20 @@ class DocumentLoader:
             ".markdown": self._load_markdown
         }
     
+    @property
+    def text_splitter(self):
+        """Text splitter, created on first use to keep imports off the startup path."""
+        if self._text_splitter is None:
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+            
+            self._text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                length_function=len,
+                separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
+            )
+        return self._text_splitter
+    
     def load_document(self, file_path: Path) -> List[Document]:
         """Load a single document and split it into chunks."""
         if not file_path.exists():
@@ -55,13 +62,27 @@ class DocumentLoader:
             documents = loader_func(file_path)
             chunks = self.text_splitter.split_documents(documents)
             
-            for chunk in chunks:
+            # Date and type are taken from the file name or the first page
+            head = documents[0].page_content if documents else ""
+            document_type = classify_document_type(file_path, head)
+            document_date = extract_document_date(file_path, head)
+            
+            # Absolute, as the index tracker records it, so a later change or
+            # removal of the file finds these chunks from any working directory
+            source = str(file_path.absolute())
+            for ordinal, chunk in enumerate(chunks):
                 chunk.metadata.update({
-                    "source": str(file_path),
+                    "source": source,
                     "file_type": suffix[1:],
                     "file_name": file_path.name,
-                    "directory": file_path.parent.name
+                    "directory": file_path.parent.name,
+                    "document_type": document_type,
+                    "snippet": make_snippet(chunk.page_content, self.snippet_length),
+                    # Position in the source, to fetch the chunks around a hit
+                    "chunk_index": ordinal
                 })
+                if document_date is not None:
+                    chunk.metadata["document_date"] = document_date
             
             logger.info(f"Loaded {len(chunks)} chunks from {file_path}")
             return chunks
@@ -89,11 +110,15 @@ class DocumentLoader:
     
     def _load_pdf(self, file_path: Path) -> List[Document]:
         """Load PDF document."""
+        from langchain_community.document_loaders import PyPDFLoader
+        
         loader = PyPDFLoader(str(file_path))
         return loader.load()
     
     def _load_text(self, file_path: Path) -> List[Document]:
         """Load text document."""
+        from langchain_community.document_loaders import TextLoader
+        
         loader = TextLoader(str(file_path), encoding="utf-8")
         try:
             return loader.load()
@@ -103,6 +128,8 @@ class DocumentLoader:
     
     def _load_csv(self, file_path: Path) -> List[Document]:
         """Load CSV document."""
+        from langchain_community.document_loaders import CSVLoader
+        
         loader = CSVLoader(str(file_path))
         return loader.load()
     
@@ -111,7 +138,7 @@ class DocumentLoader:
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-            return [Document(page_content=content, metadata={"source": str(file_path)})]
+            return [Document(page_content=content, metadata={"source": str(file_path.absolute())})]
         except Exception as e:
             logger.error(f"Error reading HTML file {file_path}: {e}")
             return []
@@ -121,7 +148,7 @@ class DocumentLoader:
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-            return [Document(page_content=content, metadata={"source": str(file_path)})]
+            return [Document(page_content=content, metadata={"source": str(file_path.absolute())})]
         except Exception as e:
             logger.error(f"Error reading Markdown file {file_path}: {e}")
             return []
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""Document date, type and snippet extraction from file names and content."""
+
+import re
+from datetime import date
+from pathlib import Path
+from typing import Any, Optional
+
+# Characters of content searched when the file name has no date or type
+CONTENT_HEAD = 2000
+
+# ERCOT revision request prefixes, e.g. NPRR1186, NOGRR 245
+REVISION_REQUEST = re.compile(
+    r"\b(NPRR|NOGRR|PGRR|RRGRR|OBDRR|VCMRR|SMOGRR|RMGRR|LPGRR|COPMGRR|SCR)"
+    r"(?:\s*(?:number|no\.?))?[\s_#:|-]*\d{2,4}(?!\d)",
+    re.IGNORECASE
+)
+
+# General document kinds, checked in order
+DOCUMENT_KINDS = (
+    ("protocol", re.compile(r"protocol", re.IGNORECASE)),
+    ("guide", re.compile(r"guide", re.IGNORECASE)),
+    ("tariff", re.compile(r"tariff", re.IGNORECASE)),
+    ("report", re.compile(r"report", re.IGNORECASE)),
+)
+
+MONTHS = {
+    name: number
+    for number, names in enumerate(
+        (("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+         ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+         ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december")),
+        start=1
+    )
+    for name in names
+}
+
+# (pattern, order of year/month/day groups); two-digit years are 20xx
+FILE_NAME_DATES = (
+    (re.compile(r"(?<!\d)((?:19|20)\d{2})[-_.]?(\d{2})[-_.]?(\d{2})(?!\d)"), "ymd"),
+    (re.compile(r"(?<!\d)(\d{2})[-_.](\d{2})[-_.]((?:19|20)\d{2})(?!\d)"), "mdy"),
+    # ERCOT posts use MMDDYY, e.g. 040125 for April 1, 2025
+    (re.compile(r"(?<!\d)(\d{2})(\d{2})(\d{2})(?!\d)"), "mdy"),
+)
+CONTENT_DATES = (
+    (re.compile(r"\b([A-Za-z]{3,9})\.?\s+(\d{1,2}),?\s+((?:19|20)\d{2})\b"), "Mdy"),
+    (re.compile(r"(?<!\d)(\d{1,2})/(\d{1,2})/((?:19|20)\d{2})(?!\d)"), "mdy"),
+    (re.compile(r"(?<!\d)((?:19|20)\d{2})-(\d{2})-(\d{2})(?!\d)"), "ymd"),
+)
+
+
+def date_to_int(value: Any) -> int:
+    """Convert a date, ``YYYY-MM-DD`` string or ``YYYYMMDD`` number to a YYYYMMDD integer."""
+    if isinstance(value, date):
+        return value.year * 10000 + value.month * 100 + value.day
+    text = str(value).strip().replace("-", "")
+    if not re.fullmatch(r"\d{8}", text):
+        raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD")
+    parsed = _valid_date(text[:4], text[4:6], text[6:])
+    if parsed is None:
+        raise ValueError(f"Invalid date '{value}'")
+    return date_to_int(parsed)
+
+
+def _valid_date(year: str, month: str, day: str) -> Optional[date]:
+    """Build a date from text parts, or None if they do not form one."""
+    month_number = MONTHS.get(month.lower()) if month.isalpha() else int(month)
+    year_number = int(year) + 2000 if len(year) == 2 else int(year)
+    try:
+        parsed = date(year_number, month_number or 0, int(day))
+    except ValueError:
+        return None
+    return parsed if 1990 <= parsed.year <= 2100 else None
+
+
+def _first_date(text: str, patterns) -> Optional[date]:
+    """Earliest valid date in ``text`` matched by any of the patterns."""
+    found = []
+    for pattern, order in patterns:
+        for match in pattern.finditer(text):
+            parts = dict(zip(order.lower(), match.groups()))
+            parsed = _valid_date(parts["y"], parts["m"], parts["d"])
+            if parsed is not None:
+                found.append((match.start(), parsed))
+                break
+    return min(found)[1] if found else None
+
+
+def extract_document_date(file_path: Path, content: str = "") -> Optional[int]:
+    """Document date as a YYYYMMDD integer from the file name, else the start of the content."""
+    parsed = _first_date(Path(file_path).stem, FILE_NAME_DATES) or _first_date(content[:CONTENT_HEAD], CONTENT_DATES)
+    return date_to_int(parsed) if parsed else None
+
+
+def make_snippet(text: str, length: int = 200) -> str:
+    """Start of ``text`` with whitespace collapsed, cut at a word boundary within ``length`` characters."""
+    text = " ".join(text.split())
+    if len(text) <= length:
+        return text
+    cut = text.rfind(" ", 0, length)
+    return text[:cut if cut > 0 else length].rstrip(" .,;:") + "..."
+
+
+def classify_document_type(file_path: Path, content: str = "") -> str:
+    """Revision request prefix (e.g. "NPRR") or kind ("protocol", "guide", ...), else "other"."""
+    path_text = " ".join(Path(file_path).parts[-3:])
+    # The path decides before the content: a revision request filed under
+    # protocols/ is still a revision request, and a protocol section citing
+    # NPRRs in its text is still a protocol
+    for text in (path_text, content[:CONTENT_HEAD]):
+        match = REVISION_REQUEST.search(text)
+        if match:
+            return match.group(1).upper()
+        for kind, pattern in DOCUMENT_KINDS:
+            if pattern.search(text):
+                return kind
+    return "other"
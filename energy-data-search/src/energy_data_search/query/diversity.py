@@ -0,0 +1,52 @@
+"""Result diversity: per-source collapsing and maximal marginal relevance."""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+def collapse_by_source(results: List[Any]) -> List[Any]:
+    """Keep the best-ranked chunk per source, counting the source's hits.
+
+    Results are SearchResult-like objects in rank order; the kept chunk's
+    ``source_hits`` is set to the number of results from its source.
+    """
+    best: Dict[str, Any] = {}
+    for result in results:
+        if result.source in best:
+            best[result.source].source_hits += 1
+        else:
+            result.source_hits = 1
+            best[result.source] = result
+    return list(best.values())
+
+
+def mmr_select(relevance: np.ndarray, embeddings: np.ndarray, k: int, lambda_mult: float = 0.7) -> List[int]:
+    """Indices of up to ``k`` candidates chosen by maximal marginal relevance.
+
+    Each step picks the candidate maximizing
+    ``lambda_mult * relevance - (1 - lambda_mult) * max similarity to the
+    candidates already picked``. Pairwise similarities come from one matrix
+    product, and the running maximum is updated in place.
+    """
+    n = len(relevance)
+    if n == 0 or k <= 0:
+        return []
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    similarity = vectors @ vectors.T
+    relevance = np.asarray(relevance, dtype=np.float32)
+
+    first = int(np.argmax(relevance))
+    selected = [first]
+    chosen = np.zeros(n, dtype=bool)
+    chosen[first] = True
+    max_similarity = similarity[first].copy()
+    while len(selected) < min(k, n):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[chosen] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        chosen[best] = True
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return selected
@@ -2,12 +2,13 @@
 
 import logging
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Callable, Optional, Dict, List
 from datetime import datetime
 
 from ..config import Config
 from ..indexers.chromadb_indexer import ChromaDBIndexer
 from ..loaders.document_loader import DocumentLoader
+from ..utils.index_lock import IndexWriterLock
 from ..utils.index_tracker import IndexTracker
 
 logger = logging.getLogger(__name__)
@@ -20,23 +21,50 @@ class IncrementalIndexer:
         """Initialize incremental indexer."""
         self.config = config or Config()
         
-        self.indexer = ChromaDBIndexer(
-            persist_directory=self.config.chroma_persist_dir,
-            collection_name=self.config.collection_name,
-            embedding_model=self.config.embedding_model
-        )
+        self.indexer = ChromaDBIndexer.from_config(self.config)
         
         self.loader = DocumentLoader(
             chunk_size=self.config.chunk_size,
-            chunk_overlap=self.config.chunk_overlap
+            chunk_overlap=self.config.chunk_overlap,
+            snippet_length=self.config.snippet_length
         )
         
         self.tracker = IndexTracker(
             tracker_file=self.config.chroma_persist_dir / "index_tracker.json"
         )
     
-    def index_new_documents(self, directory: Optional[Path] = None) -> Dict:
-        """Index only new or modified documents."""
+    def index_new_documents(
+        self,
+        directory: Optional[Path] = None,
+        progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """Index only new or modified documents.
+        
+        Holds the index writer lock throughout, waiting for any other
+        writer first. ``progress`` is called after each file with the files
+        done and total so far, the current file and chunk counts.
+        """
+        with IndexWriterLock(self.config.chroma_persist_dir):
+            # Another writer may have updated the tracker and the index, or a
+            # full reindex replaced the index directory, while we waited
+            self._reopen_if_replaced()
+            self.tracker.load_tracker()
+            return self._index_new_documents(directory, progress)
+    
+    def _reopen_if_replaced(self):
+        """Open the index directory the configured path now points to, or the writes made to it by others."""
+        if self.indexer.persist_directory != self.config.chroma_persist_dir.resolve():
+            logger.info(f"Index directory changed to {self.config.chroma_persist_dir.resolve()}, reopening")
+            self.indexer.close()
+            self.indexer = ChromaDBIndexer.from_config(self.config)
+        else:
+            self.indexer.reopen_if_written()
+    
+    def _index_new_documents(
+        self,
+        directory: Optional[Path],
+        progress: Optional[Callable[[Dict], None]]
+    ) -> Dict:
         start_time = datetime.now()
         results = {
             'new_files': [],
@@ -44,6 +72,7 @@ class IncrementalIndexer:
             'removed_files': [],
             'errors': [],
             'total_chunks_added': 0,
+            'total_chunks_removed': 0,
             'processing_time': 0
         }
         
@@ -56,27 +85,57 @@ class IncrementalIndexer:
                 logger.error(f"Error getting source directories: {e}")
                 return results
         
+        # Scan every directory first so progress has a total
+        pending = []
         for dir_path in directories:
             logger.info(f"Checking directory for new documents: {dir_path}")
             
             # Get files that need indexing
             files_to_index = self.tracker.get_files_to_index(dir_path, recursive=True)
             
-            if not files_to_index:
+            if files_to_index:
+                logger.info(f"Found {len(files_to_index)} files to index in {dir_path}")
+            else:
                 logger.info(f"No new or modified files in {dir_path}")
-                continue
-            
-            logger.info(f"Found {len(files_to_index)} files to index in {dir_path}")
-            
+            pending.append((dir_path, files_to_index))
+        
+        state = {
+            'files_total': sum(len(files) for _, files in pending),
+            'files_done': 0,
+            'current_file': None
+        }
+        
+        def report(file_path: Optional[Path]):
+            if progress is None:
+                return
+            state['current_file'] = str(file_path) if file_path else None
+            progress({
+                **state,
+                'chunks_added': results['total_chunks_added'],
+                'chunks_removed': results['total_chunks_removed'],
+                'errors': len(results['errors'])
+            })
+        
+        report(None)
+        for dir_path, files_to_index in pending:
             for file_path in files_to_index:
                 try:
                     # Check if file was previously indexed
                     was_indexed = self.tracker.is_file_indexed(file_path)
+                    source = str(file_path.absolute())
                     
                     # Load and index the document
                     logger.info(f"Indexing: {file_path}")
                     documents = self.loader.load_document(file_path)
                     
+                    # Drop chunks from the previous version of the file, also
+                    # when the new version yields none
+                    if was_indexed:
+                        results['total_chunks_removed'] += self.indexer.delete_by_source(source)
+                        results['modified_files'].append(source)
+                        if not documents:
+                            self.tracker.remove_indexed(file_path)
+                    
                     if documents:
                         # Add to ChromaDB
                         self.indexer.add_documents(documents, batch_size=self.config.batch_size)
@@ -84,11 +143,8 @@ class IncrementalIndexer:
                         # Track the indexing
                         self.tracker.mark_indexed(file_path, len(documents))
                         
-                        # Update results
-                        if was_indexed:
-                            results['modified_files'].append(str(file_path))
-                        else:
-                            results['new_files'].append(str(file_path))
+                        if not was_indexed:
+                            results['new_files'].append(source)
                         
                         results['total_chunks_added'] += len(documents)
                         logger.info(f"Indexed {len(documents)} chunks from {file_path}")
@@ -99,16 +155,24 @@ class IncrementalIndexer:
                         'file': str(file_path),
                         'error': str(e)
                     })
+                
+                state['files_done'] += 1
+                report(file_path)
             
             # Check for removed files
             removed = self.tracker.get_removed_files(dir_path)
             for file_path in removed:
+                results['total_chunks_removed'] += self.indexer.delete_by_source(file_path)
                 self.tracker.remove_indexed(Path(file_path))
                 results['removed_files'].append(file_path)
-                logger.info(f"Removed from tracking: {file_path}")
+                logger.info(f"Removed from index and tracking: {file_path}")
         
         # Save tracker state
         self.tracker.save_tracker()
+        self._refresh_related_documents(
+            results['new_files'] + results['modified_files'] + results['removed_files']
+        )
+        report(None)
         
         # Calculate processing time
         results['processing_time'] = (datetime.now() - start_time).total_seconds()
@@ -119,21 +183,33 @@ class IncrementalIndexer:
         logger.info(f"  - Modified files: {len(results['modified_files'])}")
         logger.info(f"  - Removed files: {len(results['removed_files'])}")
         logger.info(f"  - Total chunks added: {results['total_chunks_added']}")
+        logger.info(f"  - Total chunks removed: {results['total_chunks_removed']}")
         logger.info(f"  - Processing time: {results['processing_time']:.2f} seconds")
         
         return results
     
+    def _refresh_related_documents(self, sources: List[str]):
+        """Update the related-documents graph for changed sources; a failure leaves the old graph."""
+        if not sources:
+            return
+        try:
+            self.indexer.refresh_related_documents(sources)
+        except Exception as e:
+            logger.error(f"Error refreshing related documents: {e}")
+    
     def check_status(self) -> Dict:
         """Check current indexing status."""
         tracker_stats = self.tracker.get_statistics()
         index_stats = self.indexer.get_collection_stats()
         
-        # Check for new files across all directories
+        # Check for new and removed files across all directories
         new_files_count = 0
+        removed_files_count = 0
         try:
             for dir_path in self.config.get_subdirectories():
                 files_to_index = self.tracker.get_files_to_index(dir_path, recursive=True)
                 new_files_count += len(files_to_index)
+                removed_files_count += len(self.tracker.get_removed_files(dir_path))
         except ValueError:
             pass
         
@@ -141,6 +217,7 @@ class IncrementalIndexer:
             'tracker': tracker_stats,
             'index': index_stats,
             'new_files_available': new_files_count,
+            'removed_files_pending': removed_files_count,
             'last_update': self._get_last_update_time()
         }
     
@@ -161,6 +238,7 @@ class IncrementalIndexer:
         results = {
             'success': False,
             'chunks_added': 0,
+            'chunks_removed': 0,
             'error': None
         }
         
@@ -172,9 +250,15 @@ class IncrementalIndexer:
             documents = self.loader.load_document(file_path)
             
             if documents:
-                self.indexer.add_documents(documents, batch_size=self.config.batch_size)
-                self.tracker.mark_indexed(file_path, len(documents))
-                self.tracker.save_tracker()
+                with IndexWriterLock(self.config.chroma_persist_dir):
+                    self._reopen_if_replaced()
+                    self.tracker.load_tracker()
+                    source = str(file_path.absolute())
+                    results['chunks_removed'] = self.indexer.delete_by_source(source)
+                    self.indexer.add_documents(documents, batch_size=self.config.batch_size)
+                    self.tracker.mark_indexed(file_path, len(documents))
+                    self.tracker.save_tracker()
+                    self._refresh_related_documents([source])
                 
                 results['success'] = True
                 results['chunks_added'] = len(documents)
@@ -0,0 +1,221 @@
+"""Incremental index updates run as background jobs in a separate worker process."""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+# Seconds between progress writes from the worker process
+PROGRESS_INTERVAL = 1.0
+# Finished jobs kept on disk
+MAX_FINISHED_JOBS = 100
+
+
+def _write_job(path: Path, job: Dict[str, Any]):
+    """Replace a job file atomically, so readers never see a partial write."""
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(job, indent=2))
+    os.replace(tmp_path, path)
+
+
+def run_index_job(job_path: Path, config: Config):
+    """Run an incremental update, recording progress and the outcome in the job file."""
+    from .incremental_indexer import IncrementalIndexer
+
+    path = Path(job_path)
+    job = json.loads(path.read_text())
+    last_write = 0.0
+
+    def progress(update: Dict[str, Any]):
+        nonlocal last_write
+        job["progress"] = update
+        done = update["files_done"] == update["files_total"]
+        if done or time.monotonic() - last_write >= PROGRESS_INTERVAL:
+            _write_job(path, job)
+            last_write = time.monotonic()
+
+    try:
+        indexer = IncrementalIndexer(config)
+        results = indexer.index_new_documents(progress=progress)
+        job["result"] = {
+            "new_files": len(results["new_files"]),
+            "modified_files": len(results["modified_files"]),
+            "removed_files": len(results["removed_files"]),
+            "chunks_added": results["total_chunks_added"],
+            "chunks_removed": results["total_chunks_removed"],
+            "errors": results["errors"][:20],
+            "processing_time": results["processing_time"]
+        }
+        job["status"] = "succeeded"
+    except Exception as e:
+        logger.error(f"Index job {job['id']} failed: {e}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+    job["finished_at"] = datetime.now().isoformat()
+    _write_job(path, job)
+
+
+class IndexJobManager:
+    """Queue of incremental index updates, run one at a time in worker processes.
+
+    Each job is a JSON file in ``jobs_dir`` holding its status ("queued",
+    "running", "succeeded" or "failed"), timestamps, progress and result,
+    so it can be read by ID while it runs and after it ends. A job runs in
+    a fresh process at ``index_job_nice`` niceness with at most
+    ``index_job_threads`` compute threads, so searches in the parent keep
+    their CPU, and the index writer lock keeps it from overlapping an
+    update started elsewhere. Submitting while a job is still queued
+    returns that job instead of queueing another. ``on_finished`` is
+    called with each job once it has ended, so the caller can pick up
+    what it wrote to the index.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        jobs_dir: Optional[Path] = None,
+        on_finished: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        """Initialize the manager; jobs left running by a previous process are marked failed."""
+        self.config = config
+        self.on_finished = on_finished
+        # Beside the index directory, which a full reindex replaces
+        self.jobs_dir = Path(jobs_dir or config.chroma_persist_dir.parent / "index_jobs")
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        for job in self.list():
+            if job["status"] in ("queued", "running"):
+                job.update(status="failed", error="Interrupted by a restart", finished_at=datetime.now().isoformat())
+                _write_job(self._path(job["id"]), job)
+
+    def _path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def submit(self) -> Dict[str, Any]:
+        """Queue an update of all source directories and return its job."""
+        with self._lock:
+            for job in self.list():
+                if job["status"] == "queued":
+                    return job
+            job = {
+                "id": uuid.uuid4().hex[:12],
+                "status": "queued",
+                "created_at": datetime.now().isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "progress": None,
+                "result": None,
+                "error": None
+            }
+            _write_job(self._path(job["id"]), job)
+            self._prune()
+            self._queue.put(job["id"])
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_jobs, name="index-jobs", daemon=True)
+                self._thread.start()
+        logger.info(f"Queued index job {job['id']}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job by ID, or None if unknown."""
+        if not job_id.isalnum():
+            return None
+        try:
+            return json.loads(self._path(job_id).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def list(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Jobs, newest first."""
+        jobs = []
+        for path in self.jobs_dir.glob("*.json"):
+            try:
+                jobs.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        jobs.sort(key=lambda job: job["created_at"], reverse=True)
+        return jobs[:limit] if limit else jobs
+
+    def _prune(self):
+        finished = [job for job in self.list() if job["status"] in ("succeeded", "failed")]
+        for job in finished[MAX_FINISHED_JOBS:]:
+            self._path(job["id"]).unlink(missing_ok=True)
+
+    def _run_jobs(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            except Exception as e:
+                # Mark the job failed and keep serving the queue
+                logger.error(f"Index job {job_id} could not be run: {e}")
+                try:
+                    job = self.get(job_id)
+                    if job is not None and job["status"] in ("queued", "running"):
+                        job.update(status="failed", error=str(e), finished_at=datetime.now().isoformat())
+                        _write_job(self._path(job_id), job)
+                except Exception as write_error:
+                    logger.error(f"Could not record the failure of index job {job_id}: {write_error}")
+
+    def _run(self, job_id: str):
+        with self._lock:
+            job = self.get(job_id)
+            job.update(status="running", started_at=datetime.now().isoformat())
+            _write_job(self._path(job_id), job)
+
+        # A fresh interpreter: the parent's model, caches and threads are not inherited
+        source_root = str(Path(__file__).resolve().parents[2])
+        env = dict(
+            os.environ,
+            PYTHONPATH=os.pathsep.join(filter(None, [source_root, os.environ.get("PYTHONPATH")])),
+            INDEX_JOB_CONFIG=self.config.model_dump_json(),
+            # Read by torch when it is imported
+            OMP_NUM_THREADS=str(self.config.index_job_threads),
+            MKL_NUM_THREADS=str(self.config.index_job_threads),
+            TOKENIZERS_PARALLELISM="false"
+        )
+        process = subprocess.Popen(
+            [sys.executable, "-m", __name__, str(self._path(job_id)), "--nice", str(self.config.index_job_nice)],
+            env=env
+        )
+        logger.info(f"Index job {job_id} running in process {process.pid}")
+        exit_code = process.wait()
+
+        job = self.get(job_id)
+        if job["status"] == "running":
+            # The worker died before recording an outcome
+            job.update(
+                status="failed",
+                error=f"Worker process exited with code {exit_code}",
+                finished_at=datetime.now().isoformat()
+            )
+            _write_job(self._path(job_id), job)
+        logger.info(f"Index job {job_id} {job['status']}")
+        if self.on_finished is not None:
+            self.on_finished(job)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one index job; started by IndexJobManager")
+    parser.add_argument("job_path", type=Path)
+    parser.add_argument("--nice", type=int, default=0)
+    args = parser.parse_args()
+    if args.nice > 0:
+        os.nice(args.nice)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    run_index_job(args.job_path, Config.model_validate_json(os.environ["INDEX_JOB_CONFIG"]))
@@ -0,0 +1,35 @@
+"""Opaque cursors for paging through search results."""
+
+import base64
+import binascii
+import hashlib
+import json
+from typing import Any, Tuple
+
+
+class CursorError(ValueError):
+    """Raised when a cursor is malformed or belongs to a different search."""
+
+
+def search_fingerprint(*params: Any) -> str:
+    """Short stable hash of a query and the parameters that shape its ranking."""
+    return hashlib.sha1(json.dumps(params, default=str).encode()).hexdigest()[:16]
+
+
+def encode_cursor(fingerprint: str, offset: int) -> str:
+    """URL-safe cursor pointing at ``offset`` in the ranking identified by ``fingerprint``."""
+    payload = json.dumps({"f": fingerprint, "o": offset}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Return the fingerprint and offset stored in a cursor."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(payload)
+        fingerprint, offset = str(data["f"]), int(data["o"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise CursorError(f"Invalid cursor: {e}") from e
+    if offset < 0:
+        raise CursorError("Invalid cursor: negative offset")
+    return fingerprint, offset
@@ -0,0 +1,93 @@
+"""Persisted log of search requests, used to precompute the most frequent ones."""
+
+import json
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueryLog:
+    """Append-only JSON lines file of search requests.
+
+    Each line holds the time and the ``search_page`` arguments of one
+    request. When the file grows past ``max_bytes`` it is moved to
+    ``<name>.1``, replacing the previous one, so at most twice that is kept.
+    Lines are written by a background thread, so recording a request never
+    waits on the disk; when ``max_pending`` lines are already waiting,
+    further ones are dropped.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 50 * 1024 * 1024, max_pending: int = 10000):
+        """Initialize a log at ``path``; the file is created on the first record."""
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def rotated_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".1")
+
+    def record(self, params: Dict[str, Any]):
+        """Queue one request for writing; failures are logged, never raised."""
+        line = json.dumps({"ts": round(time.time(), 3), "params": params}, sort_keys=True)
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            logger.warning(f"Query log {self.path} is falling behind, dropped a request")
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_lines, name="query-log", daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Wait until every recorded request has been written."""
+        self._queue.join()
+
+    def _write_lines(self):
+        while True:
+            lines = [self._queue.get()]
+            while True:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if self.path.exists() and self.path.stat().st_size > self.max_bytes:
+                    self.path.replace(self.rotated_path)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(line + "\n" for line in lines))
+            except OSError as e:
+                logger.warning(f"Could not write query log {self.path}: {e}")
+            for _ in lines:
+                self._queue.task_done()
+
+    def top(self, n: int) -> List[Dict[str, Any]]:
+        """Arguments of the ``n`` most frequent requests, most frequent first."""
+        if n <= 0:
+            return []
+        self.flush()
+        counts: Counter = Counter()
+        for path in (self.rotated_path, self.path):
+            if not path.exists():
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            params = json.loads(line)["params"]
+                        except (ValueError, KeyError, TypeError):
+                            continue
+                        counts[json.dumps(params, sort_keys=True)] += 1
+            except OSError as e:
+                logger.warning(f"Could not read query log {path}: {e}")
+        return [json.loads(key) for key, _ in counts.most_common(n)]
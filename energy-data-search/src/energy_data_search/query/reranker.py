@@ -0,0 +1,149 @@
+"""Cross-encoder reranking of retrieved candidates under a latency budget."""
+
+import logging
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from ..utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """Re-score (query, chunk) pairs with a CPU cross-encoder.
+
+    Scores are cached per (query, chunk ID). The time per uncached pair is
+    tracked as a moving average. When the uncached candidates would not fit
+    in the budget, only as many as fit are scored. If none fit, the stage is
+    skipped and the retrieval order is kept.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        cache_size: int = 4096,
+        max_length: int = 512,
+        batch_size: int = 32
+    ):
+        """Initialize the reranker; the model is loaded on first use."""
+        self.model_name = model_name
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.cache = LRUCache(cache_size)
+        self._model = None
+        # Searches on worker threads can race to the first access
+        self._load_lock = threading.Lock()
+        # Moving average of milliseconds per scored pair, seeded conservatively
+        self.ms_per_pair = 5.0
+        self.counters = {"queries": 0, "pairs_scored": 0, "truncated": 0, "skipped": 0}
+
+    @property
+    def model(self):
+        """Cross-encoder model, loaded on first access."""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    logger.info(f"Loading cross-encoder {self.model_name}")
+                    self._model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+        return self._model
+
+    def rerank(
+        self,
+        query: str,
+        candidates: List[Any],
+        k: int,
+        budget_ms: Optional[float] = None
+    ) -> Tuple[List[Any], Dict[str, Any]]:
+        """Reorder candidates by cross-encoder score and keep the top k.
+
+        Candidates are SearchResult-like objects with ``chunk_id`` and
+        ``content``; they are scored in retrieval order, so anything cut by
+        the budget is the tail of the list. Unscored candidates follow the
+        scored ones in their original order. Returns the results and a dict
+        describing what was done.
+        """
+        start = time.perf_counter()
+        self.counters["queries"] += 1
+        scores: Dict[int, float] = {}
+        uncached = []
+        for i, candidate in enumerate(candidates):
+            cached = self.cache.get((query, candidate.chunk_id)) if candidate.chunk_id else None
+            if cached is not None:
+                scores[i] = cached
+            else:
+                uncached.append(i)
+
+        limit = len(uncached)
+        if budget_ms is not None and uncached:
+            limit = min(limit, int(budget_ms / self.ms_per_pair))
+        info = {"candidates": len(candidates), "cached": len(scores), "scored": 0, "status": "reranked"}
+        if limit < len(uncached):
+            info["status"] = "truncated" if limit > 0 else "skipped"
+            self.counters[info["status"]] += 1
+        if limit <= 0 and not scores:
+            info["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            return candidates[:k], info
+
+        to_score = uncached[:limit]
+        if to_score:
+            try:
+                # Load the model before timing so loading does not skew the estimate
+                model = self.model
+                model_start = time.perf_counter()
+                predicted = model.predict(
+                    [(query, candidates[i].content) for i in to_score],
+                    batch_size=self.batch_size,
+                    show_progress_bar=False
+                )
+                elapsed = (time.perf_counter() - model_start) * 1000
+                self.ms_per_pair = 0.8 * self.ms_per_pair + 0.2 * (elapsed / len(to_score))
+            except Exception as e:
+                logger.error(f"Reranking failed, keeping retrieval order: {e}")
+                info["status"] = "failed"
+                return candidates[:k], info
+
+            for i, score in zip(to_score, predicted):
+                scores[i] = float(score)
+                if candidates[i].chunk_id:
+                    self.cache.put((query, candidates[i].chunk_id), float(score))
+            self.counters["pairs_scored"] += len(to_score)
+            info["scored"] = len(to_score)
+
+        scored = sorted(scores, key=lambda i: scores[i], reverse=True)
+        unscored = [i for i in range(len(candidates)) if i not in scores]
+        output = []
+        for i in scored + unscored:
+            candidate = candidates[i]
+            candidate.rerank_score = scores.get(i)
+            output.append(candidate)
+
+        info["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return output[:k], info
+
+    def warmup(self, pairs: List[Tuple[str, str]]):
+        """Load the model and score (query, text) pairs twice, timing the second run.
+
+        The warm run seeds the per-pair latency estimate, so the first
+        budgeted query is not cut short by the conservative default.
+        """
+        if not pairs:
+            return
+        try:
+            self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+            start = time.perf_counter()
+            self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+            self.ms_per_pair = (time.perf_counter() - start) * 1000 / len(pairs)
+        except Exception as e:
+            logger.error(f"Cross-encoder warmup failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Reranking counters, per-pair latency estimate and score cache statistics."""
+        return {
+            "model": self.model_name,
+            **self.counters,
+            "ms_per_pair": round(self.ms_per_pair, 3),
+            "cache": self.cache.stats()
+        }
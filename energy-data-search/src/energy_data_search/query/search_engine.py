@@ -1,16 +1,39 @@
 """Search engine for querying energy documents."""
 
+import json
 import logging
-from typing import List, Optional, Dict, Any
-from dataclasses import dataclass
+import re
+import threading
+import time
+from typing import List, Optional, Dict, Any, Tuple
+from dataclasses import dataclass, replace
 from pathlib import Path
 
+import numpy as np
+
 from ..config import Config
-from ..indexers.chromadb_indexer import ChromaDBIndexer
+from ..indexers.chromadb_indexer import ChromaDBIndexer, SEARCH_MODES
+from ..indexers.snapshot import SnapshotIndexer, export_snapshot, import_snapshot
 from ..loaders.document_loader import DocumentLoader
+from ..loaders.document_metadata import date_to_int, make_snippet
+from ..utils.cache import LRUCache, TTLCache
+from ..utils.index_tracker import IndexTracker
+from .diversity import collapse_by_source, mmr_select
+from .pagination import CursorError, decode_cursor, encode_cursor, search_fingerprint
+from .reranker import CrossEncoderReranker
+from .semantic_cache import SemanticCache
+from .trace import SearchTrace, timed
 
 logger = logging.getLogger(__name__)
 
+# Synthetic batch embedded and searched at warmup
+WARMUP_QUERIES = [
+    "ERCOT nodal protocol revision request",
+    "battery energy storage resource telemetry requirements",
+    "day-ahead market settlement and ancillary services",
+    "transmission outage coordination and congestion",
+]
+
 
 @dataclass
 class SearchResult:
@@ -19,6 +42,13 @@ class SearchResult:
     source: str
     score: float
     metadata: Dict[str, Any]
+    chunk_id: Optional[str] = None
+    rerank_score: Optional[float] = None
+    # Results from the same source folded into this one when collapsing
+    source_hits: int = 1
+    snippet: Optional[str] = None
+    # False while content holds only the snippet; see EnergyDataSearchEngine.hydrate
+    hydrated: bool = True
     
     def __str__(self) -> str:
         """String representation of search result."""
@@ -29,23 +59,206 @@ class SearchResult:
         )
 
 
+def build_where_clause(
+    directory: Optional[str] = None,
+    file_type: Optional[str] = None,
+    document_types: Optional[List[str]] = None,
+    date_from: Optional[Any] = None,
+    date_to: Optional[Any] = None
+) -> Optional[Dict[str, Any]]:
+    """ChromaDB where clause for the search filters, or None if there are none.
+    
+    Dates are ``YYYY-MM-DD`` strings, dates or ``YYYYMMDD`` integers and
+    bound ``document_date`` inclusively. Raises ValueError for bad dates.
+    """
+    conditions = []
+    if directory:
+        conditions.append({"directory": directory})
+    if file_type:
+        conditions.append({"file_type": file_type})
+    if document_types:
+        conditions.append({"document_type": {"$in": list(document_types)}})
+    if date_from:
+        conditions.append({"document_date": {"$gte": date_to_int(date_from)}})
+    if date_to:
+        conditions.append({"document_date": {"$lte": date_to_int(date_to)}})
+    
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+@dataclass
+class SearchPage:
+    """One page of search results and the cursor for the next page."""
+    results: List[SearchResult]
+    offset: int = 0
+    next_cursor: Optional[str] = None
+
+
+@dataclass
+class DocumentChunk:
+    """A stored chunk and its position in its source document."""
+    chunk_id: str
+    content: str
+    metadata: Dict[str, Any]
+    # None for chunks indexed before positions were stored
+    chunk_index: Optional[int] = None
+
+
+@dataclass
+class DocumentContext:
+    """A chunk looked up by ID with the chunks around it, in document order."""
+    chunk: DocumentChunk
+    before: List[DocumentChunk]
+    after: List[DocumentChunk]
+
+
 class EnergyDataSearchEngine:
     """Main search engine for energy data documents."""
     
-    def __init__(self, config: Optional[Config] = None):
+    def __init__(self, config: Optional[Config] = None, indexer=None):
         """Initialize search engine with configuration."""
         self.config = config or Config()
         
-        self.indexer = ChromaDBIndexer(
-            persist_directory=self.config.chroma_persist_dir,
-            collection_name=self.config.collection_name,
-            embedding_model=self.config.embedding_model
-        )
+        if indexer is not None:
+            self.indexer = indexer
+        elif self.config.snapshot_path:
+            self.indexer = SnapshotIndexer.from_config(self.config)
+        else:
+            self.indexer = ChromaDBIndexer.from_config(self.config)
+        # Collection or snapshot this engine serves; see index_replaced()
+        self.index_identity = self.indexer.stored_identity()
         
         self.loader = DocumentLoader(
             chunk_size=self.config.chunk_size,
-            chunk_overlap=self.config.chunk_overlap
+            chunk_overlap=self.config.chunk_overlap,
+            snippet_length=self.config.snippet_length
+        )
+        
+        # Two-level cache, dropped whenever the index generation changes
+        self.query_cache = LRUCache(self.config.query_cache_size)
+        self.result_cache = TTLCache(self.config.result_cache_size, self.config.result_cache_ttl)
+        # Ranked lists behind pagination cursors, extended as deeper pages are requested
+        self.page_cache = TTLCache(self.config.page_cache_size, self.config.result_cache_ttl)
+        # Document lookups with their neighbouring chunks, by chunk ID and context size
+        self.document_cache = LRUCache(self.config.document_cache_size)
+        # Results of recent queries, reused for paraphrases with the same parameters
+        self.semantic_cache = SemanticCache(
+            max_entries=self.config.semantic_cache_size,
+            threshold=self.config.semantic_cache_threshold,
+            audit_rate=self.config.semantic_cache_audit_rate,
+            min_overlap=self.config.semantic_cache_min_overlap
         )
+        self._cache_generation = self.indexer.generation.current()
+        # Reopen the index and clear the caches when another process writes
+        # it. Off when a new engine is swapped in for each write instead, so
+        # this one keeps serving the index as it was opened; see index_changed()
+        self.follow_writes = True
+        # Calls running on this engine, waited for by close()
+        self._in_flight = 0
+        self._in_flight_done = threading.Condition()
+        
+        # Scores are keyed by content-hash chunk IDs, so they survive index writes
+        self.reranker = CrossEncoderReranker(
+            model_name=self.config.rerank_model,
+            cache_size=self.config.rerank_cache_size
+        )
+    
+    def _check_cache_generation(self):
+        """Reopen the index and invalidate the caches if the index was written since they were filled."""
+        if not self.follow_writes:
+            return
+        generation = self.indexer.generation.current()
+        if generation != self._cache_generation:
+            logger.info(f"Index generation changed ({self._cache_generation} -> {generation}), clearing caches")
+            # Refilled from stale stores otherwise
+            self.indexer.reopen_if_written()
+            self.query_cache.clear()
+            self.result_cache.clear()
+            self.page_cache.clear()
+            self.semantic_cache.clear()
+            self.document_cache.clear()
+            self._cache_generation = generation
+    
+    def refresh(self):
+        """Pick up writes made to the index by another process now rather than on the next search."""
+        self._check_cache_generation()
+    
+    def index_replaced(self) -> bool:
+        """Whether the configured location now holds another index than this engine opened.
+        
+        Writes to the open collection are followed in place. A collection
+        cleared, compacted or rebuilt in a new directory, or a snapshot path
+        pointed at another bundle, needs a new engine; see ``reopen``. False
+        while no index is stored.
+        """
+        identity = self.indexer.stored_identity()
+        return identity is not None and identity != self.index_identity
+    
+    def index_changed(self) -> bool:
+        """Whether the index was replaced, or written since this engine last read it."""
+        return self.index_replaced() or self.indexer.generation.current() != self._cache_generation
+    
+    def reopen(self) -> "EnergyDataSearchEngine":
+        """Open the index now stored at the configured location in a new engine.
+        
+        This engine keeps serving meanwhile. The new one shares the
+        embedding model and query embedding cache when the embedding model
+        is unchanged, and the cross-encoder, since they do not depend on
+        the index.
+        """
+        if self.config.snapshot_path:
+            indexer = SnapshotIndexer.from_config(self.config)
+        else:
+            indexer = ChromaDBIndexer.from_config(self.config)
+        engine = EnergyDataSearchEngine(self.config, indexer=indexer)
+        if indexer.embedding_model == self.indexer.embedding_model:
+            indexer._embeddings = self.indexer._embeddings
+            engine.query_cache = self.query_cache
+        engine.reranker = self.reranker
+        engine.follow_writes = self.follow_writes
+        logger.info(f"Reopened index {engine.index_identity} (was {self.index_identity})")
+        return engine
+    
+    def acquire(self) -> "EnergyDataSearchEngine":
+        """Count a call as running on this engine until ``release``, so ``close`` waits for it."""
+        with self._in_flight_done:
+            self._in_flight += 1
+        return self
+    
+    def release(self):
+        """End a call counted by ``acquire``."""
+        with self._in_flight_done:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._in_flight_done.notify_all()
+    
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Release the index once the calls running on this engine have finished.
+        
+        Waits up to ``timeout`` seconds (forever if None). If calls are still
+        running then, the index is left open for them and False is returned.
+        The engine must not be used after a successful close.
+        """
+        with self._in_flight_done:
+            if not self._in_flight_done.wait_for(lambda: self._in_flight == 0, timeout):
+                logger.warning(f"{self._in_flight} calls still running, leaving index {self.index_identity} open")
+                return False
+        self.indexer.close()
+        logger.info(f"Closed index {self.index_identity}")
+        return True
+    
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed queries in one batch, reusing cached vectors for repeated query text."""
+        embeddings = [self.query_cache.get(query) for query in queries]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            computed = self.indexer.embed_queries([queries[i] for i in missing])
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+                self.query_cache.put(queries[i], embedding)
+        return embeddings
     
     def index_directory(self, directory: Path, recursive: bool = True) -> int:
         """Index all documents in a directory."""
@@ -58,6 +271,7 @@ class EnergyDataSearchEngine:
             return 0
         
         count = self.indexer.add_documents(documents, batch_size=self.config.batch_size)
+        self.indexer.refresh_related_documents(sorted({doc.metadata["source"] for doc in documents}))
         logger.info(f"Indexed {count} document chunks from {directory}")
         return count
     
@@ -84,43 +298,630 @@ class EnergyDataSearchEngine:
         max_results: Optional[int] = None,
         filter_directory: Optional[str] = None,
         filter_file_type: Optional[str] = None,
-        score_threshold: Optional[float] = None
+        score_threshold: Optional[float] = None,
+        search_ef: Optional[int] = None,
+        mode: Optional[str] = None,
+        rerank: Optional[bool] = None,
+        document_types: Optional[List[str]] = None,
+        date_from: Optional[Any] = None,
+        date_to: Optional[Any] = None,
+        collapse: Optional[bool] = None,
+        mmr: Optional[bool] = None,
+        hydrate: Optional[bool] = None,
+        trace: Optional[SearchTrace] = None
     ) -> List[SearchResult]:
         """Search for documents matching the query."""
+        return self.search_many(
+            [query],
+            max_results=max_results,
+            filter_directory=filter_directory,
+            filter_file_type=filter_file_type,
+            score_threshold=score_threshold,
+            search_ef=search_ef,
+            mode=mode,
+            rerank=rerank,
+            document_types=document_types,
+            date_from=date_from,
+            date_to=date_to,
+            collapse=collapse,
+            mmr=mmr,
+            hydrate=hydrate,
+            trace=trace
+        )[0]
+    
+    def search_many(
+        self,
+        queries: List[str],
+        max_results: Optional[int] = None,
+        filter_directory: Optional[str] = None,
+        filter_file_type: Optional[str] = None,
+        score_threshold: Optional[float] = None,
+        search_ef: Optional[int] = None,
+        mode: Optional[str] = None,
+        rerank: Optional[bool] = None,
+        document_types: Optional[List[str]] = None,
+        date_from: Optional[Any] = None,
+        date_to: Optional[Any] = None,
+        collapse: Optional[bool] = None,
+        mmr: Optional[bool] = None,
+        hydrate: Optional[bool] = None,
+        trace: Optional[SearchTrace] = None
+    ) -> List[List[SearchResult]]:
+        """Search several queries with one batched embedding pass and one index query.
+        
+        Returns one result list per query, in input order. Cached and
+        duplicate queries are not searched again. ``mode`` is "vector" or
+        "hybrid" and defaults to the configured search mode. With ``rerank``
+        (default from config) ``rerank_candidates`` results are retrieved
+        and re-scored by a cross-encoder within ``rerank_budget_ms``.
+        ``document_types`` and the inclusive ``date_from``/``date_to`` bounds
+        filter on ingest-time metadata inside the store. ``collapse`` keeps
+        one chunk per source with its hit count, and ``mmr`` picks diverse
+        results; both work on ``diversity_candidates`` retrieved chunks.
+        Without ``hydrate`` (default from config) the store returns IDs,
+        scores and metadata only, and each result's content is its stored
+        snippet until passed to ``hydrate()``. Reranking needs the full text,
+        so reranked candidates are always hydrated. Queries missing the
+        result cache but within ``semantic_cache_threshold`` of a recent
+        query with the same parameters and numbers reuse its results.
+        A ``trace`` passed in is filled with the time spent per stage for
+        the whole batch.
+        """
+        start = time.perf_counter()
         max_results = max_results or self.config.max_results
         score_threshold = score_threshold or self.config.similarity_threshold
+        mode = mode or self.config.search_mode
+        rerank = self.config.rerank if rerank is None else rerank
+        collapse = self.config.collapse_by_source if collapse is None else collapse
+        mmr = self.config.mmr if mmr is None else mmr
+        hydrate = self.config.hydrate_results if hydrate is None else hydrate
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+        
+        filter_dict = build_where_clause(filter_directory, filter_file_type, document_types, date_from, date_to)
+        filter_key = json.dumps(filter_dict, sort_keys=True)
+        
+        self._check_cache_generation()
+        
+        def cache_key(query: str) -> tuple:
+            return (query, filter_key, max_results, score_threshold, search_ef, mode, rerank, collapse, mmr, hydrate)
+        
+        def semantic_key(query: str) -> tuple:
+            # Embeddings barely separate "NPRR 1186" from "NPRR 1187", so numbers must match exactly
+            return cache_key("") + (tuple(sorted(re.findall(r"\d+", query))),)
+        
+        def finish(output: List[Optional[List[SearchResult]]]) -> List[List[SearchResult]]:
+            if trace is not None:
+                trace.queries += len(queries)
+                trace.total_ms = (time.perf_counter() - start) * 1000
+            return [results if results is not None else [] for results in output]
         
-        filter_dict = {}
-        if filter_directory:
-            filter_dict["directory"] = filter_directory
-        if filter_file_type:
-            filter_dict["file_type"] = filter_file_type
+        output: List[Optional[List[SearchResult]]] = [None] * len(queries)
+        pending: Dict[str, List[int]] = {}
+        for position, query in enumerate(queries):
+            cached = self.result_cache.get(cache_key(query))
+            if cached is not None:
+                output[position] = list(cached)
+                if trace is not None:
+                    trace.cache_hits += 1
+            else:
+                pending.setdefault(query, []).append(position)
         
-        filter_dict = filter_dict or None
+        if pending:
+            texts = list(pending)
+            k = max_results
+            if rerank:
+                k = max(k, self.config.rerank_candidates)
+            if collapse or mmr:
+                k = max(k, self.config.diversity_candidates)
+            try:
+                with timed(trace, "embed"):
+                    embeddings = self._embed_queries(texts)
+            except Exception as e:
+                logger.error(f"Search error: {e}")
+                return finish(output)
+            
+            # A sample of semantic hits is searched anyway to audit the cache
+            audited = {}
+            searched = []
+            for query, embedding in zip(texts, embeddings):
+                hit = self.semantic_cache.get(embedding, semantic_key(query))
+                if hit is not None and not self.semantic_cache.should_audit():
+                    search_results, cached_query, similarity = hit
+                    logger.debug(f"Semantic cache hit: '{query[:50]}' ~ '{cached_query[:50]}' ({similarity:.3f})")
+                    if trace is not None:
+                        trace.semantic_cache_hits += 1
+                    self.result_cache.put(cache_key(query), search_results)
+                    for position in pending[query]:
+                        output[position] = list(search_results)
+                    continue
+                if hit is not None:
+                    audited[query] = hit
+                searched.append((query, embedding))
+            texts = [query for query, _ in searched]
+            embeddings = [embedding for _, embedding in searched]
+            if not texts:
+                return finish(output)
+            
+            try:
+                with timed(trace, "ann"):
+                    results = self.indexer.search_many_by_vector(
+                        embeddings,
+                        k=k,
+                        filter_dict=filter_dict,
+                        score_threshold=score_threshold,
+                        ef=search_ef,
+                        queries=texts,
+                        mode=mode,
+                        include_content=hydrate
+                    )
+                    if collapse:
+                        self._retrieve_distinct_sources(
+                            results, texts, embeddings, k, max_results, filter_dict, score_threshold, search_ef, mode,
+                            hydrate
+                        )
+            except Exception as e:
+                logger.error(f"Search error: {e}")
+                results = None
+            
+            retrieved = [
+                [self._to_result(doc, score, hydrate) for doc, score in (results[i] if results else [])]
+                for i in range(len(texts))
+            ]
+            if trace is not None:
+                trace.candidates += sum(len(search_results) for search_results in retrieved)
+            if not hydrate:
+                with timed(trace, "hydrate"):
+                    self._fill_snippets([result for search_results in retrieved for result in search_results])
+            
+            for query, embedding, search_results in zip(texts, embeddings, retrieved):
+                if rerank and search_results:
+                    with timed(trace, "hydrate"):
+                        search_results = self.hydrate(search_results)
+                    # Diversity needs the whole reranked candidate list
+                    with timed(trace, "rerank"):
+                        search_results, _ = self.reranker.rerank(
+                            query,
+                            search_results,
+                            len(search_results) if collapse or mmr else max_results,
+                            budget_ms=self.config.rerank_budget_ms
+                        )
+                if collapse or mmr:
+                    with timed(trace, "diversify"):
+                        search_results = self._diversify(search_results, max_results, collapse, mmr)
+                if results is not None:
+                    self.result_cache.put(cache_key(query), search_results)
+                    if query in audited:
+                        cached_results, cached_query, _ = audited[query]
+                        self.semantic_cache.audit(cached_results, search_results, query, cached_query)
+                    self.semantic_cache.put(embedding, semantic_key(query), query, search_results)
+                for position in pending[query]:
+                    output[position] = list(search_results)
+        
+        return finish(output)
+    
+    def _retrieve_distinct_sources(
+        self,
+        results: List[list],
+        texts: List[str],
+        embeddings: List[List[float]],
+        k: int,
+        max_results: int,
+        filter_dict: Optional[Dict[str, Any]],
+        score_threshold: float,
+        search_ef: Optional[int],
+        mode: str,
+        include_content: bool = True
+    ):
+        """Search deeper, in place, for queries whose hits cover fewer than max_results sources."""
+        def short(hits: list) -> bool:
+            return len(hits) == k and len({doc.metadata.get("source") for doc, _ in hits}) < max_results
         
-        results = self.indexer.search(
-            query=query,
-            k=max_results,
-            filter_dict=filter_dict,
-            score_threshold=score_threshold
+        pending = [i for i, hits in enumerate(results) if short(hits)]
+        while pending and k < self.config.overfetch_limit:
+            k = min(k * 2, self.config.overfetch_limit)
+            deeper = self.indexer.search_many_by_vector(
+                [embeddings[i] for i in pending],
+                k=k,
+                filter_dict=filter_dict,
+                score_threshold=score_threshold,
+                ef=search_ef,
+                queries=[texts[i] for i in pending],
+                mode=mode,
+                include_content=include_content
+            )
+            for i, hits in zip(pending, deeper):
+                results[i] = hits
+            pending = [i for i in pending if short(results[i])]
+    
+    def _to_result(self, doc, score: float, hydrated: bool) -> SearchResult:
+        """Search result for a retrieved chunk; unhydrated chunks carry their snippet as content."""
+        metadata = dict(doc.metadata)
+        snippet = metadata.pop("snippet", None)
+        if hydrated and snippet is None:
+            snippet = make_snippet(doc.page_content, self.config.snippet_length)
+        return SearchResult(
+            content=doc.page_content if hydrated else snippet or "",
+            source=metadata.get("source", "Unknown"),
+            score=score,
+            metadata=metadata,
+            chunk_id=doc.id,
+            snippet=snippet,
+            hydrated=hydrated
         )
+    
+    def _fill_snippets(self, results: List[SearchResult]):
+        """Make snippets, in place, for chunks indexed before snippets were stored."""
+        missing = [result for result in results if result.snippet is None]
+        if not missing:
+            return
+        try:
+            documents = {doc.id: doc for doc in self.indexer.get_documents([r.chunk_id for r in missing])}
+        except Exception as e:
+            logger.warning(f"Could not fetch chunks for snippets: {e}")
+            return
+        for result in missing:
+            if result.chunk_id in documents:
+                result.snippet = make_snippet(documents[result.chunk_id].page_content, self.config.snippet_length)
+                result.content = result.snippet
+    
+    def hydrate(self, results: List[SearchResult]) -> List[SearchResult]:
+        """Results with full chunk content, fetched for unhydrated ones in one batched get.
+        
+        Hydrated copies are returned, so cached results keep their snippets.
+        Chunks no longer in the index are returned unchanged.
+        """
+        pending = [result.chunk_id for result in results if not result.hydrated and result.chunk_id]
+        if not pending:
+            return results
+        try:
+            documents = {doc.id: doc for doc in self.indexer.get_documents(pending)}
+        except Exception as e:
+            logger.error(f"Could not hydrate results: {e}")
+            return results
+        return [
+            replace(result, content=documents[result.chunk_id].page_content, hydrated=True)
+            if not result.hydrated and result.chunk_id in documents else result
+            for result in results
+        ]
+    
+    def get_chunks(self, chunk_ids: List[str]) -> Dict[str, str]:
+        """Full content of chunks by ID, fetched in one batched get; unknown IDs are left out."""
+        return {doc.id: doc.page_content for doc in self.indexer.get_documents(chunk_ids)}
+    
+    def get_document(self, chunk_id: str, context: Optional[int] = None) -> Optional[DocumentContext]:
+        """A chunk by ID with up to ``context`` chunks before and after it from its source.
+        
+        The neighbours are fetched in one get by the ``chunk_index`` stored
+        at ingest; chunks indexed before it was stored come back without
+        them. Lookups are cached until the index changes. Returns None if
+        the chunk is not in the index.
+        """
+        context = self.config.document_context_chunks if context is None else context
+        self._check_cache_generation()
+        key = (chunk_id, context)
+        cached = self.document_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        documents = self.indexer.get_documents([chunk_id])
+        if not documents:
+            return None
         
-        search_results = []
-        for doc, score in results:
-            search_results.append(
-                SearchResult(
-                    content=doc.page_content,
-                    source=doc.metadata.get("source", "Unknown"),
-                    score=score,
-                    metadata=doc.metadata
-                )
+        def to_chunk(doc) -> DocumentChunk:
+            return DocumentChunk(
+                chunk_id=doc.id,
+                content=doc.page_content,
+                metadata=doc.metadata,
+                chunk_index=doc.metadata.get("chunk_index")
             )
         
-        return search_results
+        chunk = to_chunk(documents[0])
+        before, after = [], []
+        source = chunk.metadata.get("source")
+        if context > 0 and chunk.chunk_index is not None and source:
+            neighbours = self.indexer.get_documents_where({"$and": [
+                {"source": source},
+                {"chunk_index": {"$gte": chunk.chunk_index - context}},
+                {"chunk_index": {"$lte": chunk.chunk_index + context}}
+            ]})
+            for neighbour in sorted(map(to_chunk, neighbours), key=lambda c: c.chunk_index):
+                if neighbour.chunk_index < chunk.chunk_index:
+                    before.append(neighbour)
+                elif neighbour.chunk_index > chunk.chunk_index:
+                    after.append(neighbour)
+        
+        document = DocumentContext(chunk=chunk, before=before, after=after)
+        self.document_cache.put(key, document)
+        return document
+    
+    def related_documents(self, sources: List[str], limit: Optional[int] = None) -> Dict[str, List[Tuple[str, float]]]:
+        """Most similar source files to each of ``sources``, with their similarity, best first.
+        
+        Read from the precomputed related-documents graph, so no search is
+        run; sources not in the graph get an empty list.
+        """
+        graph = self.indexer.related_documents
+        if graph is None:
+            return {source: [] for source in sources}
+        return {source: graph.related(source, limit) for source in sources}
+    
+    def _diversify(
+        self,
+        results: List[SearchResult],
+        k: int,
+        collapse: bool,
+        mmr: bool
+    ) -> List[SearchResult]:
+        """Collapse results by source and/or pick k of them by maximal marginal relevance."""
+        if collapse:
+            results = collapse_by_source(results)
+        if mmr and len(results) > k:
+            try:
+                vectors = self.indexer.get_embeddings([result.chunk_id for result in results])
+            except Exception as e:
+                logger.warning(f"Could not load candidate vectors for MMR, keeping rank order: {e}")
+                return results[:k]
+            # Cross-encoder logits are squashed to [0, 1] to be comparable with cosine similarity
+            relevance = np.array([
+                1 / (1 + np.exp(-result.rerank_score)) if result.rerank_score is not None else result.score
+                for result in results
+            ])
+            results = [results[i] for i in mmr_select(relevance, vectors, k, self.config.mmr_lambda)]
+        return results[:k]
+    
+    def search_page(
+        self,
+        query: str,
+        page_size: Optional[int] = None,
+        cursor: Optional[str] = None,
+        filter_directory: Optional[str] = None,
+        filter_file_type: Optional[str] = None,
+        score_threshold: Optional[float] = None,
+        search_ef: Optional[int] = None,
+        mode: Optional[str] = None,
+        rerank: Optional[bool] = None,
+        document_types: Optional[List[str]] = None,
+        date_from: Optional[Any] = None,
+        date_to: Optional[Any] = None,
+        collapse: Optional[bool] = None,
+        mmr: Optional[bool] = None,
+        hydrate: Optional[bool] = None,
+        trace: Optional[SearchTrace] = None
+    ) -> SearchPage:
+        """Return one page of results and a cursor for the next.
+        
+        The ranked list is kept in the page cache, so later pages are sliced
+        from it. When a page goes past its end the search is re-run deeper
+        and only chunks not already ranked are appended, so pages never
+        repeat a result. Raises CursorError if the cursor is malformed or
+        was issued for a different query or filters.
+        """
+        return self.search_pages(
+            [query],
+            page_size=page_size,
+            cursors=[cursor],
+            filter_directory=filter_directory,
+            filter_file_type=filter_file_type,
+            score_threshold=score_threshold,
+            search_ef=search_ef,
+            mode=mode,
+            rerank=rerank,
+            document_types=document_types,
+            date_from=date_from,
+            date_to=date_to,
+            collapse=collapse,
+            mmr=mmr,
+            hydrate=hydrate,
+            trace=trace
+        )[0]
+    
+    def search_pages(
+        self,
+        queries: List[str],
+        page_size: Optional[int] = None,
+        cursors: Optional[List[Optional[str]]] = None,
+        filter_directory: Optional[str] = None,
+        filter_file_type: Optional[str] = None,
+        score_threshold: Optional[float] = None,
+        search_ef: Optional[int] = None,
+        mode: Optional[str] = None,
+        rerank: Optional[bool] = None,
+        document_types: Optional[List[str]] = None,
+        date_from: Optional[Any] = None,
+        date_to: Optional[Any] = None,
+        collapse: Optional[bool] = None,
+        mmr: Optional[bool] = None,
+        hydrate: Optional[bool] = None,
+        trace: Optional[SearchTrace] = None
+    ) -> List[SearchPage]:
+        """Return one page per query, like ``search_page`` with a cursor per query.
+        
+        Queries whose page is not in the page cache are searched together
+        with ``search_many``, one batch per search depth; first pages of the
+        same size always share a batch. Raises CursorError if any cursor is
+        malformed or was issued for a different query or filters.
+        """
+        start = time.perf_counter()
+        cursors = cursors or [None] * len(queries)
+        page_size = page_size or self.config.max_results
+        score_threshold = score_threshold or self.config.similarity_threshold
+        mode = mode or self.config.search_mode
+        rerank = self.config.rerank if rerank is None else rerank
+        collapse = self.config.collapse_by_source if collapse is None else collapse
+        mmr = self.config.mmr if mmr is None else mmr
+        filter_dict = build_where_clause(filter_directory, filter_file_type, document_types, date_from, date_to)
+        hydrate = self.config.hydrate_results if hydrate is None else hydrate
+        fingerprints = [
+            search_fingerprint(query, filter_dict, score_threshold, search_ef, mode, rerank, collapse, mmr, hydrate)
+            for query in queries
+        ]
+        
+        offsets = []
+        for fingerprint, cursor in zip(fingerprints, cursors):
+            offset = 0
+            if cursor:
+                cursor_fingerprint, offset = decode_cursor(cursor)
+                if cursor_fingerprint != fingerprint:
+                    raise CursorError("Cursor was issued for a different query or filters")
+            offsets.append(offset)
+        
+        self._check_cache_generation()
+        rankings = [self.page_cache.get(fingerprint) or ([], False) for fingerprint in fingerprints]
+        # Positions to search, by depth; one extra result tells whether there is a next page
+        by_depth: Dict[int, List[int]] = {}
+        for i, (offset, (ranked, complete)) in enumerate(zip(offsets, rankings)):
+            needed = offset + page_size + 1
+            if len(ranked) < needed and not complete:
+                depth = min(max(needed, 2 * len(ranked)), self.config.overfetch_limit)
+                by_depth.setdefault(depth, []).append(i)
+            elif trace is not None:
+                # Sliced from the page cache
+                trace.queries += 1
+                trace.cache_hits += 1
+        
+        # Collapsed pages show each source once, even if its best chunk changed
+        def identity(result: SearchResult) -> Optional[str]:
+            return result.source if collapse else result.chunk_id
+        
+        for depth, positions in by_depth.items():
+            fresh_lists = self.search_many(
+                [queries[i] for i in positions],
+                max_results=depth,
+                filter_directory=filter_directory,
+                filter_file_type=filter_file_type,
+                score_threshold=score_threshold,
+                search_ef=search_ef,
+                mode=mode,
+                rerank=rerank,
+                document_types=document_types,
+                date_from=date_from,
+                date_to=date_to,
+                collapse=collapse,
+                mmr=mmr,
+                hydrate=hydrate,
+                trace=trace
+            )
+            for i, fresh in zip(positions, fresh_lists):
+                ranked, _ = rankings[i]
+                seen = {identity(result) for result in ranked}
+                ranked = ranked + [result for result in fresh if identity(result) not in seen]
+                complete = len(fresh) < depth or depth >= self.config.overfetch_limit
+                rankings[i] = (ranked, complete)
+                self.page_cache.put(fingerprints[i], rankings[i])
+        if trace is not None:
+            trace.total_ms = (time.perf_counter() - start) * 1000
+        
+        pages = []
+        for fingerprint, offset, (ranked, _) in zip(fingerprints, offsets, rankings):
+            end = offset + page_size
+            pages.append(SearchPage(
+                results=ranked[offset:end],
+                offset=offset,
+                next_cursor=encode_cursor(fingerprint, end) if len(ranked) > end else None
+            ))
+        return pages
+    
+    def warmup(self, searches: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Load the models, touch the index and precompute the results of common searches.
+        
+        A synthetic batch is embedded and searched on the indexer directly,
+        so it does not enter the caches; with reranking on, the cross-encoder
+        is loaded and timed as well. Each of ``searches`` is a dict of
+        ``search_page`` arguments, such as ``QueryLog.top()`` returns, and
+        its results land in the result, page and semantic caches. Returns
+        the milliseconds spent per step and the number precomputed.
+        """
+        start = time.perf_counter()
+        stats: Dict[str, Any] = {}
+        
+        step = time.perf_counter()
+        embeddings = self.indexer.embed_queries(WARMUP_QUERIES)
+        # Single queries run with a different batch shape
+        self.indexer.embed_queries(WARMUP_QUERIES[:1])
+        stats["embed_ms"] = round((time.perf_counter() - step) * 1000, 1)
+        
+        step = time.perf_counter()
+        hits = self.indexer.search_many_by_vector(
+            embeddings,
+            k=self.config.max_results,
+            score_threshold=self.config.similarity_threshold,
+            queries=WARMUP_QUERIES,
+            mode=self.config.search_mode
+        )
+        stats["index_ms"] = round((time.perf_counter() - step) * 1000, 1)
+        
+        if self.config.rerank:
+            step = time.perf_counter()
+            pairs = [(query, doc.page_content) for query, docs in zip(WARMUP_QUERIES, hits) for doc, _ in docs[:4]]
+            self.reranker.warmup(pairs or [(query, query) for query in WARMUP_QUERIES])
+            stats["rerank_ms"] = round((time.perf_counter() - step) * 1000, 1)
+        
+        step = time.perf_counter()
+        precomputed = 0
+        for params in searches or []:
+            try:
+                self.search_page(**params)
+                precomputed += 1
+            except Exception as e:
+                # Logged requests can outlive the filters or arguments they used
+                logger.warning(f"Could not precompute search {params}: {e}")
+        stats["precomputed"] = precomputed
+        stats["precompute_ms"] = round((time.perf_counter() - step) * 1000, 1)
+        stats["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(f"Warmup done in {stats['total_ms']:.0f} ms, {precomputed} searches precomputed")
+        return stats
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit ratio and memory use of the query embedding and result caches."""
+        stats = {
+            "index_generation": self._cache_generation,
+            "query_cache": self.query_cache.stats(),
+            "result_cache": self.result_cache.stats(),
+            "page_cache": self.page_cache.stats(),
+            "rerank_cache": self.reranker.cache.stats(),
+            "semantic_cache": self.semantic_cache.stats(),
+            "document_cache": self.document_cache.stats()
+        }
+        # Snapshot indexers read metadata from memory-mapped columns instead
+        if hasattr(self.indexer, "metadata_cache"):
+            stats["metadata_cache"] = self.indexer.metadata_cache.stats()
+        return stats
     
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the indexed documents."""
-        return self.indexer.get_collection_stats()
+        stats = self.indexer.get_collection_stats()
+        stats["index_generation"] = self.indexer.generation.current()
+        last_updated = self.indexer.generation.updated_at() or stats.get("snapshot_created_at")
+        if last_updated:
+            stats["last_updated"] = last_updated
+        # Source files are only known when the index is updated incrementally
+        tracker_file = self.config.chroma_persist_dir / "index_tracker.json"
+        if not self.config.snapshot_path and tracker_file.exists():
+            stats["source_files"] = IndexTracker(tracker_file).get_statistics()["total_files"]
+        return stats
+    
+    def export_snapshot(self, output_dir: Path) -> Dict[str, Any]:
+        """Export the index to a portable snapshot bundle."""
+        return export_snapshot(self.indexer, output_dir)
+    
+    def import_snapshot(self, snapshot_dir: Path, verify: bool = True, replace: bool = False) -> int:
+        """Bulk-load a snapshot bundle into an empty index, or replace its contents with ``replace``."""
+        count = import_snapshot(self.indexer, snapshot_dir, verify=verify, replace=replace)
+        logger.info(f"Imported {count} chunks from snapshot {snapshot_dir}")
+        return count
+    
+    def rebuild_lexical_index(self) -> int:
+        """Rebuild the BM25 index used by hybrid search from the stored chunks."""
+        return self.indexer.rebuild_lexical_index()
+    
+    def rebuild_related_documents(self) -> int:
+        """Rebuild the related-documents graph from the stored chunk embeddings."""
+        return self.indexer.rebuild_related_documents()
+    
+    def compact_index(self) -> Dict[str, Any]:
+        """Rebuild the vector index without deleted entries and reclaim disk space."""
+        return self.indexer.compact()
     
     def clear_index(self):
         """Clear all indexed documents."""
@@ -0,0 +1,140 @@
+"""Result cache looked up by query embedding similarity, so paraphrases share results."""
+
+import logging
+import random
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from ..utils.cache import estimate_size
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """Results of recent queries, served to new queries with a similar embedding.
+
+    Embeddings of cached queries are kept normalized in one matrix, so a
+    lookup is a single matrix-vector product. A hit needs cosine similarity
+    of at least ``threshold`` and the same search parameters (``key``).
+    Entries are evicted least recently used first. A share ``audit_rate``
+    of hits can be re-searched by the caller and passed to ``audit()``,
+    which counts a false hit when the cached results overlap the fresh ones
+    by less than ``min_overlap``.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        threshold: float = 0.95,
+        audit_rate: float = 0.05,
+        min_overlap: float = 0.5
+    ):
+        """Initialize an empty cache; the embedding matrix is allocated on first use."""
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+        self.min_overlap = min_overlap
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._valid = np.zeros(max(max_entries, 0), dtype=bool)
+        # Slot -> (key, query, results), in least to most recently used order
+        self._entries: "OrderedDict[int, Tuple[Hashable, str, List[Any]]]" = OrderedDict()
+        self._random = random.Random()
+        self.hits = 0
+        self.misses = 0
+        self.audits = 0
+        self.false_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def get(self, embedding: List[float], key: Hashable) -> Optional[Tuple[List[Any], str, float]]:
+        """Cached (results, cached query, similarity) for a similar query with the same key, or None."""
+        if not self.enabled:
+            return None
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._entries:
+                similarities = self._vectors @ vector
+                similarities[~self._valid] = -np.inf
+                for slot in np.argsort(-similarities):
+                    if similarities[slot] < self.threshold:
+                        break
+                    entry_key, query, results = self._entries[int(slot)]
+                    if entry_key == key:
+                        self._entries.move_to_end(int(slot))
+                        self.hits += 1
+                        return results, query, float(similarities[slot])
+            self.misses += 1
+            return None
+
+    def put(self, embedding: List[float], key: Hashable, query: str, results: List[Any]):
+        """Store the results of a query, evicting the least recently used entry if full."""
+        if not self.enabled:
+            return
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != len(vector):
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+                self._valid[:] = False
+                self._entries.clear()
+            if len(self._entries) < self.max_entries:
+                slot = int(np.argmin(self._valid))
+            else:
+                slot, _ = self._entries.popitem(last=False)
+            self._vectors[slot] = vector
+            self._valid[slot] = True
+            self._entries[slot] = (key, query, results)
+
+    def should_audit(self) -> bool:
+        """Whether to re-search this hit and audit it."""
+        return self.audit_rate > 0 and self._random.random() < self.audit_rate
+
+    def audit(self, cached: List[Any], fresh: List[Any], query: str = "", cached_query: str = "") -> bool:
+        """Compare cached results with a fresh search; returns whether the hit was false."""
+        fresh_ids = {result.chunk_id for result in fresh}
+        overlap = len(fresh_ids & {result.chunk_id for result in cached}) / len(fresh_ids) if fresh_ids else 1.0
+        false_hit = overlap < self.min_overlap
+        with self._lock:
+            self.audits += 1
+            self.false_hits += false_hit
+        if false_hit:
+            logger.info(f"Semantic cache false hit: '{query[:50]}' served from '{cached_query[:50]}' ({overlap:.0%} overlap)")
+        return false_hit
+
+    def clear(self):
+        """Drop all entries; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._valid[:] = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, hit ratio, audited false-hit rate and approximate memory use."""
+        lookups = self.hits + self.misses
+        with self._lock:
+            results = [entry[2] for entry in self._entries.values()]
+        vector_bytes = self._vectors.nbytes if self._vectors is not None else 0
+        return {
+            "entries": len(results),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "memory_kb": round((vector_bytes + sum(estimate_size(r) for r in results)) / 1024, 1),
+            "threshold": self.threshold,
+            "audits": self.audits,
+            "false_hits": self.false_hits,
+            "false_hit_rate": round(self.false_hits / self.audits, 3) if self.audits else 0.0
+        }
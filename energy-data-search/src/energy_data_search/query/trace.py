@@ -0,0 +1,57 @@
+"""Per-search timing breakdown."""
+
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+# Timed stages, each recorded as <stage>_ms
+STAGES = ("queue", "embed", "ann", "hydrate", "rerank", "diversify", "serialize", "total")
+
+
+@dataclass
+class SearchTrace:
+    """Where the time of one search (or one batch of searches) went.
+
+    Stage times are wall-clock milliseconds. ``queue_ms`` is time spent
+    waiting for a worker, filled in by servers that run searches on a pool.
+    ``ann_ms`` covers the index
+    query, including filtering and reading result metadata, and
+    ``hydrate_ms`` fetching chunk text afterwards. ``serialize_ms`` is left
+    to the caller that formats the response. ``candidates`` counts chunks
+    retrieved before reranking, collapsing and the final cut.
+    """
+    queries: int = 0
+    queue_ms: float = 0.0
+    embed_ms: float = 0.0
+    ann_ms: float = 0.0
+    hydrate_ms: float = 0.0
+    rerank_ms: float = 0.0
+    diversify_ms: float = 0.0
+    serialize_ms: float = 0.0
+    total_ms: float = 0.0
+    candidates: int = 0
+    cache_hits: int = 0
+    semantic_cache_hits: int = 0
+
+    @contextmanager
+    def stage(self, name: str):
+        """Add the time spent in the block to ``<name>_ms``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            attribute = f"{name}_ms"
+            setattr(self, attribute, getattr(self, attribute) + (time.perf_counter() - start) * 1000)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Trace as a dict, with times rounded to microseconds."""
+        return {
+            key: round(value, 3) if isinstance(value, float) else value
+            for key, value in asdict(self).items()
+        }
+
+
+def timed(trace: Optional[SearchTrace], name: str):
+    """Context manager timing a stage into ``trace``, or doing nothing without one."""
+    return trace.stage(name) if trace is not None else nullcontext()
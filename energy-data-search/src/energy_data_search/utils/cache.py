@@ -0,0 +1,119 @@
+"""In-memory caches for query embeddings and search results."""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+def estimate_size(obj: Any) -> int:
+    """Approximate deep size in bytes of cached values (lists, dicts, strings, numbers)."""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__"):
+            stack.append(vars(item))
+    return total
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with hit/miss counters."""
+
+    def __init__(self, max_entries: int = 1024):
+        """Initialize an LRU cache holding at most ``max_entries`` items."""
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None, marking the entry as recently used."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry if full."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries; hit/miss counters are kept."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _values(self):
+        with self._lock:
+            return list(self._data.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, hit ratio and approximate memory use."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "memory_kb": round(sum(estimate_size(v) for v in self._values()) / 1024, 1)
+        }
+
+
+class TTLCache(LRUCache):
+    """LRU cache whose entries also expire ``ttl_seconds`` after being stored."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 300):
+        """Initialize a TTL cache."""
+        super().__init__(max_entries)
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value stamped with the current time."""
+        super().put(key, (time.monotonic(), value))
+
+    def _values(self):
+        return [value for _, value in super()._values()]
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, hit ratio, memory use and TTL."""
+        stats = super().stats()
+        stats["ttl_seconds"] = self.ttl_seconds
+        return stats
@@ -0,0 +1,62 @@
+"""Index directories built by full reindexes and switched in atomically."""
+
+import logging
+import os
+import re
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# Suffix of a build directory: <name>.<YYYYmmdd-HHMMSS>
+BUILD_SUFFIX = re.compile(r"\d{8}-\d{6}")
+
+
+def _build_name(directory: Path, when: datetime) -> Path:
+    return directory.with_name(f"{directory.name}.{when:%Y%m%d-%H%M%S}")
+
+
+def new_build_directory(directory: Path) -> Path:
+    """Directory beside ``directory`` for a full reindex to build into."""
+    return _build_name(Path(directory), datetime.now())
+
+
+def switch_index_directory(directory: Path, build: Path) -> List[Path]:
+    """Point ``directory`` at ``build`` and remove builds older than the current one.
+
+    ``directory`` is a relative symlink, replaced atomically, so a process
+    opening it sees either the old build or the new one, never a partial
+    index. The build it pointed to before is kept for processes still
+    reading it until they reopen; earlier ones are removed. A real
+    directory at ``directory``, from before builds were used, is first
+    moved aside as the previous build. Returns the removed directories.
+    """
+    directory = Path(directory)
+    build = Path(build).resolve()
+    previous = None
+    if directory.is_symlink():
+        previous = directory.resolve()
+    elif directory.exists():
+        previous = _build_name(directory, datetime.fromtimestamp(directory.stat().st_mtime))
+        directory.rename(previous)
+        logger.info(f"Moved {directory} aside to {previous}")
+
+    link = directory.with_name(f".{directory.name}.link")
+    link.unlink(missing_ok=True)
+    os.symlink(build.name, link)
+    os.replace(link, directory)
+    logger.info(f"Switched {directory} to {build.name}")
+
+    removed = []
+    prefix = f"{directory.name}."
+    for path in directory.parent.iterdir():
+        if path.is_symlink() or not path.is_dir() or not path.name.startswith(prefix):
+            continue
+        if not BUILD_SUFFIX.fullmatch(path.name[len(prefix):]) or path.resolve() in (build, previous):
+            continue
+        shutil.rmtree(path)
+        removed.append(path)
+        logger.info(f"Removed old index build {path}")
+    return removed
@@ -0,0 +1,53 @@
+"""Index generation counter shared by every process using an index directory."""
+
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+GENERATION_FILE = "index_generation"
+
+
+class IndexGeneration:
+    """Monotonic counter stored next to the index and bumped on every write.
+
+    Readers compare the value they last saw with the current one to detect
+    that documents were added, deleted or rebuilt, including by another
+    process such as an ``update`` run against a live API server.
+    """
+
+    def __init__(self, directory: Path):
+        """Initialize the counter for an index directory."""
+        self.path = Path(directory) / GENERATION_FILE
+
+    def current(self) -> int:
+        """Read the current generation; 0 if the index has never been written."""
+        try:
+            return int(self.path.read_text().strip() or 0)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read index generation from {self.path}: {e}")
+            return 0
+
+    def updated_at(self) -> Optional[str]:
+        """ISO time of the last write; None if the index has never been written."""
+        try:
+            return datetime.fromtimestamp(self.path.stat().st_mtime).isoformat(timespec="seconds")
+        except OSError:
+            return None
+
+    def bump(self) -> int:
+        """Advance the generation and return the new value."""
+        generation = self.current() + 1
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(str(generation))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Could not write index generation to {self.path}: {e}")
+        return generation
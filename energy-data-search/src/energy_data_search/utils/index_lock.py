@@ -0,0 +1,49 @@
+"""Exclusive lock held by the process writing to an index directory."""
+
+import fcntl
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+class IndexWriterLock:
+    """Advisory file lock so only one process updates an index at a time.
+
+    Taken by incremental updates, whether run from the CLI or as a
+    background job of the search API, and by full reindexes; a second
+    writer waits for the first. The lock file sits beside the index
+    directory, ``<name>.lock``, since a full reindex replaces the directory.
+    """
+
+    def __init__(self, directory: Path):
+        """Initialize the lock for an index directory."""
+        self.directory = Path(directory)
+        self.path = self.directory.with_name(f"{self.directory.name}.lock")
+        self._file = None
+
+    def held(self) -> bool:
+        """Whether a writer holds the lock right now."""
+        if not self.path.exists():
+            return False
+        with open(self.path, "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            fcntl.flock(f, fcntl.LOCK_UN)
+        return False
+
+    def __enter__(self) -> "IndexWriterLock":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a")
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.info(f"Waiting for another process writing to {self.directory}")
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
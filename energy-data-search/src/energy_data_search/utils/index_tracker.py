@@ -111,11 +111,15 @@ class IndexTracker:
             return False
         
         # Check modification time
-        current_mtime = file_path.stat().st_mtime
-        if current_mtime > metadata.last_modified:
+        stat = file_path.stat()
+        if stat.st_mtime > metadata.last_modified:
             logger.info(f"File modified since indexing: {file_path}")
             return True
         
+        # Unchanged mtime and size: skip hashing the content
+        if stat.st_mtime == metadata.last_modified and stat.st_size == metadata.file_size:
+            return False
+        
         # Check file hash for content changes
         current_hash = self.compute_file_hash(file_path)
         if current_hash != metadata.file_hash:
@@ -0,0 +1,134 @@
+"""Rolling latency histograms for the search stages."""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..query.trace import STAGES
+
+# Upper bounds in milliseconds of the histogram buckets
+DEFAULT_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class RollingHistogram:
+    """Observations of the last ``window_seconds``, summarized as buckets and percentiles.
+
+    Observations are kept individually so percentiles are exact; at most
+    ``max_samples`` are kept, oldest dropped first.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 300,
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+        max_samples: int = 100000
+    ):
+        """Initialize an empty histogram."""
+        self.window_seconds = window_seconds
+        self.buckets = buckets
+        self._samples: deque = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, now: Optional[float] = None):
+        """Record one observation."""
+        with self._lock:
+            self._samples.append((now if now is not None else time.monotonic(), value))
+
+    def _window(self, now: float) -> np.ndarray:
+        with self._lock:
+            while self._samples and now - self._samples[0][0] > self.window_seconds:
+                self._samples.popleft()
+            return np.array([value for _, value in self._samples], dtype=np.float64)
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Count, mean, p50/p95/p99 and cumulative bucket counts over the window."""
+        values = self._window(now if now is not None else time.monotonic())
+        if not len(values):
+            return {"count": 0, "sum": 0.0, "buckets": {str(bound): 0 for bound in self.buckets}}
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {
+            "count": int(len(values)),
+            "sum": round(float(values.sum()), 3),
+            "mean": round(float(values.mean()), 3),
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+            "buckets": {str(bound): int((values <= bound).sum()) for bound in self.buckets}
+        }
+
+
+class SearchMetrics:
+    """Rolling histograms of each traced search stage, plus counters and gauges.
+
+    Gauges are read when a snapshot is taken, from functions registered
+    with ``register_gauge``.
+    """
+
+    def __init__(self, window_seconds: float = 300):
+        """Initialize one histogram per stage."""
+        self.window_seconds = window_seconds
+        self.histograms = {stage: RollingHistogram(window_seconds) for stage in STAGES}
+        self.counters = {
+            "searches": 0, "errors": 0, "rejected": 0, "timeouts": 0,
+            "candidates": 0, "cache_hits": 0, "semantic_cache_hits": 0
+        }
+        self.gauges: Dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, trace):
+        """Record the stage times and counts of a SearchTrace."""
+        now = time.monotonic()
+        for stage, histogram in self.histograms.items():
+            histogram.observe(getattr(trace, f"{stage}_ms"), now)
+        with self._lock:
+            self.counters["searches"] += 1
+            self.counters["candidates"] += trace.candidates
+            self.counters["cache_hits"] += trace.cache_hits
+            self.counters["semantic_cache_hits"] += trace.semantic_cache_hits
+
+    def increment(self, counter: str, amount: int = 1):
+        """Add to a counter, such as "rejected" or "timeouts"."""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def record_error(self):
+        """Count a search that failed before producing a trace."""
+        self.increment("errors")
+
+    def register_gauge(self, name: str, read: Callable[[], float]):
+        """Report ``read()`` as the current value of gauge ``name``."""
+        self.gauges[name] = read
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters and a histogram summary per stage, in milliseconds."""
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            "window_seconds": self.window_seconds,
+            "counters": counters,
+            "gauges": {name: read() for name, read in self.gauges.items()},
+            "stages_ms": {stage: histogram.snapshot() for stage, histogram in self.histograms.items()}
+        }
+
+    def to_prometheus(self, prefix: str = "energy_search") -> str:
+        """Snapshot in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in snapshot["counters"].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for name, value in snapshot["gauges"].items():
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        metric = f"{prefix}_stage_duration_ms"
+        lines.append(f"# TYPE {metric} histogram")
+        for stage, summary in snapshot["stages_ms"].items():
+            for bound, count in summary["buckets"].items():
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {summary["count"]}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {summary["sum"]}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {summary["count"]}')
+        return "\n".join(lines) + "\n"
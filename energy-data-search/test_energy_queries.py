@@ -3,11 +3,10 @@
 
 import sys
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
-from rich.progress import track
 
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
@@ -17,6 +16,129 @@ from energy_data_search.config import Config
 console = Console()
 
 
+# Representative energy market queries, shared with the benchmark scripts
+TEST_QUERIES: List[Dict[str, Any]] = [
+    # BESS (Battery Energy Storage System) queries
+    {
+        "category": "BESS",
+        "query": "battery energy storage system requirements and specifications",
+        "expected_topics": ["battery", "storage", "BESS", "ESR", "capacity"]
+    },
+    {
+        "category": "BESS",
+        "query": "BESS market participation and bidding strategies",
+        "expected_topics": ["BESS", "bidding", "market", "participation"]
+    },
+    {
+        "category": "BESS",
+        "query": "energy storage resource operational requirements",
+        "expected_topics": ["ESR", "storage", "operational", "requirements"]
+    },
+    {
+        "category": "BESS",
+        "query": "battery storage ancillary services qualification",
+        "expected_topics": ["battery", "ancillary", "services", "qualification"]
+    },
+    
+    # EMS (Energy Management System) queries
+    {
+        "category": "EMS",
+        "query": "energy management system integration requirements",
+        "expected_topics": ["EMS", "management", "integration", "system"]
+    },
+    {
+        "category": "EMS",
+        "query": "EMS data exchange protocols and standards",
+        "expected_topics": ["EMS", "data", "exchange", "protocols"]
+    },
+    {
+        "category": "EMS",
+        "query": "real-time energy management and optimization",
+        "expected_topics": ["real-time", "management", "optimization"]
+    },
+    
+    # Bidding queries
+    {
+        "category": "Bidding",
+        "query": "day ahead market bidding procedures",
+        "expected_topics": ["day ahead", "DAM", "bidding", "market"]
+    },
+    {
+        "category": "Bidding",
+        "query": "real time market bid submission requirements",
+        "expected_topics": ["real time", "RTM", "bid", "submission"]
+    },
+    {
+        "category": "Bidding",
+        "query": "ancillary services bidding and offer curves",
+        "expected_topics": ["ancillary", "bidding", "offer", "curves"]
+    },
+    {
+        "category": "Bidding",
+        "query": "energy offer curves and bid parameters",
+        "expected_topics": ["energy", "offer", "curves", "parameters"]
+    },
+    
+    # SCADA queries
+    {
+        "category": "SCADA",
+        "query": "SCADA system requirements and telemetry",
+        "expected_topics": ["SCADA", "telemetry", "requirements", "system"]
+    },
+    {
+        "category": "SCADA",
+        "query": "real time telemetry data submission",
+        "expected_topics": ["telemetry", "real time", "data", "submission"]
+    },
+    {
+        "category": "SCADA",
+        "query": "SCADA integration and communication protocols",
+        "expected_topics": ["SCADA", "integration", "communication", "protocols"]
+    },
+    
+    # Real-Time Co-optimization queries
+    {
+        "category": "RTC",
+        "query": "real time co-optimization implementation",
+        "expected_topics": ["RTC", "co-optimization", "real time", "implementation"]
+    },
+    {
+        "category": "RTC",
+        "query": "co-optimization of energy and ancillary services",
+        "expected_topics": ["co-optimization", "energy", "ancillary", "services"]
+    },
+    
+    # Market operations queries
+    {
+        "category": "Market Operations",
+        "query": "market clearing price calculation methodology",
+        "expected_topics": ["market", "clearing", "price", "LMP", "MCP"]
+    },
+    {
+        "category": "Market Operations",
+        "query": "settlement and billing procedures",
+        "expected_topics": ["settlement", "billing", "procedures", "payment"]
+    },
+    {
+        "category": "Market Operations",
+        "query": "congestion revenue rights and transmission",
+        "expected_topics": ["congestion", "CRR", "transmission", "rights"]
+    },
+    
+    # Compliance and regulations
+    {
+        "category": "Compliance",
+        "query": "ERCOT nodal protocols compliance requirements",
+        "expected_topics": ["ERCOT", "nodal", "protocols", "compliance"]
+    },
+    {
+        "category": "Compliance",
+        "query": "resource qualification and registration process",
+        "expected_topics": ["resource", "qualification", "registration", "process"]
+    }
+]
+
+
 class EnergyQueryTester:
     """Test suite for energy market queries."""
     
@@ -29,140 +151,22 @@ class EnergyQueryTester:
     
     def _get_test_queries(self) -> List[Dict[str, Any]]:
         """Define comprehensive test queries for energy market topics."""
-        return [
-            # BESS (Battery Energy Storage System) queries
-            {
-                "category": "BESS",
-                "query": "battery energy storage system requirements and specifications",
-                "expected_topics": ["battery", "storage", "BESS", "ESR", "capacity"]
-            },
-            {
-                "category": "BESS",
-                "query": "BESS market participation and bidding strategies",
-                "expected_topics": ["BESS", "bidding", "market", "participation"]
-            },
-            {
-                "category": "BESS",
-                "query": "energy storage resource operational requirements",
-                "expected_topics": ["ESR", "storage", "operational", "requirements"]
-            },
-            {
-                "category": "BESS",
-                "query": "battery storage ancillary services qualification",
-                "expected_topics": ["battery", "ancillary", "services", "qualification"]
-            },
-            
-            # EMS (Energy Management System) queries
-            {
-                "category": "EMS",
-                "query": "energy management system integration requirements",
-                "expected_topics": ["EMS", "management", "integration", "system"]
-            },
-            {
-                "category": "EMS",
-                "query": "EMS data exchange protocols and standards",
-                "expected_topics": ["EMS", "data", "exchange", "protocols"]
-            },
-            {
-                "category": "EMS",
-                "query": "real-time energy management and optimization",
-                "expected_topics": ["real-time", "management", "optimization"]
-            },
-            
-            # Bidding queries
-            {
-                "category": "Bidding",
-                "query": "day ahead market bidding procedures",
-                "expected_topics": ["day ahead", "DAM", "bidding", "market"]
-            },
-            {
-                "category": "Bidding",
-                "query": "real time market bid submission requirements",
-                "expected_topics": ["real time", "RTM", "bid", "submission"]
-            },
-            {
-                "category": "Bidding",
-                "query": "ancillary services bidding and offer curves",
-                "expected_topics": ["ancillary", "bidding", "offer", "curves"]
-            },
-            {
-                "category": "Bidding",
-                "query": "energy offer curves and bid parameters",
-                "expected_topics": ["energy", "offer", "curves", "parameters"]
-            },
-            
-            # SCADA queries
-            {
-                "category": "SCADA",
-                "query": "SCADA system requirements and telemetry",
-                "expected_topics": ["SCADA", "telemetry", "requirements", "system"]
-            },
-            {
-                "category": "SCADA",
-                "query": "real time telemetry data submission",
-                "expected_topics": ["telemetry", "real time", "data", "submission"]
-            },
-            {
-                "category": "SCADA",
-                "query": "SCADA integration and communication protocols",
-                "expected_topics": ["SCADA", "integration", "communication", "protocols"]
-            },
-            
-            # Real-Time Co-optimization queries
-            {
-                "category": "RTC",
-                "query": "real time co-optimization implementation",
-                "expected_topics": ["RTC", "co-optimization", "real time", "implementation"]
-            },
-            {
-                "category": "RTC",
-                "query": "co-optimization of energy and ancillary services",
-                "expected_topics": ["co-optimization", "energy", "ancillary", "services"]
-            },
-            
-            # Market operations queries
-            {
-                "category": "Market Operations",
-                "query": "market clearing price calculation methodology",
-                "expected_topics": ["market", "clearing", "price", "LMP", "MCP"]
-            },
-            {
-                "category": "Market Operations",
-                "query": "settlement and billing procedures",
-                "expected_topics": ["settlement", "billing", "procedures", "payment"]
-            },
-            {
-                "category": "Market Operations",
-                "query": "congestion revenue rights and transmission",
-                "expected_topics": ["congestion", "CRR", "transmission", "rights"]
-            },
-            
-            # Compliance and regulations
-            {
-                "category": "Compliance",
-                "query": "ERCOT nodal protocols compliance requirements",
-                "expected_topics": ["ERCOT", "nodal", "protocols", "compliance"]
-            },
-            {
-                "category": "Compliance",
-                "query": "resource qualification and registration process",
-                "expected_topics": ["resource", "qualification", "registration", "process"]
-            }
-        ]
+        return [dict(q) for q in TEST_QUERIES]
     
-    def run_query_test(self, test_case: Dict[str, Any]) -> Dict[str, Any]:
-        """Run a single query test."""
+    def run_query_test(self, test_case: Dict[str, Any], results: Optional[List] = None) -> Dict[str, Any]:
+        """Run a single query test, or score results already fetched for it."""
         query = test_case["query"]
         category = test_case["category"]
         expected = test_case["expected_topics"]
         
         try:
             # Run search
-            results = self.engine.search(
-                query=query,
-                max_results=5,
-                score_threshold=0.2
-            )
+            if results is None:
+                results = self.engine.search(
+                    query=query,
+                    max_results=5,
+                    score_threshold=0.2
+                )
             
             # Analyze results
             found_topics = []
@@ -199,9 +203,15 @@ class EnergyQueryTester:
             border_style="cyan"
         ))
         
-        # Run tests
-        for test_case in track(self.test_queries, description="Running queries..."):
-            result = self.run_query_test(test_case)
+        # Run all queries as one batch, then score each
+        with console.status("Running queries..."):
+            batch_results = self.engine.search_many(
+                [test_case["query"] for test_case in self.test_queries],
+                max_results=5,
+                score_threshold=0.2
+            )
+        for test_case, results in zip(self.test_queries, batch_results):
+            result = self.run_query_test(test_case, results)
             self.results.append(result)
         
         # Display results
@@ -0,0 +1,98 @@
+"""Shared fixtures: a deterministic embedding model and a small indexed corpus."""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytest
+
+from energy_data_search.config import Config
+from energy_data_search.query.search_engine import EnergyDataSearchEngine
+
+DIMENSION = 64
+
+# Files per topic directory; each text mixes its topic's words
+TOPICS = {
+    "protocols": ["settlement", "invoice", "credit", "collateral", "dispute", "market", "payment"],
+    "planning": ["transmission", "interconnection", "study", "generator", "load", "forecast", "reliability"],
+    "operations": ["frequency", "reserve", "dispatch", "outage", "battery", "storage", "ancillary"],
+}
+FILES_PER_TOPIC = 6
+
+
+class HashEmbeddings:
+    """Bag-of-words embedding: every word adds a fixed random vector, so texts sharing words are close."""
+
+    def __init__(self, dimension: int = DIMENSION):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            seed = int(hashlib.md5(word.encode()).hexdigest()[:8], 16)
+            vector += np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def hash_embeddings():
+    """Serve embeddings from HashEmbeddings instead of downloading a sentence-transformer."""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr("energy_data_search.indexers.chromadb_indexer.load_embeddings", lambda name: HashEmbeddings())
+        patch.setattr("energy_data_search.indexers.snapshot.load_embeddings", lambda name: HashEmbeddings())
+        yield
+
+
+def write_corpus(source_dir: Path) -> List[Path]:
+    """Write FILES_PER_TOPIC text files per topic directory and return their paths."""
+    rng = np.random.default_rng(7)
+    paths = []
+    for topic, words in TOPICS.items():
+        directory = source_dir / topic
+        directory.mkdir(parents=True, exist_ok=True)
+        for n in range(FILES_PER_TOPIC):
+            paragraphs = [" ".join(rng.choice(words, 40)) for _ in range(4)]
+            path = directory / f"{topic}_{n:02d}.txt"
+            path.write_text("\n\n".join(paragraphs))
+            paths.append(path)
+    return paths
+
+
+def make_config(root: Path, **overrides) -> Config:
+    """Configuration with every path under ``root`` and thresholds suited to HashEmbeddings."""
+    values = dict(
+        source_data_dir=root / "src",
+        chroma_persist_dir=root / "chroma",
+        query_log_path=root / "query_log.jsonl",
+        chunk_size=300,
+        chunk_overlap=0,
+        similarity_threshold=-1.0,
+        related_documents_k=3,
+        rerank=False
+    )
+    values.update(overrides)
+    return Config(**values)
+
+
+@pytest.fixture
+def config(tmp_path) -> Config:
+    return make_config(tmp_path)
+
+
+@pytest.fixture
+def engine(config):
+    """Search engine over the corpus, indexed from its source directory."""
+    write_corpus(config.source_data_dir)
+    engine = EnergyDataSearchEngine(config)
+    engine.index_all_sources()
+    yield engine
+    engine.close()
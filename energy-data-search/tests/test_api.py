@@ -0,0 +1,236 @@
+"""Tests for the search API in apps/search-api."""
+
+import asyncio
+import importlib
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from conftest import FILES_PER_TOPIC, TOPICS, make_config, write_corpus
+from fastapi.testclient import TestClient
+
+from energy_data_search.query.incremental_indexer import IncrementalIndexer
+
+API_DIR = Path(__file__).resolve().parents[2] / "apps" / "search-api"
+
+
+def wait_for(condition, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("Condition not met in time")
+        time.sleep(0.1)
+
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    """The API module serving an index of the test corpus, warmed up."""
+    root = tmp_path_factory.mktemp("api")
+    # The index directory is configured relative to the working directory
+    config = make_config(root, chroma_persist_dir=root / "data" / "chroma_db")
+    write_corpus(config.source_data_dir)
+    IncrementalIndexer(config).index_new_documents()
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(root)
+        patch.setenv("SOURCE_DATA_DIR", str(config.source_data_dir))
+        patch.setenv("QUERY_LOG_PATH", str(config.query_log_path))
+        patch.syspath_prepend(str(API_DIR))
+        sys.modules.pop("main", None)
+        main = importlib.import_module("main")
+        main.search_engine.config.similarity_threshold = -1.0
+        wait_for(lambda: main.warmup_state["ready"])
+        yield main
+        sys.modules.pop("main", None)
+
+
+@pytest.fixture(scope="module")
+def client(api):
+    return TestClient(api.app)
+
+
+def test_ready_reports_503_until_warmed_up(api, client):
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+
+    api.warmup_state["ready"] = False
+    try:
+        assert client.get("/ready").status_code == 503
+    finally:
+        api.warmup_state["ready"] = True
+
+
+def test_index_update_runs_as_a_job(api, client):
+    response = client.post("/index/update")
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] in ("queued", "running")
+
+    def finished():
+        return client.get(f"/index/jobs/{job['id']}").json()["status"] in ("succeeded", "failed")
+
+    wait_for(finished, timeout=120)
+    done = client.get(f"/index/jobs/{job['id']}").json()
+    assert done["status"] == "succeeded", done["error"]
+    assert done["result"]["new_files"] == 0
+    assert job["id"] in [listed["id"] for listed in client.get("/index/jobs").json()]
+    assert client.get("/index/jobs/unknown").status_code == 404
+
+
+def test_fields_and_snippet_length_project_results(client):
+    response = client.post("/search", json={
+        "query": "battery storage",
+        "limit": 5,
+        "fields": ["id", "content", "metadata.directory"],
+        "snippet_length": 40
+    })
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 5
+    for result in results:
+        assert set(result) == {"id", "content", "metadata"}
+        assert set(result["metadata"]) == {"directory"}
+        assert len(result["content"]) <= 43
+
+    full = client.post("/search", json={"query": "battery storage", "limit": 5}).json()["results"]
+    assert [result["id"] for result in full] == [result["id"] for result in results]
+    assert {"score", "source_hits", "hydrated"} <= set(full[0])
+    assert "source" in full[0]["metadata"]
+
+
+def test_unknown_fields_are_rejected(client):
+    response = client.post("/search", json={"query": "battery", "fields": ["id", "secret"]})
+    assert response.status_code == 400
+
+
+def test_cursor_pages_through_the_api(client):
+    first = client.post("/search", json={"query": "transmission study", "limit": 4}).json()
+    second = client.post("/search", json={"query": "transmission study", "limit": 4, "cursor": first["next_cursor"]}).json()
+    assert not {r["id"] for r in first["results"]} & {r["id"] for r in second["results"]}
+    response = client.post("/search", json={"query": "other query", "limit": 4, "cursor": first["next_cursor"]})
+    assert response.status_code == 400
+
+
+def test_responses_are_compressed_as_negotiated(api, client):
+    body = {"query": "settlement invoice credit", "limit": 20}
+
+    plain = client.post("/search", json=body, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    compressed = client.post("/search", json=body, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["vary"]
+    assert compressed.json()["results"] == plain.json()["results"]
+    assert int(compressed.headers["content-length"]) < len(plain.content)
+
+    # Below the minimum size responses go out as they are
+    small = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_negotiate_encoding(api):
+    assert api.negotiate_encoding("gzip, deflate") == "gzip"
+    assert api.negotiate_encoding("gzip;q=0, identity") is None
+    assert api.negotiate_encoding("") is None
+    expected = "br" if api.brotli else "gzip"
+    assert api.negotiate_encoding("gzip;q=0.5, br;q=0.9") == expected
+    assert api.negotiate_encoding("*") == expected
+
+
+def test_stats(client):
+    stats = client.get("/stats").json()
+    assert stats["total_chunks"] > 0
+    assert stats["total_documents"] == FILES_PER_TOPIC * len(TOPICS)
+    assert stats["collections"] == ["energy_documents"]
+
+
+def test_search_trace_and_metrics(client):
+    searches = client.get("/metrics").json()["counters"]["searches"]
+    response = client.post("/search", json={"query": "reserve frequency outage", "limit": 3, "trace": True}).json()
+    trace = response["trace"]
+    assert trace["queries"] >= 1
+    assert trace["total_ms"] == pytest.approx(response["search_time_ms"], abs=0.01)
+    assert trace["serialize_ms"] > 0
+    assert client.post("/search", json={"query": "reserve frequency outage", "limit": 3}).json()["trace"] is None
+
+    metrics = client.get("/metrics").json()
+    assert metrics["counters"]["searches"] == searches + 2
+    assert metrics["stages_ms"]["total"]["count"] >= 2
+    prometheus = client.get("/metrics", params={"format": "prometheus"}).text
+    assert f"energy_search_searches_total {searches + 2}" in prometheus
+
+
+def test_first_page_searches_are_logged_for_warmup(api, client):
+    first = client.post("/search", json={"query": "collateral credit payment", "limit": 2}).json()
+    client.post("/search", json={"query": "collateral credit payment", "limit": 2, "cursor": first["next_cursor"]})
+    api.query_log.flush()
+    lines = [json.loads(line)["params"] for line in api.query_log.path.read_text().splitlines()]
+    logged = [params for params in lines if params["query"] == "collateral credit payment"]
+    assert len(logged) == 1
+    assert logged[0]["page_size"] == 2
+    assert api.search_engine.search_page(**logged[0]).results[0].chunk_id == first["results"][0]["id"]
+
+
+def test_concurrent_searches_are_batched(api):
+    counters = api.metrics.snapshot()["counters"]
+    queries = ["battery storage", "settlement invoice", "transmission study", "reserve outage"]
+    options = dict(page_size=3, filter_directory=None, filter_file_type=None, document_types=None,
+                   date_from=None, date_to=None, collapse=None, mmr=None, hydrate=True)
+
+    async def search_all():
+        searches = [api.search_batcher.search({"query": query, **options}) for query in queries]
+        searches.append(api.search_batcher.search({"query": queries[0], **options, "page_size": 1}))
+        return await asyncio.gather(*searches)
+
+    responses = asyncio.run(search_all())
+    # The first search goes out at once; the rest wait out the window together, one batch per options
+    after = api.metrics.snapshot()["counters"]
+    assert after["batches"] - counters.get("batches", 0) == 3
+    assert after["batched_searches"] - counters.get("batched_searches", 0) == 5
+    for query, (page, _) in zip(queries, responses):
+        expected = api.search_engine.search_page(query, page_size=3)
+        assert [r.chunk_id for r in page.results] == [r.chunk_id for r in expected.results]
+    assert len(responses[-1][0].results) == 1
+    assert responses[1][1].queries == 3
+    assert responses[1][1].queue_ms >= api.search_batcher.window * 1000 * 0.9
+    assert not api.search_batcher.open and api.search_batcher.in_flight == 0
+
+
+def test_index_writes_swap_in_a_new_engine(api, client):
+    config = api.search_engine.config
+    old_engine = api.search_engine
+    reloads = api.reload_state["reloads"]
+    path = config.source_data_dir / "operations" / "operations_00.txt"
+
+    writer = IncrementalIndexer(config)
+    writer.indexer.delete_by_source(str(path))
+    api.index_written.set()
+    wait_for(lambda: api.reload_state["reloads"] == reloads + 1)
+    assert api.search_engine is not old_engine
+    assert client.get("/ready").json()["index_reload"]["reloads"] == reloads + 1
+    results = client.post("/search", json={"query": "battery storage dispatch", "limit": 50}).json()["results"]
+    assert str(path) not in {result["metadata"]["source"] for result in results}
+
+    # Put the file back for the other tests
+    writer.force_reindex_file(path)
+    api.index_written.set()
+    wait_for(lambda: api.reload_state["reloads"] == reloads + 2)
+    assert client.get("/stats").json()["total_documents"] == FILES_PER_TOPIC * len(TOPICS)
+
+
+def test_document_returns_the_chunk_with_its_neighbours(client):
+    result = client.post("/search", json={"query": "interconnection generator", "limit": 20}).json()["results"]
+    chunk_id = next(r["id"] for r in result if r["metadata"]["chunk_index"] >= 2)
+
+    document = client.get(f"/document/{chunk_id}", params={"context": 1}).json()
+    index = document["chunk"]["chunk_index"]
+    assert document["chunk"]["id"] == chunk_id
+    assert [chunk["chunk_index"] for chunk in document["before"]] == [index - 1]
+    assert all(chunk["metadata"]["source"] == document["chunk"]["metadata"]["source"]
+               for chunk in document["before"] + document["after"])
+
+    assert client.get("/document/no-such-chunk").status_code == 404
+    assert client.get(f"/document/{chunk_id}", params={"context": 21}).status_code == 422
@@ -0,0 +1,74 @@
+"""Tests for batched multi-query search and the search-batch command."""
+
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from energy_data_search.cli.main import search_batch
+from energy_data_search.query.search_engine import EnergyDataSearchEngine
+
+QUERIES = [
+    "battery storage dispatch",
+    "settlement invoice dispute",
+    "transmission interconnection study",
+    "reserve frequency outage",
+]
+
+
+@pytest.fixture
+def uncached(engine):
+    """A second engine on the same index that caches nothing, so every search reaches the index."""
+    other = EnergyDataSearchEngine(engine.config.model_copy(update={
+        "query_cache_size": 0, "result_cache_size": 0, "semantic_cache_size": 0
+    }))
+    yield other
+    other.close()
+
+
+def ranking(results):
+    return [(result.chunk_id, round(result.score, 5)) for result in results]
+
+
+@pytest.mark.parametrize("mode", ["vector", "hybrid"])
+def test_search_many_matches_searching_one_at_a_time(engine, uncached, mode):
+    batched = engine.search_many(QUERIES, max_results=5, mode=mode)
+    assert [ranking(results) for results in batched] == [
+        ranking(uncached.search(query, max_results=5, mode=mode)) for query in QUERIES
+    ]
+
+
+def test_search_many_applies_filters_and_repeats_duplicates(engine, uncached):
+    queries = [QUERIES[0], QUERIES[1], QUERIES[0]]
+    batched = engine.search_many(queries, max_results=4, filter_directory="operations")
+    assert ranking(batched[0]) == ranking(batched[2])
+    assert ranking(batched[1]) == ranking(uncached.search(QUERIES[1], max_results=4, filter_directory="operations"))
+    assert all(result.metadata["directory"] == "operations" for results in batched for result in results)
+
+
+def test_search_batch_streams_jsonl(engine):
+    lines = f"{QUERIES[0]}\n\n" + json.dumps({"id": "q2", "query": QUERIES[1]}) + f"\n{QUERIES[2]}\n"
+    result = CliRunner().invoke(
+        search_batch, ["-", "-n", "3", "-b", "2"], input=lines, obj={"config": engine.config, "engine": engine}
+    )
+    assert result.exit_code == 0, result.output
+    records = [json.loads(line) for line in result.output.splitlines() if line.startswith("{")]
+    assert [(record["id"], record["query"]) for record in records] == [
+        (1, QUERIES[0]), ("q2", QUERIES[1]), (4, QUERIES[2])
+    ]
+    expected = engine.search(QUERIES[1], max_results=3)
+    assert [r["chunk_id"] for r in records[1]["results"]] == [r.chunk_id for r in expected]
+    assert [r["rank"] for r in records[0]["results"]] == [1, 2, 3]
+
+
+def test_search_pages_matches_paging_one_query_at_a_time(engine, uncached):
+    second_page = uncached.search_page(QUERIES[1], page_size=3).next_cursor
+    pages = engine.search_pages(QUERIES[:3], page_size=3, cursors=[None, second_page, None])
+    expected = [
+        uncached.search_page(QUERIES[0], page_size=3),
+        uncached.search_page(QUERIES[1], page_size=3, cursor=second_page),
+        uncached.search_page(QUERIES[2], page_size=3),
+    ]
+    assert [ranking(page.results) for page in pages] == [ranking(page.results) for page in expected]
+    assert [page.offset for page in pages] == [0, 3, 0]
+    assert [page.next_cursor for page in pages] == [page.next_cursor for page in expected]
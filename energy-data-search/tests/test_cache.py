@@ -0,0 +1,76 @@
+"""Tests for the LRU/TTL caches and how index writes invalidate the search caches."""
+
+import time
+
+from conftest import write_corpus
+
+from energy_data_search.indexers.chromadb_indexer import ChromaDBIndexer
+from energy_data_search.query.search_engine import EnergyDataSearchEngine
+from energy_data_search.utils.cache import LRUCache, TTLCache
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"], stats["hit_ratio"]) == (2, 3, 1, 0.75)
+    assert stats["memory_kb"] > 0
+
+
+def test_zero_entries_disables_the_cache():
+    cache = LRUCache(max_entries=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None and len(cache) == 0
+
+
+def test_ttl_entries_expire():
+    cache = TTLCache(max_entries=4, ttl_seconds=0.05)
+    cache.put("a", [1, 2])
+    assert cache.get("a") == [1, 2]
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_repeated_searches_are_served_from_the_caches(engine):
+    first = engine.search("battery storage dispatch", max_results=5)
+    hits = engine.result_cache.hits
+    second = engine.search("battery storage dispatch", max_results=5)
+    assert [r.chunk_id for r in second] == [r.chunk_id for r in first]
+    assert engine.result_cache.hits == hits + 1
+
+    # Other parameters miss the result cache but reuse the query embedding
+    engine.search("battery storage dispatch", max_results=3)
+    assert engine.query_cache.hits >= 1
+    stats = engine.get_cache_stats()
+    assert stats["result_cache"]["entries"] == 2
+    assert stats["index_generation"] == engine.indexer.generation.current()
+
+
+def test_writes_by_another_indexer_invalidate_the_caches(engine):
+    query = "reliability forecast generator"
+    before = {r.source for r in engine.search(query, max_results=50)}
+
+    writer = ChromaDBIndexer.from_config(engine.config)
+    removed = sorted(before)[0]
+    writer.delete_by_source(removed)
+    writer.close()
+
+    after = {r.source for r in engine.search(query, max_results=50)}
+    assert after == before - {removed}
+    assert engine.get_cache_stats()["index_generation"] == engine.indexer.generation.current()
+
+
+def test_own_writes_invalidate_the_caches(config):
+    engine = EnergyDataSearchEngine(config)
+    assert engine.search("battery storage", max_results=5) == []
+    write_corpus(config.source_data_dir)
+    engine.index_all_sources()
+    assert len(engine.search("battery storage", max_results=5)) == 5
+    engine.close()
@@ -0,0 +1,93 @@
+"""Tests for the ChromaDB indexer: opening the store, seeing other writers, HNSW settings and lazy loading."""
+
+import subprocess
+import sys
+
+import numpy as np
+from langchain_core.documents import Document
+
+from energy_data_search.indexers.chromadb_indexer import ChromaDBIndexer
+from energy_data_search.query.search_engine import EnergyDataSearchEngine
+
+
+def documents(names, text="battery storage dispatch"):
+    return [
+        Document(page_content=f"{text} {name}", metadata={"source": f"/data/{name}.txt", "directory": "operations"})
+        for name in names
+    ]
+
+
+def test_open_client(config):
+    indexer = ChromaDBIndexer.from_config(config)
+    assert indexer.collection.count() == 0
+    assert [collection.name for collection in indexer.client.list_collections()] == [config.collection_name]
+
+    assert indexer.add_documents(documents(["a", "b"])) == 2
+    indexer.close()
+    reopened = ChromaDBIndexer.from_config(config)
+    assert reopened.collection.count() == 2
+    reopened.close()
+
+
+def test_reader_reopens_after_another_indexer_writes(config):
+    writer = ChromaDBIndexer.from_config(config)
+    writer.add_documents(documents(["a", "b"]))
+    reader = ChromaDBIndexer.from_config(config)
+    assert len(reader.search("battery storage", k=10)) == 2
+
+    writer.add_documents(documents(["c"]))
+    writer.delete_by_source("/data/a.txt")
+    assert reader.reopen_if_written()
+    assert not reader.reopen_if_written()
+    assert sorted(doc.metadata["source"] for doc, _ in reader.search("battery storage", k=10)) == [
+        "/data/b.txt", "/data/c.txt"
+    ]
+    writer.close()
+    reader.close()
+
+
+def test_collections_are_built_with_the_configured_hnsw_parameters(config):
+    indexer = ChromaDBIndexer.from_config(config.model_copy(update={
+        "hnsw_m": 8, "hnsw_construction_ef": 50, "hnsw_search_ef": 20
+    }))
+    indexer.add_documents(documents(["a"]))
+    stats = indexer.get_collection_stats()
+    assert (stats["hnsw_m"], stats["hnsw_construction_ef"], stats["hnsw_search_ef"]) == (8, 50, 20)
+    indexer.close()
+
+    # Opening an existing collection applies the search ef, but not the graph parameters
+    reopened = ChromaDBIndexer.from_config(config.model_copy(update={"hnsw_m": 32, "hnsw_search_ef": 64}))
+    assert reopened.collection.count() == 1
+    stats = reopened.get_collection_stats()
+    assert (stats["hnsw_m"], stats["hnsw_construction_ef"], stats["hnsw_search_ef"]) == (8, 50, 64)
+    reopened.close()
+
+
+def test_search_ef_override_keeps_the_top_k(engine):
+    indexer = engine.indexer
+    query = "interconnection study forecast"
+    embedding = np.asarray(indexer.embed_query(query))
+    stored = indexer.collection.get(include=["embeddings"])
+    exact = np.asarray(stored["embeddings"]) @ embedding
+    expected = [stored["ids"][i] for i in np.argsort(-exact)[:5]]
+
+    assert [doc.id for doc, _ in indexer.search(query, k=5)] == expected
+    assert [doc.id for doc, _ in indexer.search(query, k=5, ef=200)] == expected
+    assert [doc.id for doc, _ in indexer.search(query, k=5, ef=2)] == expected
+
+
+def test_model_and_client_load_on_first_search(engine):
+    reader = EnergyDataSearchEngine(engine.config)
+    assert reader.get_stats()["document_count"] == engine.indexer.collection.count()
+    assert reader.indexer._embeddings is None and reader.indexer._client is None
+
+    assert reader.search("battery storage", max_results=1)
+    assert reader.indexer._embeddings is not None and reader.indexer._client is not None
+    reader.close()
+
+
+def test_cli_defers_heavy_imports():
+    heavy = ("chromadb", "sentence_transformers", "torch", "langchain_community", "langchain_huggingface")
+    script = f"import sys; import energy_data_search.cli.main; print([m for m in {heavy!r} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,52 @@
+"""Tests for collapsing results by source and maximal marginal relevance."""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from energy_data_search.query.diversity import collapse_by_source, mmr_select
+
+
+def test_collapse_keeps_the_best_chunk_per_source():
+    results = [SimpleNamespace(chunk_id=chunk, source=source, source_hits=1)
+               for chunk, source in [("a1", "a"), ("b1", "b"), ("a2", "a"), ("c1", "c"), ("a3", "a")]]
+    collapsed = collapse_by_source(results)
+    assert [(r.chunk_id, r.source_hits) for r in collapsed] == [("a1", 3), ("b1", 1), ("c1", 1)]
+
+
+def test_mmr_skips_near_duplicates():
+    embeddings = np.array([[1.0, 0.0], [0.99, 0.14], [0.0, 1.0], [0.7, 0.7]])
+    relevance = np.array([0.9, 0.89, 0.5, 0.6])
+    assert mmr_select(relevance, embeddings, k=2, lambda_mult=0.5) == [0, 2]
+    # All relevance and no diversity is plain ranking
+    assert mmr_select(relevance, embeddings, k=4, lambda_mult=1.0) == [0, 1, 3, 2]
+    assert mmr_select(relevance, embeddings, k=0) == []
+    assert mmr_select(np.array([]), np.zeros((0, 2)), k=3) == []
+
+
+def test_collapsed_search_has_one_result_per_source(engine):
+    results = engine.search("battery storage dispatch reserve", max_results=5, collapse=True)
+    assert len(results) == 5
+    assert len({r.source for r in results}) == 5
+    assert sum(r.source_hits for r in results) > 5
+
+    plain = engine.search("battery storage dispatch reserve", max_results=5)
+    assert results[0].chunk_id == plain[0].chunk_id
+
+
+def mean_pairwise_similarity(engine, results) -> float:
+    vectors = engine.indexer.get_embeddings([r.chunk_id for r in results])
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    similarity = vectors @ vectors.T
+    n = len(results)
+    return float((similarity.sum() - n) / (n * (n - 1)))
+
+
+def test_mmr_search_returns_less_similar_results(engine):
+    query = "battery storage dispatch reserve"
+    plain = engine.search(query, max_results=6)
+    diverse = engine.search(query, max_results=6, mmr=True)
+    assert len(diverse) == 6
+    assert diverse[0].chunk_id == plain[0].chunk_id
+    assert {r.chunk_id for r in diverse} != {r.chunk_id for r in plain}
+    assert mean_pairwise_similarity(engine, diverse) < mean_pairwise_similarity(engine, plain)
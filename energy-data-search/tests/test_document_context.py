@@ -0,0 +1,49 @@
+"""Tests for looking up a chunk by ID with its neighbouring chunks."""
+
+from energy_data_search.indexers.chromadb_indexer import ChromaDBIndexer
+
+
+def chunk_ids_by_index(engine, source):
+    stored = engine.indexer.collection.get(where={"source": source}, include=["metadatas"])
+    return {metadata["chunk_index"]: chunk_id for chunk_id, metadata in zip(stored["ids"], stored["metadatas"])}
+
+
+def test_neighbours_come_from_the_same_source_in_order(engine):
+    source = engine.search("battery storage", max_results=1)[0].source
+    ids = chunk_ids_by_index(engine, source)
+    assert len(ids) >= 6
+
+    document = engine.get_document(ids[3], context=2)
+    assert document.chunk.chunk_id == ids[3]
+    assert document.chunk.chunk_index == 3
+    assert [chunk.chunk_index for chunk in document.before] == [1, 2]
+    assert [chunk.chunk_index for chunk in document.after] == [4, 5]
+    assert {chunk.metadata["source"] for chunk in document.before + document.after} == {source}
+    assert document.after[0].content == engine.get_chunks([ids[4]])[ids[4]]
+
+
+def test_context_stops_at_the_ends_of_the_document(engine):
+    source = engine.search("settlement invoice", max_results=1)[0].source
+    ids = chunk_ids_by_index(engine, source)
+    last = max(ids)
+
+    first = engine.get_document(ids[0], context=2)
+    assert first.before == [] and [chunk.chunk_index for chunk in first.after] == [1, 2]
+    end = engine.get_document(ids[last], context=5)
+    assert end.after == [] and len(end.before) == 5
+    alone = engine.get_document(ids[1], context=0)
+    assert alone.before == alone.after == []
+    assert len(engine.get_document(ids[1]).after) == engine.config.document_context_chunks
+
+    assert engine.get_document("no-such-chunk") is None
+
+
+def test_lookups_are_cached_until_the_index_changes(engine):
+    source = engine.search("transmission study", max_results=1)[0].source
+    ids = chunk_ids_by_index(engine, source)
+    assert engine.get_document(ids[2]) is engine.get_document(ids[2])
+
+    writer = ChromaDBIndexer.from_config(engine.config)
+    writer.delete_by_source(source)
+    writer.close()
+    assert engine.get_document(ids[2]) is None
@@ -0,0 +1,103 @@
+"""Tests for document dates, types and snippets, and the filters built on them."""
+
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from energy_data_search.loaders.document_metadata import (
+    classify_document_type,
+    date_to_int,
+    extract_document_date,
+    make_snippet,
+)
+from energy_data_search.query.search_engine import EnergyDataSearchEngine, build_where_clause
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("report_2024-03-15.pdf", 20240315),
+    ("minutes_20231102.txt", 20231102),
+    ("notice_04-01-2025.txt", 20250401),
+    ("posting_040125.pdf", 20250401),
+    ("posting_139925.pdf", None),
+    ("summary.txt", None),
+])
+def test_dates_from_file_names(name, expected):
+    assert extract_document_date(Path("docs") / name) == expected
+
+
+def test_content_dates_are_used_when_the_name_has_none():
+    content = "Board meeting\nHeld on March 5, 2024, after the notice of 2/1/2024."
+    assert extract_document_date(Path("minutes.txt"), content) == 20240305
+    assert extract_document_date(Path("minutes_20230101.txt"), content) == 20230101
+
+
+def test_date_to_int():
+    assert date_to_int("2024-03-15") == date_to_int(20240315) == date_to_int(date(2024, 3, 15)) == 20240315
+    for value in ("2024-13-01", "March 2024", "2024-02-30"):
+        with pytest.raises(ValueError):
+            date_to_int(value)
+
+
+@pytest.mark.parametrize("path, content, expected", [
+    ("revision_requests/NPRR1186_battery_state_of_charge.docx", "", "NPRR"),
+    ("protocols/nogrr_245.pdf", "", "NOGRR"),
+    ("nodal_protocols/Section_06_Adjustment_Period.pdf", "", "protocol"),
+    ("market_guides/Retail_Market_Guide.pdf", "", "guide"),
+    ("uploads/draft.txt", "Planning Guide Revision Request PGRR 107", "PGRR"),
+    ("uploads/draft.txt", "Quarterly report on load", "report"),
+    ("uploads/draft.txt", "Nothing to see", "other"),
+])
+def test_classify_document_type(path, content, expected):
+    assert classify_document_type(Path(path), content) == expected
+
+
+def test_protocol_sections_citing_revision_requests_stay_protocols():
+    content = "[NPRR1186: Replace paragraph (3) below upon system implementation:]"
+    assert classify_document_type(Path("nodal_protocols/Section_06_Adjustment_Period.pdf"), content) == "protocol"
+
+
+def test_make_snippet_cuts_at_a_word():
+    assert make_snippet("short  text\nhere") == "short text here"
+    assert make_snippet("alpha beta gamma delta", length=12) == "alpha beta..."
+
+
+def test_build_where_clause():
+    assert build_where_clause() is None
+    assert build_where_clause(directory="protocols") == {"directory": "protocols"}
+    assert build_where_clause(document_types=["NPRR"], date_from="2024-01-01", date_to=20241231) == {"$and": [
+        {"document_type": {"$in": ["NPRR"]}},
+        {"document_date": {"$gte": 20240101}},
+        {"document_date": {"$lte": 20241231}},
+    ]}
+    with pytest.raises(ValueError):
+        build_where_clause(date_from="yesterday")
+
+
+def test_search_filters_on_type_and_date(config):
+    files = {
+        "revision_requests/NPRR1001_2024-02-01.txt": "settlement invoice credit",
+        "revision_requests/NPRR1002_2024-09-01.txt": "settlement invoice dispute",
+        "protocols/Section_09_2024-05-01.txt": "settlement invoice payment, see NPRR1001",
+        "reports/settlement_report_2023-11-01.txt": "settlement invoice report",
+    }
+    for name, text in files.items():
+        path = config.source_data_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    engine = EnergyDataSearchEngine(config)
+    engine.index_all_sources()
+
+    def sources(**filters):
+        results = engine.search("settlement invoice", max_results=10, **filters)
+        return sorted(Path(result.source).name for result in results)
+
+    assert sources(document_types=["NPRR"]) == ["NPRR1001_2024-02-01.txt", "NPRR1002_2024-09-01.txt"]
+    assert sources(document_types=["protocol"]) == ["Section_09_2024-05-01.txt"]
+    assert sources(date_from="2024-03-01", date_to="2024-12-31") == [
+        "NPRR1002_2024-09-01.txt", "Section_09_2024-05-01.txt"
+    ]
+    assert sources(document_types=["NPRR", "report"], date_to="2024-03-01") == [
+        "NPRR1001_2024-02-01.txt", "settlement_report_2023-11-01.txt"
+    ]
+    engine.close()
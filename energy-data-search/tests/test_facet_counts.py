@@ -0,0 +1,70 @@
+"""Tests for facet counts and how index writes keep them current."""
+
+from collections import Counter
+
+from conftest import FILES_PER_TOPIC, TOPICS
+
+from energy_data_search.indexers.chromadb_indexer import ChromaDBIndexer
+from energy_data_search.indexers.facet_counts import FacetCounts
+
+
+def test_update_count_and_estimate(tmp_path):
+    facets = FacetCounts(tmp_path / "facets.json")
+    facets.update(added=[
+        {"directory": "protocols", "file_type": "pdf"},
+        {"directory": "protocols", "file_type": "txt"},
+        {"directory": "planning", "file_type": "pdf"},
+    ])
+    facets.update(removed=[{"directory": "planning", "file_type": "pdf"}])
+
+    assert facets.total == 2
+    assert facets.count("directory", "protocols") == 2
+    assert "planning" not in facets.counts["directory"]
+    assert facets.estimate({"directory": "protocols"}) == 2
+    assert facets.estimate({"$and": [{"directory": "protocols"}, {"file_type": {"$eq": "pdf"}}]}) == 1
+    assert facets.estimate({"file_type": {"$in": ["pdf", "txt"]}}) == 2
+    assert facets.estimate({"source": "a.pdf"}) is None
+
+
+def test_save_and_load_keep_the_generation(tmp_path):
+    facets = FacetCounts(tmp_path / "facets.json")
+    facets.update(added=[{"document_type": "NPRR"}])
+    facets.save(generation=4)
+
+    loaded = FacetCounts(tmp_path / "facets.json")
+    loaded.load()
+    assert loaded.generation == 4
+    assert loaded.count("document_type", "NPRR") == 1
+
+
+def stored_directories(indexer: ChromaDBIndexer) -> Counter:
+    metadatas = indexer.collection.get(include=["metadatas"])["metadatas"]
+    return Counter(metadata["directory"] for metadata in metadatas)
+
+
+def test_writes_keep_counts_equal_to_the_stored_chunks(engine):
+    indexer = engine.indexer
+    assert indexer.facet_counts.counts["directory"] == stored_directories(indexer)
+    assert indexer.facet_counts.total == indexer.collection.count()
+    assert len(indexer.facet_counts.counts["directory"]) == len(TOPICS)
+
+    source = indexer.collection.get(where={"directory": "planning"}, limit=1, include=["metadatas"])["metadatas"][0]["source"]
+    indexer.delete_by_source(source)
+    assert indexer.facet_counts.counts["directory"] == stored_directories(indexer)
+
+    # Counts are committed with the generation, so another reader uses them as saved
+    reader = ChromaDBIndexer.from_config(engine.config)
+    reader.facet_counts.load()
+    assert reader.facet_counts.generation == reader.generation.current()
+    assert reader.facet_counts.counts == indexer.facet_counts.counts
+
+
+def test_rebuild_gives_the_same_counts(engine):
+    indexer = engine.indexer
+    counts = {field: dict(values) for field, values in indexer.facet_counts.counts.items()}
+    generation = indexer.generation.current()
+
+    assert indexer.rebuild_facet_counts() == indexer.collection.count()
+    assert indexer.facet_counts.counts == counts
+    assert indexer.generation.current() == generation + 1
+    assert sum(indexer.facet_counts.counts["file_type"].values()) >= FILES_PER_TOPIC * len(TOPICS)
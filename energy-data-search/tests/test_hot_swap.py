@@ -0,0 +1,63 @@
+"""Tests for swapping in a new engine when the index is written or replaced."""
+
+import threading
+
+import pytest
+
+from energy_data_search.indexers.chromadb_indexer import ChromaDBIndexer
+from energy_data_search.query.search_engine import EnergyDataSearchEngine
+
+
+@pytest.fixture
+def server(engine):
+    """An engine opened on the built index that does not follow writes, as the API runs it."""
+    server = EnergyDataSearchEngine(engine.config)
+    server.follow_writes = False
+    yield server
+    server.close()
+
+
+def test_writes_and_replacements_are_detected(server):
+    assert not server.index_changed()
+
+    writer = ChromaDBIndexer.from_config(server.config)
+    writer.delete_by_source(server.search("battery", max_results=1)[0].source)
+    assert server.index_changed() and not server.index_replaced()
+    # Not followed in place: the generation it read stays the same
+    server.refresh()
+    assert server.index_changed()
+
+    writer.clear_collection()
+    writer.close()
+    assert server.index_replaced()
+
+
+def test_reopen_serves_the_new_index_and_shares_the_models(server):
+    server.search("battery storage", max_results=3)
+    writer = ChromaDBIndexer.from_config(server.config)
+    writer.clear_collection()
+    writer.close()
+
+    new_engine = server.reopen()
+    assert new_engine.index_identity != server.index_identity
+    assert not new_engine.index_changed()
+    assert new_engine.search("battery storage", max_results=3) == []
+    assert new_engine.query_cache is server.query_cache
+    assert new_engine.reranker is server.reranker
+    assert new_engine.indexer._embeddings is server.indexer._embeddings
+    assert new_engine.follow_writes is False
+    new_engine.close()
+
+
+def test_close_waits_for_running_calls(engine):
+    engine.acquire()
+    assert not engine.close(timeout=0.05)
+    # Still open for the call that holds it
+    assert engine.search("settlement invoice", max_results=2)
+
+    closed = []
+    closer = threading.Thread(target=lambda: closed.append(engine.close(timeout=10)))
+    closer.start()
+    engine.release()
+    closer.join()
+    assert closed == [True]
@@ -0,0 +1,39 @@
+"""Tests for snippet-only search results and hydrating them with the full chunk text."""
+
+from dataclasses import replace
+
+QUERY = "settlement invoice dispute"
+
+
+def test_unhydrated_results_carry_their_snippet(engine):
+    results = engine.search(QUERY, max_results=5, hydrate=False)
+    full = engine.search(QUERY, max_results=5, hydrate=True)
+    assert [r.chunk_id for r in results] == [r.chunk_id for r in full]
+
+    for result, hydrated in zip(results, full):
+        assert not result.hydrated and hydrated.hydrated
+        assert result.content == result.snippet
+        assert len(result.snippet) <= engine.config.snippet_length + 3
+        assert hydrated.content.startswith(result.snippet.rstrip(". "))
+        assert "snippet" not in result.metadata
+
+
+def test_hydrate_fills_in_the_full_text(engine):
+    results = engine.search(QUERY, max_results=5, hydrate=False)
+    hydrated = engine.hydrate(results)
+    chunks = engine.get_chunks([r.chunk_id for r in results])
+    assert [r.content for r in hydrated] == [chunks[r.chunk_id] for r in results]
+    assert all(r.hydrated for r in hydrated)
+
+    # Copies are returned, so the cached snippet-only results are left alone
+    assert not any(r.hydrated for r in results)
+    assert not any(r.hydrated for r in engine.search(QUERY, max_results=5, hydrate=False))
+    assert engine.hydrate(hydrated) is hydrated
+
+
+def test_hydrate_leaves_missing_chunks_unhydrated(engine):
+    results = engine.search(QUERY, max_results=2, hydrate=False)
+    gone = replace(results[0], chunk_id="no-such-chunk")
+    hydrated = engine.hydrate([gone, results[1]])
+    assert hydrated[0] is gone
+    assert hydrated[1].hydrated
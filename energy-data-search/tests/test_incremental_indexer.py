@@ -0,0 +1,101 @@
+"""Tests for incremental indexing of added, changed and removed files, and compaction."""
+
+from pathlib import Path
+
+import pytest
+from conftest import make_config, write_corpus
+
+from energy_data_search.query.incremental_indexer import IncrementalIndexer
+
+
+@pytest.fixture
+def incremental(tmp_path, monkeypatch):
+    """An indexer over the test corpus, configured with a relative source directory."""
+    monkeypatch.chdir(tmp_path)
+    config = make_config(tmp_path, source_data_dir=Path("src"))
+    write_corpus(config.source_data_dir)
+    indexer = IncrementalIndexer(config)
+    indexer.index_new_documents()
+    yield indexer
+    indexer.indexer.close()
+
+
+def chunk_counts(incremental: IncrementalIndexer) -> dict:
+    metadatas = incremental.indexer.collection.get(include=["metadatas"])["metadatas"]
+    counts = {}
+    for metadata in metadatas:
+        counts[metadata["source"]] = counts.get(metadata["source"], 0) + 1
+    return counts
+
+
+def test_sources_are_absolute(incremental):
+    sources = chunk_counts(incremental)
+    assert all(Path(source).is_absolute() for source in sources)
+    assert set(sources) == set(incremental.tracker.indexed_files)
+
+
+def test_removed_files_lose_their_chunks(incremental):
+    removed = Path("src/planning/planning_00.txt")
+    source = str(removed.absolute())
+    chunks = chunk_counts(incremental)[source]
+    removed.unlink()
+
+    results = incremental.index_new_documents()
+    assert results["removed_files"] == [source]
+    assert results["total_chunks_removed"] == chunks
+    assert source not in chunk_counts(incremental)
+    assert not incremental.tracker.is_file_indexed(removed)
+    assert all(other != source for other, _ in incremental.indexer.related_documents.related(
+        str(Path("src/planning/planning_01.txt").absolute())
+    ))
+
+
+def test_modified_files_replace_their_chunks(incremental):
+    changed = Path("src/operations/operations_02.txt")
+    source = str(changed.absolute())
+    changed.write_text("battery storage dispatch " * 3)
+
+    results = incremental.index_new_documents()
+    assert results["modified_files"] == [source]
+    assert chunk_counts(incremental)[source] == 1
+    hits = incremental.indexer.collection.get(where={"source": source}, include=["documents"])["documents"]
+    assert hits == [changed.read_text().strip()]
+
+
+def test_a_file_emptied_loses_its_chunks(incremental):
+    emptied = Path("src/protocols/protocols_03.txt")
+    source = str(emptied.absolute())
+    total = incremental.indexer.collection.count()
+    chunks = chunk_counts(incremental)[source]
+    emptied.write_text("")
+
+    results = incremental.index_new_documents()
+    assert results["total_chunks_removed"] == chunks
+    assert source not in chunk_counts(incremental)
+    assert incremental.indexer.collection.count() == total - chunks
+    assert not incremental.tracker.is_file_indexed(emptied)
+
+
+def test_force_reindex_replaces_the_chunks(incremental):
+    path = Path("src/planning/planning_04.txt")
+    chunks = chunk_counts(incremental)[str(path.absolute())]
+    result = incremental.force_reindex_file(path)
+    assert result["success"]
+    assert result["chunks_removed"] == result["chunks_added"] == chunks
+    assert chunk_counts(incremental)[str(path.absolute())] == chunks
+
+
+def test_compact_keeps_every_chunk(incremental):
+    for path in sorted(Path("src/operations").glob("*.txt"))[:3]:
+        path.unlink()
+    incremental.index_new_documents()
+    indexer = incremental.indexer
+    query = indexer.embeddings.embed_query("battery storage dispatch")
+    before = [doc.id for doc, _ in indexer.search_by_vector(query, k=10)]
+    count = indexer.collection.count()
+
+    result = indexer.compact()
+    assert result["live_chunks"] == count
+    assert indexer.collection.count() == count
+    assert [doc.id for doc, _ in indexer.search_by_vector(query, k=10)] == before
+    assert indexer.get_collection_stats()["dead_vectors"] == 0
@@ -0,0 +1,146 @@
+"""Tests for varint postings, BM25 search and reciprocal rank fusion."""
+
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from energy_data_search.indexers.lexical_index import (
+    LexicalIndex,
+    decode_varints,
+    encode_varints,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+
+def test_varints_round_trip():
+    values = np.array([0, 1, 127, 128, 300, 16383, 16384, 2 ** 21, 2 ** 40], dtype=np.uint64)
+    encoded = encode_varints(values)
+    assert encoded.dtype == np.uint8
+    assert len(encoded) == 1 + 1 + 1 + 2 + 2 + 2 + 3 + 4 + 6
+    np.testing.assert_array_equal(decode_varints(encoded), values.astype(np.int64))
+
+
+def test_varints_of_nothing():
+    assert len(encode_varints(np.array([], dtype=np.uint64))) == 0
+    assert len(decode_varints(np.array([], dtype=np.uint8))) == 0
+
+
+def test_tokenize_keeps_section_numbers_and_ids_whole():
+    assert tokenize("See Section 6.5.7 of NPRR-1186 and the protocol") == ["see", "section", "6.5.7", "nprr-1186", "protocol"]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LexicalIndex(tmp_path / "lexical")
+    index.add(
+        ["a", "b", "c"],
+        [
+            "battery storage resource dispatch",
+            "battery battery battery storage",
+            "transmission outage coordination",
+        ]
+    )
+    index.save()
+    return index
+
+
+def test_bm25_ranks_by_term_frequency_and_rarity(index):
+    ranked = [doc_id for doc_id, _ in index.search("battery")]
+    assert ranked == ["b", "a"]
+    # "outage" is rarer than "storage", so it outweighs it
+    assert index.search("storage outage")[0][0] == "c"
+    assert index.search("unrelated words") == []
+
+
+def test_removed_and_replaced_chunks(index):
+    index.remove(["b"])
+    index.add(["a"], ["transmission planning"])
+    index.save()
+    assert index.search("battery") == []
+    assert {doc_id for doc_id, _ in index.search("transmission")} == {"a", "c"}
+    assert len(index) == 2
+
+
+def test_segments_merge_without_changing_results(tmp_path):
+    index = LexicalIndex(tmp_path / "lexical", max_segments=2)
+    for n in range(6):
+        index.add([f"doc{n}"], [f"market settlement {'invoice ' * n}"])
+        index.save()
+    assert len(index.segments) <= 3
+    assert [doc_id for doc_id, _ in index.search("invoice", k=3)] == ["doc5", "doc4", "doc3"]
+
+
+def test_writes_never_change_a_searched_segment_set(index):
+    segments, deleted, locations = index.segments, index.deleted, index.locations
+    before = ([set(d) for d in deleted], dict(locations))
+
+    index.remove(["a"])
+    index.add(["b", "d"], ["transmission planning", "frequency response"])
+    index.save()
+    index._merge(range(len(index.segments)))
+
+    assert index.segments is not segments
+    assert len(segments) == 1
+    assert ([set(d) for d in deleted], dict(locations)) == before
+
+
+def test_search_while_writing(tmp_path):
+    index = LexicalIndex(tmp_path / "lexical", max_segments=2)
+    index.add([f"doc{n}" for n in range(50)], ["battery storage dispatch"] * 50)
+    errors, done = [], threading.Event()
+
+    def search():
+        while not done.is_set():
+            try:
+                hits = index.search("battery", k=100)
+                assert len({doc_id for doc_id, _ in hits}) == len(hits) >= 49
+            except Exception as e:
+                errors.append(e)
+                return
+
+    reader = threading.Thread(target=search)
+    reader.start()
+    for n in range(200):
+        index.remove([f"doc{n % 50}"])
+        index.add([f"doc{n % 50}"], [f"battery storage {n}"])
+        if n % 20 == 0:
+            index.save()
+    done.set()
+    reader.join()
+    assert not errors
+    assert len(index.search("battery", k=100)) == 50
+
+
+def test_tombstoned_documents_do_not_count_towards_document_frequency(index):
+    index.add(["b"], ["battery"])
+    index.add(["b"], ["battery"])
+    # The replaced copies of "b" keep their postings, but only two documents hold "battery"
+    assert [doc_id for doc_id, _ in index.search("battery")] == ["b", "a"]
+
+
+def test_reloads_when_another_instance_saves(index, tmp_path):
+    reader = LexicalIndex(tmp_path / "lexical")
+    assert reader.search("frequency") == []
+
+    writer = LexicalIndex(tmp_path / "lexical")
+    writer.add(["d"], ["frequency response"])
+    writer.save()
+    # Make sure the manifest's mtime differs on coarse-grained filesystems
+    manifest = tmp_path / "lexical" / "manifest.json"
+    stat = os.stat(manifest)
+    os.utime(manifest, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert [doc_id for doc_id, _ in reader.search("frequency")] == ["d"]
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+    scores = dict(fused)
+    assert fused[0][0] == "b"
+    assert scores["b"] == pytest.approx(1 / 62 + 1 / 61)
+    assert scores["a"] == pytest.approx(1 / 61)
+    assert scores["d"] == pytest.approx(1 / 62)
+    assert [doc_id for doc_id, _ in fused] == ["b", "a", "d", "c"]
@@ -0,0 +1,58 @@
+"""Tests for search cursors and paging through ranked results."""
+
+import pytest
+
+from energy_data_search.query.pagination import (
+    CursorError,
+    decode_cursor,
+    encode_cursor,
+    search_fingerprint,
+)
+
+
+def test_cursor_round_trip():
+    fingerprint = search_fingerprint("battery storage", {"directory": "operations"}, 0.3)
+    cursor = encode_cursor(fingerprint, 40)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (fingerprint, 40)
+
+
+def test_fingerprint_depends_on_every_parameter():
+    assert search_fingerprint("q", None, 0.3) == search_fingerprint("q", None, 0.3)
+    assert search_fingerprint("q", None, 0.3) != search_fingerprint("q", None, 0.4)
+    assert search_fingerprint("q", {"a": 1}) != search_fingerprint("q", {"a": 2})
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", encode_cursor("abc", 0)[:-3], "eyJmIjoiYSJ9", encode_cursor("abc", -5)])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(CursorError):
+        decode_cursor(cursor)
+
+
+def test_pages_cover_the_ranking_without_repeats(engine):
+    query = "battery storage dispatch"
+    everything = [result.chunk_id for result in engine.search(query, max_results=30)]
+
+    seen, cursor = [], None
+    for _ in range(3):
+        page = engine.search_page(query, page_size=10, cursor=cursor)
+        seen.extend(result.chunk_id for result in page.results)
+        cursor = page.next_cursor
+        assert cursor is not None
+    assert len(seen) == len(set(seen)) == 30
+    assert seen == everything
+
+
+def test_last_page_has_no_cursor(engine):
+    total = engine.indexer.collection.count()
+    page = engine.search_page("settlement invoice", page_size=total)
+    assert page.next_cursor is None
+    assert len(page.results) == total
+
+
+def test_cursor_of_another_search_is_rejected(engine):
+    page = engine.search_page("settlement invoice", page_size=5)
+    with pytest.raises(CursorError, match="different query"):
+        engine.search_page("transmission study", page_size=5, cursor=page.next_cursor)
+    with pytest.raises(CursorError):
+        engine.search_page("settlement invoice", page_size=5, cursor=page.next_cursor, filter_directory="planning")
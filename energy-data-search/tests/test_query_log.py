@@ -0,0 +1,66 @@
+"""Tests for the search request log and the warmup that replays it."""
+
+import json
+import threading
+
+from energy_data_search.query.query_log import QueryLog
+from energy_data_search.query.search_engine import EnergyDataSearchEngine
+
+
+def test_top_counts_requests_across_the_rotated_file(tmp_path):
+    log = QueryLog(tmp_path / "log" / "queries.jsonl", max_bytes=400)
+    for query, times in [("battery", 3), ("settlement", 5), ("outage", 1)]:
+        for _ in range(times):
+            log.record({"query": query, "page_size": 10})
+            log.flush()
+    assert log.rotated_path.exists()
+    assert log.path.stat().st_size < log.rotated_path.stat().st_size
+
+    assert log.top(2) == [{"query": "settlement", "page_size": 10}, {"query": "battery", "page_size": 10}]
+    assert log.top(0) == []
+    # Options are part of the request
+    log.record({"page_size": 20, "query": "outage"})
+    assert {"query": "outage", "page_size": 20} in log.top(10)
+
+
+def test_unreadable_lines_are_skipped(tmp_path):
+    log = QueryLog(tmp_path / "queries.jsonl")
+    log.path.write_text("not json\n" + json.dumps({"ts": 1}) + "\n")
+    log.record({"query": "battery"})
+    assert log.top(5) == [{"query": "battery"}]
+
+
+def test_requests_are_dropped_when_the_writer_falls_behind(tmp_path):
+    log = QueryLog(tmp_path / "queries.jsonl", max_pending=2)
+    blocked = threading.Event()
+    write_lines = log._write_lines
+
+    def slow_writer():
+        blocked.wait()
+        write_lines()
+
+    log._write_lines = slow_writer
+    for n in range(5):
+        log.record({"query": f"q{n}"})
+    blocked.set()
+    log.flush()
+    assert [json.loads(line)["params"]["query"] for line in log.path.read_text().splitlines()] == ["q0", "q1"]
+
+
+def test_warmup_precomputes_logged_searches(engine):
+    searches = [
+        {"query": "battery storage", "page_size": 5},
+        {"query": "settlement invoice", "page_size": 5, "filter_directory": "protocols"},
+        {"query": "outage", "no_such_argument": 1},
+    ]
+    reader = EnergyDataSearchEngine(engine.config)
+    stats = reader.warmup(searches)
+    assert stats["precomputed"] == 2
+    assert {"embed_ms", "index_ms", "precompute_ms", "total_ms"} <= set(stats)
+    # The synthetic warmup batch bypasses the caches; only the logged searches land there
+    assert len(reader.page_cache) == 2
+
+    hits = reader.page_cache.hits
+    reader.search_page(**searches[0])
+    assert reader.page_cache.hits == hits + 1
+    reader.close()
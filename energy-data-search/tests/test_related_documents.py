@@ -0,0 +1,104 @@
+"""Tests for the related-documents graph and its incremental updates."""
+
+import numpy as np
+import pytest
+
+from energy_data_search.indexers.related_documents import RelatedDocuments, mean_embeddings
+
+
+def random_centroids(names, dimension: int = 16, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((len(names), dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return dict(zip(names, vectors, strict=True))
+
+
+def assert_same_graph(graph: RelatedDocuments, expected: RelatedDocuments):
+    assert sorted(graph.sources) == sorted(expected.sources)
+    for source in expected.sources:
+        ours, theirs = graph.related(source), expected.related(source)
+        assert [other for other, _ in ours] == [other for other, _ in theirs], source
+        # Graphs read back from disk hold float16 centroids
+        assert [score for _, score in ours] == pytest.approx([score for _, score in theirs], abs=1e-3)
+
+
+def test_mean_embeddings_are_normalized_per_source():
+    pages = [
+        ([[1.0, 0.0], [0.0, 1.0]], [{"source": "a"}, {"source": "a"}]),
+        ([[3.0, 0.0], [5.0, 5.0]], [{"source": "b"}, None]),
+    ]
+    centroids = mean_embeddings(pages)
+    assert set(centroids) == {"a", "b"}
+    np.testing.assert_allclose(centroids["a"], [2 ** -0.5, 2 ** -0.5], rtol=1e-6)
+    np.testing.assert_allclose(centroids["b"], [1.0, 0.0])
+
+
+def test_build_lists_the_nearest_other_sources(tmp_path):
+    graph = RelatedDocuments(tmp_path / "related.npz", k=2)
+    graph.build({
+        "a": np.array([1.0, 0.0], dtype=np.float32),
+        "b": np.array([0.8, 0.6], dtype=np.float32),
+        "c": np.array([0.0, 1.0], dtype=np.float32),
+    })
+    assert graph.related("a") == [("b", pytest.approx(0.8)), ("c", pytest.approx(0.0))]
+    assert graph.related("a", limit=1) == [("b", pytest.approx(0.8))]
+    assert graph.related("unknown") == []
+
+
+def test_update_gives_the_graph_a_full_build_would(tmp_path):
+    names = [f"doc{i:02d}" for i in range(60)]
+    centroids = random_centroids(names)
+    graph = RelatedDocuments(tmp_path / "related.npz", k=5)
+    graph.build(centroids)
+
+    changed = random_centroids(["doc03", "doc10", "new1", "new2"], seed=1)
+    removed = ["doc20", "doc21", "doc40"]
+    graph.update(changed, removed=removed)
+
+    expected_centroids = {name: vector for name, vector in centroids.items() if name not in removed}
+    expected_centroids.update(changed)
+    expected = RelatedDocuments(tmp_path / "expected.npz", k=5)
+    expected.build(expected_centroids)
+    assert_same_graph(graph, expected)
+    assert not any(other in removed for source in graph.sources for other, _ in graph.related(source))
+
+
+def test_update_with_another_k_searches_every_row(tmp_path):
+    centroids = random_centroids([f"doc{i}" for i in range(20)])
+    graph = RelatedDocuments(tmp_path / "related.npz", k=3)
+    graph.build(centroids)
+    graph.save()
+
+    wider = RelatedDocuments(tmp_path / "related.npz", k=6)
+    wider.load()
+    wider.update(random_centroids(["doc0"], seed=2))
+    centroids.update(random_centroids(["doc0"], seed=2))
+    expected = RelatedDocuments(tmp_path / "expected.npz", k=6)
+    expected.build(centroids)
+    assert_same_graph(wider, expected)
+
+
+def test_readers_reload_a_saved_graph(tmp_path):
+    path = tmp_path / "related.npz"
+    reader = RelatedDocuments(path, k=2)
+    assert reader.related("a") == []
+
+    writer = RelatedDocuments(path, k=2)
+    writer.build(random_centroids(["a", "b", "c"]))
+    writer.save()
+    assert [other for other, _ in reader.related("a")] == [other for other, _ in writer.related("a")]
+
+
+def test_index_updates_refresh_the_graph(engine):
+    indexer = engine.indexer
+    sources = sorted({metadata["source"] for metadata in indexer.collection.get(include=["metadatas"])["metadatas"]})
+    removed = sources[0]
+    indexer.delete_by_source(removed)
+    indexer.refresh_related_documents([removed])
+
+    refreshed = {source: indexer.related_documents.related(source) for source in sources[1:]}
+    assert indexer.related_documents.related(removed) == []
+    indexer.rebuild_related_documents()
+    for source in sources[1:]:
+        rebuilt = indexer.related_documents.related(source)
+        assert [other for other, _ in refreshed[source]] == [other for other, _ in rebuilt]
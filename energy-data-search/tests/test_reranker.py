@@ -0,0 +1,89 @@
+"""Tests for cross-encoder reranking under a latency budget."""
+
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from energy_data_search.query.reranker import CrossEncoderReranker
+
+
+class WordOverlapEncoder:
+    """Stands in for a CrossEncoder: scores a pair by the query words found in the text."""
+
+    loaded = 0
+
+    def __init__(self, model_name, max_length=512, device="cpu"):
+        time.sleep(0.05)
+        WordOverlapEncoder.loaded += 1
+        self.pairs = 0
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.pairs += len(pairs)
+        return [float(sum(word in text.split() for word in query.split())) for query, text in pairs]
+
+
+@pytest.fixture
+def reranker(monkeypatch):
+    WordOverlapEncoder.loaded = 0
+    monkeypatch.setitem(sys.modules, "sentence_transformers", SimpleNamespace(CrossEncoder=WordOverlapEncoder))
+    return CrossEncoderReranker()
+
+
+def candidates(*texts):
+    return [SimpleNamespace(chunk_id=f"c{i}", content=text, rerank_score=None) for i, text in enumerate(texts)]
+
+
+def test_reranks_by_score_and_keeps_the_top_k(reranker):
+    results, info = reranker.rerank("battery storage", candidates("outage", "battery", "battery storage"), k=2)
+    assert [result.chunk_id for result in results] == ["c2", "c1"]
+    assert [result.rerank_score for result in results] == [2.0, 1.0]
+    assert info["status"] == "reranked" and info["scored"] == 3
+
+
+def test_scores_are_cached_per_query_and_chunk(reranker):
+    reranker.rerank("battery", candidates("outage", "battery"), k=2)
+    _, info = reranker.rerank("battery", candidates("outage", "battery"), k=2)
+    assert info["cached"] == 2 and info["scored"] == 0
+    assert reranker.model.pairs == 2
+
+
+def test_budget_limits_the_pairs_scored(reranker):
+    def ten_ms_per_pair(pairs, **kwargs):
+        time.sleep(0.01 * len(pairs))
+        return [1.0] * len(pairs)
+
+    reranker.model.predict = ten_ms_per_pair
+    reranker.ms_per_pair = 10.0
+
+    results, info = reranker.rerank("q", candidates("a", "b", "c", "d"), k=4, budget_ms=25)
+    assert info["status"] == "truncated" and info["scored"] == 2
+    assert [result.rerank_score for result in results] == [1.0, 1.0, None, None]
+
+    results, info = reranker.rerank("other", candidates("a", "b"), k=2, budget_ms=1)
+    assert info["status"] == "skipped"
+    assert [result.chunk_id for result in results] == ["c0", "c1"]
+    assert reranker.stats()["truncated"] == reranker.stats()["skipped"] == 1
+
+
+def test_a_failing_model_keeps_the_retrieval_order(reranker):
+    def fail(pairs, **kwargs):
+        raise RuntimeError("model unavailable")
+
+    reranker.model.predict = fail
+    results, info = reranker.rerank("battery", candidates("outage", "battery"), k=2)
+    assert info["status"] == "failed"
+    assert [result.chunk_id for result in results] == ["c0", "c1"]
+
+
+def test_model_loads_once_across_threads(reranker):
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(reranker.model)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert WordOverlapEncoder.loaded == 1
+    assert all(model is models[0] for model in models)
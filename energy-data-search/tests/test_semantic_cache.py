@@ -0,0 +1,76 @@
+"""Tests for the semantic result cache and how searches use it."""
+
+from types import SimpleNamespace
+
+from energy_data_search.query.semantic_cache import SemanticCache
+
+
+def results(*chunk_ids):
+    return [SimpleNamespace(chunk_id=chunk_id) for chunk_id in chunk_ids]
+
+
+def test_similar_queries_with_the_same_key_hit():
+    cache = SemanticCache(max_entries=4, threshold=0.9)
+    cache.put([1.0, 0.0, 0.0], "k", "first", results("a"))
+    cache.put([0.0, 1.0, 0.0], "k", "second", results("b"))
+
+    cached, query, similarity = cache.get([0.95, 0.1, 0.0], "k")
+    assert query == "first" and [r.chunk_id for r in cached] == ["a"]
+    assert similarity > 0.99
+    assert cache.get([0.95, 0.1, 0.0], "other") is None
+    assert cache.get([0.6, 0.6, 0.5], "k") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = SemanticCache(max_entries=2, threshold=0.99)
+    cache.put([1.0, 0.0], "k", "a", results("a"))
+    cache.put([0.0, 1.0], "k", "b", results("b"))
+    assert cache.get([1.0, 0.0], "k") is not None
+    cache.put([-1.0, 0.0], "k", "c", results("c"))
+    assert len(cache) == 2
+    assert cache.get([0.0, 1.0], "k") is None
+    assert cache.get([1.0, 0.0], "k") is not None
+
+    cache.clear()
+    assert len(cache) == 0 and cache.get([1.0, 0.0], "k") is None
+    assert SemanticCache(max_entries=0).get([1.0, 0.0], "k") is None
+
+
+def test_audit_counts_false_hits():
+    cache = SemanticCache(min_overlap=0.5)
+    assert not cache.audit(results("a", "b"), results("a", "c"))
+    assert cache.audit(results("a", "b"), results("c", "d", "e"))
+    stats = cache.stats()
+    assert (stats["audits"], stats["false_hits"], stats["false_hit_rate"]) == (2, 1, 0.5)
+
+
+def test_paraphrases_are_served_from_the_semantic_cache(engine):
+    engine.semantic_cache.audit_rate = 0
+    first = engine.search("settlement invoice dispute", max_results=5)
+    # HashEmbeddings ignores word order, so the reordered query is a perfect match
+    second = engine.search("dispute settlement invoice", max_results=5)
+    assert [r.chunk_id for r in second] == [r.chunk_id for r in first]
+    assert engine.semantic_cache.hits == 1
+
+    # Other parameters are searched afresh
+    engine.search("dispute invoice settlement", max_results=3)
+    assert engine.semantic_cache.hits == 1
+
+
+def test_numbers_in_the_query_must_match(engine):
+    engine.semantic_cache.audit_rate = 0
+    engine.semantic_cache.threshold = 0.5
+    engine.search("NPRR 1186 settlement invoice dispute", max_results=5)
+    engine.search("NPRR 1187 settlement invoice dispute", max_results=5)
+    assert engine.semantic_cache.hits == 0
+    engine.search("settlement NPRR 1186 invoice", max_results=5)
+    assert engine.semantic_cache.hits == 1
+
+
+def test_audited_hits_are_searched_again(engine):
+    engine.semantic_cache.audit_rate = 1.0
+    engine.search("battery storage dispatch", max_results=5)
+    engine.search("dispatch storage battery", max_results=5)
+    stats = engine.semantic_cache.stats()
+    assert (stats["hits"], stats["audits"], stats["false_hits"]) == (1, 1, 0)
@@ -0,0 +1,84 @@
+"""Tests for exporting, serving and importing snapshot bundles."""
+
+import pytest
+from conftest import make_config
+
+from energy_data_search.indexers.snapshot import Snapshot, SnapshotError, SnapshotIndexer
+from energy_data_search.query.search_engine import EnergyDataSearchEngine
+
+QUERY = "transmission interconnection study"
+
+
+@pytest.fixture
+def snapshot_dir(engine, tmp_path):
+    path = tmp_path / "snapshot"
+    engine.export_snapshot(path)
+    return path
+
+
+def test_export_keeps_every_chunk(engine, snapshot_dir):
+    snapshot = Snapshot(snapshot_dir, verify=True)
+    stored = engine.indexer.collection.get(include=["documents", "metadatas"])
+    assert len(snapshot) == len(stored["ids"])
+
+    served = SnapshotIndexer(snapshot_dir)
+    by_id = {doc.id: doc for doc in served.get_documents(stored["ids"])}
+    for doc_id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"], strict=True):
+        assert by_id[doc_id].page_content == text
+        assert by_id[doc_id].metadata == metadata
+
+
+def test_snapshot_search_matches_the_index(engine, snapshot_dir):
+    expected = [doc.id for doc, _ in engine.indexer.search(QUERY, k=5)]
+    served = [doc.id for doc, _ in SnapshotIndexer(snapshot_dir).search(QUERY, k=5)]
+    assert served == expected
+
+    filtered = SnapshotIndexer(snapshot_dir).search(QUERY, k=50, filter_dict={"directory": "protocols"})
+    assert filtered and all(doc.metadata["directory"] == "protocols" for doc, _ in filtered)
+
+
+def test_engine_serves_a_snapshot_read_only(snapshot_dir, tmp_path):
+    engine = EnergyDataSearchEngine(make_config(tmp_path / "served", snapshot_path=snapshot_dir))
+    assert engine.search(QUERY, max_results=3)
+    assert engine.get_stats()["document_count"] == len(Snapshot(snapshot_dir))
+    with pytest.raises(SnapshotError):
+        engine.indexer.delete_by_source("anything")
+
+
+def test_import_round_trip(engine, snapshot_dir, tmp_path):
+    target = EnergyDataSearchEngine(make_config(tmp_path / "imported"))
+    assert target.import_snapshot(snapshot_dir) == engine.indexer.collection.count()
+
+    assert target.indexer.facet_counts.counts == engine.indexer.facet_counts.counts
+    assert [doc.id for doc, _ in target.indexer.search(QUERY, k=5)] == [doc.id for doc, _ in engine.indexer.search(QUERY, k=5)]
+    source = engine.indexer.collection.get(limit=1, include=["metadatas"])["metadatas"][0]["source"]
+    imported, original = target.related_documents([source])[source], engine.related_documents([source])[source]
+    assert [other for other, _ in imported] == [other for other, _ in original]
+    # Saved graphs hold float16 similarities
+    assert [score for _, score in imported] == pytest.approx([score for _, score in original], abs=1e-3)
+    target.close()
+
+
+def test_import_into_a_populated_index_needs_replace(engine, snapshot_dir, tmp_path):
+    target = EnergyDataSearchEngine(make_config(tmp_path / "imported"))
+    target.import_snapshot(snapshot_dir)
+    with pytest.raises(SnapshotError, match="already holds"):
+        target.import_snapshot(snapshot_dir)
+
+    removed = engine.indexer.collection.get(limit=1, include=["metadatas"])["metadatas"][0]["source"]
+    engine.indexer.delete_by_source(removed)
+    smaller = tmp_path / "smaller"
+    engine.export_snapshot(smaller)
+    assert target.import_snapshot(smaller, replace=True) == engine.indexer.collection.count()
+    assert target.indexer.collection.count() == engine.indexer.collection.count()
+    assert not target.indexer.collection.get(where={"source": removed})["ids"]
+    assert target.indexer.facet_counts.total == engine.indexer.collection.count()
+    target.close()
+
+
+def test_verify_detects_a_changed_file(snapshot_dir):
+    with open(snapshot_dir / "vectors.npy", "r+b") as f:
+        f.seek(-4, 2)
+        f.write(b"\x00\x00\x80\x7f")
+    with pytest.raises(SnapshotError, match="Checksum mismatch"):
+        Snapshot(snapshot_dir, verify=True)
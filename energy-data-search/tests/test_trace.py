@@ -0,0 +1,76 @@
+"""Tests for per-search timing traces and the rolling stage metrics."""
+
+from energy_data_search.query.trace import STAGES, SearchTrace, timed
+from energy_data_search.utils.metrics import RollingHistogram, SearchMetrics
+
+
+def test_stages_add_up():
+    trace = SearchTrace()
+    with trace.stage("embed"):
+        pass
+    first = trace.embed_ms
+    with timed(trace, "embed"):
+        sum(range(10000))
+    assert trace.embed_ms > first > 0
+    with timed(None, "embed"):
+        pass
+    assert set(trace.to_dict()) >= {f"{stage}_ms" for stage in STAGES}
+
+
+def test_search_fills_in_the_trace(engine):
+    trace = SearchTrace()
+    results = engine.search("battery storage dispatch", max_results=5, hydrate=False, trace=trace)
+    assert len(results) == 5
+    assert trace.queries == 1
+    assert trace.candidates == 5
+    assert trace.embed_ms > 0 and trace.ann_ms > 0 and trace.hydrate_ms > 0
+    assert trace.total_ms >= trace.embed_ms + trace.ann_ms + trace.hydrate_ms
+    assert trace.rerank_ms == trace.diversify_ms == 0
+
+    repeat = SearchTrace()
+    engine.search("battery storage dispatch", max_results=5, hydrate=False, trace=repeat)
+    assert (repeat.cache_hits, repeat.candidates, repeat.ann_ms) == (1, 0, 0)
+
+
+def test_batch_trace_covers_every_query(engine):
+    trace = SearchTrace()
+    engine.search_many(["battery storage", "settlement invoice", "battery storage"], max_results=3, trace=trace)
+    assert trace.queries == 3
+    assert trace.candidates == 6
+
+
+def test_histogram_drops_observations_outside_the_window():
+    histogram = RollingHistogram(window_seconds=10, buckets=(1, 10))
+    histogram.observe(4, now=95)
+    for value in (0.5, 2, 3, 20):
+        histogram.observe(value, now=100)
+    snapshot = histogram.snapshot(now=100)
+    assert snapshot["count"] == 5
+    assert snapshot["buckets"] == {"1": 1, "10": 4}
+    assert snapshot["p50"] == 3
+
+    assert histogram.snapshot(now=108)["count"] == 4
+    assert histogram.snapshot(now=200) == {"count": 0, "sum": 0.0, "buckets": {"1": 0, "10": 0}}
+
+
+def test_metrics_count_searches_and_export_prometheus():
+    metrics = SearchMetrics()
+    metrics.observe(SearchTrace(queries=1, embed_ms=2.0, total_ms=5.0, candidates=10, cache_hits=1))
+    metrics.observe(SearchTrace(queries=1, total_ms=1.0, semantic_cache_hits=1))
+    metrics.record_error()
+    metrics.register_gauge("queue_depth", lambda: 3)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["searches"] == 2
+    assert snapshot["counters"]["errors"] == 1
+    assert snapshot["counters"]["candidates"] == 10
+    assert snapshot["counters"]["cache_hits"] == snapshot["counters"]["semantic_cache_hits"] == 1
+    assert snapshot["gauges"] == {"queue_depth": 3}
+    assert snapshot["stages_ms"]["total"]["count"] == 2
+    assert snapshot["stages_ms"]["total"]["mean"] == 3.0
+
+    text = metrics.to_prometheus()
+    assert "energy_search_searches_total 2" in text
+    assert "energy_search_queue_depth 3" in text
+    assert 'energy_search_stage_duration_ms_bucket{stage="total",le="+Inf"} 2' in text
+    assert 'energy_search_stage_duration_ms_count{stage="embed"} 2' in text